@@ -0,0 +1,447 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Benchmarks of the parameter generators on a synthetic asset catalog, without Blender
+# and without a HumGen3D installation:
+#   python -m anyhuman.benchmark [--output results.json] [--baseline results.json]
+
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import copy
+import statistics
+import tempfile
+import contextlib
+import collections
+from pathlib import Path
+
+import numpy as np
+
+from .catalog import HumGenConfigValues
+from .paramgenerators import ComputeParams, ComputeParamsBatch, ResetDiverseParams, ResolveRandomParams
+from .paramgenerators.catalog_index import HAIR_GROUPS
+from .paramgenerators.hashing import GetCatalogFingerprint, GetPackageVersion, HashParams
+from .paramgenerators.random_full import FullyRandomizeParams
+from .paramgenerators.random_realistic import RealisticRandomizeParams
+from .paramgenerators.rng import CreateRandom, KeyedRandom
+from .paramgenerators.validator import GetParamsValidator
+from .paramgenerators.zwicky import IterZwickyParams, ZwickyParams
+
+# version of the format of the results
+RESULTS_VERSION = 1
+
+# Zwicky box specification used by the benchmarks
+ZWICKY_SPEC = {
+    "gender": ["male", "female"],
+    "age": ["young", "adult", "senior"],
+    "type": ["asian", "black", "caucasian"],
+    "bodytype": ["thin", "average", "corpulent"],
+}
+
+# number of records of the JSONL file read by the FILE benchmark
+FILE_RECORDS = 1000
+
+# number of humans of the Latin hypercube batch the LHS benchmark selects humans from
+LHS_COUNT = 2000
+
+# parameters of the DIVERSE benchmark
+DIVERSE_PARAMS = {"sBaseMode": "RANDOM_REALISTIC", "fMinDistance": 0.1, "sDiversityKey": "benchmark"}
+
+
+######################################################################
+def CreateSyntheticCatalog(_iBodiesPerType=8, _iOutfitsPerSet=16, _iBeards=12):
+    """
+    Creates an asset catalog like catalog.ScanCatalog does, with generated names,
+    which covers everything the parameter generators look up.
+
+    Parameters
+    ----------
+    _iBodiesPerType : int, optional
+        number of bodies per gender and ethnicity
+    _iOutfitsPerSet : int, optional
+        number of outfits per gender and outfit set
+    _iBeards : int, optional
+        number of beard styles
+
+    Returns
+    -------
+    HumGenConfigValues
+        asset catalog
+    """
+    xCatalog = HumGenConfigValues()
+    for sType in ("Asian", "Black", "Caucasian"):
+        for iBody in range(1, _iBodiesPerType + 1):
+            xCatalog.list_females.append(f"{sType} {iBody}")
+            xCatalog.list_males.append(f"{sType} {iBody}")
+        # endfor
+    # endfor
+
+    for sGender, dicHair in (("female", xCatalog.dict_female_head_hair), ("male", xCatalog.dict_male_head_hair)):
+        for tStyles in HAIR_GROUPS[sGender].values():
+            for sStyle in tStyles:
+                dicHair[sStyle] = f"/hair/head/{sGender}/{sStyle}.json"
+            # endfor
+        # endfor
+    # endfor
+    for iBeard in range(1, _iBeards + 1):
+        xCatalog.dict_male_face_hair[f"Beard {iBeard}"] = f"/hair/face_hair/Beard {iBeard}.json"
+    # endfor
+
+    for dicOutfits in (xCatalog.dict_female_outfits, xCatalog.dict_male_outfits):
+        for sSet in ("Casual", "Summer", "Winter", "Office", "Extra Outfits Pack"):
+            dicOutfits[sSet] = [f"{sSet} {iOutfit}" for iOutfit in range(1, _iOutfitsPerSet + 1)]
+        # endfor
+        # outfits ignored by the random generators
+        dicOutfits["Extra Outfits Pack"].extend(["Flight Suit", "Lab Tech", "Pirate"])
+    # endfor
+
+    xCatalog.dict_bodies = {"male": xCatalog.list_males, "female": xCatalog.list_females}
+    xCatalog.dict_hair = {"male": xCatalog.dict_male_head_hair, "female": xCatalog.dict_female_head_hair}
+    xCatalog.dict_outfits = {"male": xCatalog.dict_male_outfits, "female": xCatalog.dict_female_outfits}
+    xCatalog.persona_path = Path(__file__).parent.resolve() / "personas"
+    return xCatalog
+
+
+# enddef
+
+
+######################################################################
+def _PerHuman(_funcHuman):
+    # benchmark calling _funcHuman(index) for every human
+    def funcRun(_iCount):
+        for iIndex in range(_iCount):
+            _funcHuman(iIndex)
+        # endfor
+
+    # enddef
+
+    return funcRun
+
+
+# enddef
+
+
+def GetBenchmarks(_xCatalog, _pathFolder):
+    """
+    Returns the benchmarks as dict of name to (kind, function). A function computes the
+    parameters of the number of humans it is called with. Kind 'human' denotes benchmarks
+    computing one human at a time, 'batch' the ones computing all humans at once.
+    Files read by the benchmarks are written to the folder _pathFolder.
+    """
+    dicPersona = ComputeParams("PERSONA", {"sPersonaId": "alice"}, {}, _xCatalog)
+    dicPersona["eyes"]["eyebrows_style"] = "random"
+    dicPersona["outfit"]["outfit_style"] = "random"
+    dicRealistic = ComputeParams("RANDOM_REALISTIC", {}, {}, _xCatalog, rng=CreateRandom(0))
+    xValidator = GetParamsValidator(_xCatalog)
+
+    dicBenchmarks = {}
+    for sMode, dicParams in (
+        ("RANDOM_FULL", {}),
+        ("RANDOM_REALISTIC", {}),
+        ("ZWICKY", ZWICKY_SPEC),
+        ("PERSONA", {"sPersonaId": "alice"}),
+    ):
+        dicBenchmarks[f"ComputeParams/{sMode}"] = (
+            "human",
+            _PerHuman(lambda i, m=sMode, p=dicParams: ComputeParams(m, p, {}, _xCatalog, rng=CreateRandom(i))),
+        )
+    # endfor
+    dicBenchmarks["ComputeParams/RANDOM_REALISTIC/keyed"] = (
+        "human",
+        _PerHuman(lambda i: ComputeParams("RANDOM_REALISTIC", {}, {}, _xCatalog, rng=KeyedRandom(0, i))),
+    )
+    dicBenchmarks["ComputeParams/RANDOM_REALISTIC/overwrite"] = (
+        "human",
+        _PerHuman(
+            lambda i: ComputeParams(
+                "RANDOM_REALISTIC", {}, {"height": 180.0, "skin": {"tone": 1.0}}, _xCatalog, rng=CreateRandom(i)
+            )
+        ),
+    )
+    dicBenchmarks["FullyRandomizeParams"] = (
+        "human",
+        _PerHuman(lambda i: FullyRandomizeParams({}, _xCatalog, CreateRandom(i))),
+    )
+    dicBenchmarks["RealisticRandomizeParams"] = (
+        "human",
+        _PerHuman(lambda i: RealisticRandomizeParams({}, _xCatalog, CreateRandom(i))),
+    )
+    dicBenchmarks["ZwickyParams"] = (
+        "human",
+        _PerHuman(lambda i: ZwickyParams(ZWICKY_SPEC, _xCatalog, CreateRandom(i))),
+    )
+    dicBenchmarks["ResolveRandomParams"] = (
+        "human",
+        # the entries are resolved in place, so every human resolves a copy
+        _PerHuman(
+            lambda i: ResolveRandomParams("RANDOM_REALISTIC", copy.deepcopy(dicPersona), _xCatalog, CreateRandom(i))
+        ),
+    )
+
+    pathJsonl = Path(_pathFolder) / "humans.jsonl"
+    with open(pathJsonl, "w", encoding="utf-8") as xFile:
+        for iIndex in range(FILE_RECORDS):
+            dicParams = ComputeParams("RANDOM_REALISTIC", {}, {}, _xCatalog, rng=CreateRandom(iIndex))
+            xFile.write(json.dumps({"sId": f"human_{iIndex}", "mParams": dicParams}) + "\n")
+        # endfor
+    # endwith
+    dicBenchmarks["ComputeParams/FILE"] = (
+        "human",
+        _PerHuman(
+            lambda i: ComputeParams("FILE", {"sFilename": str(pathJsonl), "iIndex": i % FILE_RECORDS}, {}, _xCatalog)
+        ),
+    )
+    # the batch is computed once per process, in the warm-up run
+    dicBenchmarks["ComputeParams/LHS"] = (
+        "human",
+        _PerHuman(
+            lambda i: ComputeParams(
+                "LHS",
+                {"sBaseMode": "RANDOM_REALISTIC", "iCount": LHS_COUNT, "iIndex": i % LHS_COUNT},
+                {},
+                _xCatalog,
+            )
+        ),
+    )
+    dicBenchmarks["ComputeParams/DIVERSE"] = ("human", lambda n: _RunDiverse(n, _xCatalog))
+    dicBenchmarks["Validate"] = ("human", _PerHuman(lambda i: xValidator.Validate(dicRealistic)))
+    dicBenchmarks["HashParams"] = ("human", _PerHuman(lambda i: HashParams(dicRealistic, _xCatalog)))
+
+    for sMode, dicParams in (("RANDOM_FULL", {}), ("RANDOM_REALISTIC", {}), ("ZWICKY", ZWICKY_SPEC)):
+        dicBenchmarks[f"ComputeParamsBatch/{sMode}"] = (
+            "batch",
+            lambda n, m=sMode, p=dicParams: ComputeParamsBatch(m, n, 0, p, _xCatalog),
+        )
+        dicBenchmarks[f"ComputeParamsBatch/{sMode}/dicts"] = (
+            "batch",
+            lambda n, m=sMode, p=dicParams: list(ComputeParamsBatch(m, n, 0, p, _xCatalog)),
+        )
+    # endfor
+    dicBenchmarks["ComputeParamsBatch/RANDOM_REALISTIC/LHS"] = (
+        "batch",
+        lambda n: ComputeParamsBatch("RANDOM_REALISTIC", n, 0, {}, _xCatalog, sampling_mode="LHS"),
+    )
+    dicBenchmarks["IterZwickyParams"] = (
+        "batch",
+        lambda n: collections.deque(IterZwickyParams(ZWICKY_SPEC, _xCatalog, n, seed=0), maxlen=0),
+    )
+    dicBenchmarks["ValidateBatch"] = (
+        "batch",
+        lambda n, b=[]: xValidator.ValidateBatch(_GetCachedBatch(b, n, _xCatalog)),
+    )
+    return dicBenchmarks
+
+
+# enddef
+
+
+def _RunDiverse(_iCount, _xCatalog):
+    # every run starts without accepted humans, so that the runs take equally long
+    ResetDiverseParams(DIVERSE_PARAMS)
+    for iIndex in range(_iCount):
+        ComputeParams("DIVERSE", DIVERSE_PARAMS, {}, _xCatalog, rng=CreateRandom(iIndex))
+    # endfor
+
+
+# enddef
+
+
+def _GetCachedBatch(_lCache, _iCount, _xCatalog):
+    # batch, which is only computed in the first repetition of a benchmark
+    if len(_lCache) == 0 or len(_lCache[0]) != _iCount:
+        _lCache[:] = [ComputeParamsBatch("RANDOM_REALISTIC", _iCount, 0, {}, _xCatalog)]
+    # endif
+    return _lCache[0]
+
+
+# enddef
+
+
+######################################################################
+def RunBenchmarks(_iHumanCount=2000, _iBatchCount=100000, _iRepeat=5, _sFilter=None, _xCatalog=None):
+    """
+    Runs the benchmarks and returns their results.
+
+    Every benchmark is run _iRepeat times after a warm-up run, which fills the caches
+    of compiled samplers, and the fastest and median durations are reported.
+
+    Parameters
+    ----------
+    _iHumanCount : int, optional
+        number of humans of benchmarks computing one human at a time
+    _iBatchCount : int, optional
+        number of humans of benchmarks computing all humans at once
+    _iRepeat : int, optional
+        number of timed runs per benchmark
+    _sFilter : str, optional
+        only run the benchmarks, whose name contains this string
+    _xCatalog : HumGenConfigValues, optional
+        asset catalog, by default CreateSyntheticCatalog()
+
+    Returns
+    -------
+    dict
+        JSON serializable results
+    """
+    xCatalog = CreateSyntheticCatalog() if _xCatalog is None else _xCatalog
+
+    lResults = []
+    # files read by the benchmarks are written to a temporary folder
+    with tempfile.TemporaryDirectory() as sFolder:
+        # parameter generators print messages about values they leave to HumGen3D
+        with contextlib.redirect_stdout(io.StringIO()):
+            dicBenchmarks = GetBenchmarks(xCatalog, sFolder)
+        # endwith
+
+        for sName, (sKind, funcRun) in dicBenchmarks.items():
+            if _sFilter is not None and _sFilter not in sName:
+                continue
+            # endif
+            iCount = _iHumanCount if sKind == "human" else _iBatchCount
+
+            lSeconds = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                funcRun(min(iCount, 100))
+                for _ in range(_iRepeat):
+                    fStart = time.perf_counter()
+                    funcRun(iCount)
+                    lSeconds.append(time.perf_counter() - fStart)
+                # endfor
+            # endwith
+
+            fMin = min(lSeconds)
+            lResults.append(
+                {
+                    "name": sName,
+                    "kind": sKind,
+                    "count": iCount,
+                    "seconds_min": fMin,
+                    "seconds_median": statistics.median(lSeconds),
+                    "us_per_human": 1e6 * fMin / iCount,
+                    "humans_per_second": iCount / fMin,
+                }
+            )
+        # endfor
+    # endwith
+
+    return {
+        "version": RESULTS_VERSION,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "anyhuman": GetPackageVersion(),
+            "catalog": GetCatalogFingerprint(xCatalog),
+        },
+        "repeat": _iRepeat,
+        "results": lResults,
+    }
+
+
+# enddef
+
+
+######################################################################
+def CompareResults(_dicResults, _dicBaseline, _fTolerance=0.2):
+    """
+    Compares results with the results of a baseline run.
+
+    Returns
+    -------
+    list
+        tuples (name, baseline and current microseconds per human, relative change) of the
+        benchmarks, which are more than _fTolerance slower than in the baseline
+    """
+    dicBaseline = {dicResult["name"]: dicResult for dicResult in _dicBaseline["results"]}
+    lRegressions = []
+    for dicResult in _dicResults["results"]:
+        dicBase = dicBaseline.get(dicResult["name"])
+        if dicBase is None:
+            continue
+        # endif
+        fChange = dicResult["us_per_human"] / dicBase["us_per_human"] - 1.0
+        if fChange > _fTolerance:
+            lRegressions.append((dicResult["name"], dicBase["us_per_human"], dicResult["us_per_human"], fChange))
+        # endif
+    # endfor
+    return lRegressions
+
+
+# enddef
+
+
+######################################################################
+def main(_lArgs=None):
+    xParser = argparse.ArgumentParser(description="Benchmark the parameter generators on a synthetic asset catalog")
+    xParser.add_argument("--count", type=int, default=2000, help="humans of benchmarks computing one at a time")
+    xParser.add_argument("--batch-count", type=int, default=100000, help="humans of batch benchmarks")
+    xParser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    xParser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this string")
+    xParser.add_argument("--output", default=None, help="file for the results as JSON")
+    xParser.add_argument("--baseline", default=None, help="results of a former run to compare with")
+    xParser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown to the baseline")
+    xArgs = xParser.parse_args(_lArgs)
+
+    dicResults = RunBenchmarks(xArgs.count, xArgs.batch_count, xArgs.repeat, xArgs.filter)
+    if xArgs.output is not None:
+        with open(xArgs.output, "w") as xFile:
+            json.dump(dicResults, xFile, indent=4)
+        # endwith
+    # endif
+
+    for dicResult in dicResults["results"]:
+        print(
+            f"{dicResult['name']:<45} {dicResult['us_per_human']:>10.2f} us/human"
+            f" {dicResult['humans_per_second']:>12.0f} humans/s"
+        )
+    # endfor
+
+    if xArgs.baseline is not None:
+        with open(xArgs.baseline, "r") as xFile:
+            dicBaseline = json.load(xFile)
+        # endwith
+        lRegressions = CompareResults(dicResults, dicBaseline, xArgs.tolerance)
+        for sName, fBase, fCurrent, fChange in lRegressions:
+            print(f"!!! {sName} is {100 * fChange:.0f}% slower: {fBase:.2f} -> {fCurrent:.2f} us/human")
+        # endfor
+        return 1 if len(lRegressions) > 0 else 0
+    # endif
+    return 0
+
+
+# enddef
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# endif
@@ -0,0 +1,805 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Scan of the asset catalog of the HumGen3D add-on, independent of Blender,
+# so that parameters can also be computed outside of Blender.
+# The scanned catalog is cached in a file in the content folder, see LoadCatalog,
+# and a loaded catalog can be updated to changes of the content folder, see RefreshCatalog.
+# Assets that failed the health check of anyhuman.health are excluded from the loaded catalog.
+
+import os
+import os.path
+import json
+import hashlib
+import collections
+import concurrent.futures
+from pathlib import Path
+
+# name of the cache file of the catalog in the content folder
+CATALOG_CACHE_FILENAME = ".anyhuman_catalog.json"
+
+# version of the cache file format, to be increased when the scan changes
+CATALOG_CACHE_VERSION = 4
+
+# folders of the content folder, whose files make up the catalog
+CATALOG_FOLDERS = ("models", "hair", "outfits")
+
+# folders with assets not listed in the catalog, which are not scanned (lower case)
+SKIPPED_FOLDERS = frozenset(("textures", "previews", "thumbnails"))
+
+# number of threads listing folders concurrently
+SCAN_THREADS = 16
+
+# name of the file with the results of the asset health check in the content folder, see anyhuman.health
+ASSET_HEALTH_FILENAME = ".anyhuman_health.json"
+
+# version of the asset health file format
+ASSET_HEALTH_VERSION = 1
+
+# outfits known to fail loading, which are excluded as long as they have not been checked
+KNOWN_BROKEN_OUTFITS = ("BBQ_Barbara", "New_Intern")
+
+# attributes of HumGenConfigValues filled from the files of each folder of CATALOG_FOLDERS
+CATALOG_ATTRIBUTES = {
+    "models": ("list_females", "list_males"),
+    "hair": ("dict_female_head_hair", "dict_male_head_hair", "dict_male_face_hair"),
+    "outfits": ("dict_female_outfits", "dict_male_outfits", "dict_female_outfit_files", "dict_male_outfit_files"),
+}
+
+
+#########################################################################################################
+class HumGenConfigValues:
+    """
+    Asset catalog of the HumGen3D add-on: the available bodies, hair, beard and outfit styles.
+    """
+
+    def __init__(self):
+        self.addon_path = None
+        # increased whenever the catalog is changed in place, see RefreshCatalog
+        self.catalog_version = 0
+        # modification times of all scanned folders relative to the content folder, see LoadCatalog
+        self.dict_folder_mtimes = {}
+        # file names and sub folders of all scanned folders, see RefreshCatalog
+        self.dict_folder_listings = {}
+        # health check record per asset file relative to the content folder, see LoadAssetHealth
+        self.dict_asset_health = {}
+        # modification times of the asset health files when the records were loaded
+        self.health_file_mtimes = None
+        self.list_females = []
+        self.list_males = []
+        self.dict_female_head_hair = {}
+        self.dict_male_head_hair = {}
+        self.dict_male_face_hair = {}
+        self.dict_female_outfits = collections.defaultdict(list)
+        self.dict_male_outfits = collections.defaultdict(list)
+        # file relative to the content folder of every outfit of dict_*_outfits, in the same order
+        self.dict_female_outfit_files = collections.defaultdict(list)
+        self.dict_male_outfit_files = collections.defaultdict(list)
+
+    # enddef
+
+
+# endclass
+
+
+#########################################################################################################
+def ScanCatalog(_sAddonPath, _pathPersonas=None):
+    """
+    Sets lists for base humans/hair/beard styles from humgen content folder.
+    All assets are listed, also the ones that failed the health check (see LoadCatalog).
+
+    Parameters
+    ----------
+    _sAddonPath : str
+        content folder of the HumGen3D add-on
+    _pathPersonas : Path, optional
+        folder of the persona files, by default the personas of this package
+
+    Returns
+    -------
+    HumGenConfigValues
+        asset catalog
+    """
+    generator_config = HumGenConfigValues()
+    generator_config.addon_path = str(_sAddonPath)
+
+    _ScanFolders(
+        _sAddonPath, CATALOG_FOLDERS, generator_config.dict_folder_mtimes, generator_config.dict_folder_listings
+    )
+    _AddAssets(generator_config, _GetTrees(CATALOG_FOLDERS, generator_config.dict_folder_listings))
+
+    return _FinishCatalog(generator_config, _pathPersonas)
+
+
+# enddef
+
+
+def _AddAssets(generator_config, _dicTrees):
+    # fills the attributes of the folder trees in _dicTrees (see _GetTrees) from their files, in place
+    for sTop in _dicTrees:
+        for sAttribute in CATALOG_ATTRIBUTES[sTop]:
+            getattr(generator_config, sAttribute).clear()
+        # endfor
+    # endfor
+    sep = os.path.sep
+
+    # paths of files relative to the content folder, as os.path.join creates them
+    for rel_dir, files in _dicTrees.get("models", ()):
+        for file_name in files:
+            rel_file = sep + "models" + sep + rel_dir + sep + file_name
+            if ".json" in rel_file:
+                file_name = os.path.splitext(file_name)[0]
+                if "female" in rel_file:
+                    generator_config.list_females.append(file_name)
+                elif "male" in rel_file:
+                    generator_config.list_males.append(file_name)
+                # endif gender
+            # endif model
+        # endfor
+    # endfor
+
+    for rel_dir, files in _dicTrees.get("hair", ()):
+        for file_name in files:
+            rel_file = sep + "hair" + sep + rel_dir + sep + file_name
+            if ".json" not in rel_file:
+                continue
+            # endif
+            if "head" in rel_file:
+                file_name = os.path.splitext(file_name)[0]
+                if "female" in rel_file:
+                    generator_config.dict_female_head_hair[file_name] = rel_file
+                elif "male" in rel_file:
+                    generator_config.dict_male_head_hair[file_name] = rel_file
+                # endif gender
+            if "face_hair" in rel_file:
+                file_name = os.path.splitext(file_name)[0]
+                generator_config.dict_male_face_hair[file_name] = rel_file
+            # endif face/head hair
+        # endfor
+    # endfor
+
+    for rel_dir, files in _dicTrees.get("outfits", ()):
+        # the outfit set is the second folder below 'outfits', e.g. 'outfits/female/Casual'
+        components = [] if rel_dir == "." else rel_dir.split(sep)
+        for file_name in files:
+            rel_file = rel_dir + sep + file_name
+            if ".blend" not in rel_file or len(components) < 1:
+                continue
+            # endif
+            set_name = components[1] if len(components) > 1 else file_name
+            file_name = os.path.splitext(file_name)[0]
+
+            if "female" in rel_file:
+                generator_config.dict_female_outfits[set_name].append(file_name)
+                generator_config.dict_female_outfit_files[set_name].append(sep + "outfits" + sep + rel_file)
+            elif "male" in rel_file:
+                generator_config.dict_male_outfits[set_name].append(file_name)
+                generator_config.dict_male_outfit_files[set_name].append(sep + "outfits" + sep + rel_file)
+            # endif gender
+        # endfor
+    # endfor
+
+
+# enddef
+
+
+def _FinishCatalog(generator_config, _pathPersonas):
+    # checks the scanned catalog and adds the dicts per gender
+    if len(generator_config.list_males) == 0:
+        raise RuntimeError("list of male model files empty")
+
+    if len(generator_config.dict_male_head_hair) == 0:
+        raise RuntimeError("list of male hair model files empty")
+
+    if len(generator_config.dict_male_face_hair) == 0:
+        raise RuntimeError("list of male face hair model files empty")
+
+    if len(generator_config.list_females) == 0:
+        raise RuntimeError("list of female model files empty")
+
+    if len(generator_config.dict_female_head_hair) == 0:
+        raise RuntimeError("list of female hair model files empty")
+
+    if len(generator_config.dict_female_outfits) == 0:
+        raise RuntimeError("list of female outfit files empty")
+
+    if len(generator_config.dict_male_outfits) == 0:
+        raise RuntimeError("list of male outfit files empty")
+
+    generator_config.dict_bodies = {
+        "male": generator_config.list_males,
+        "female": generator_config.list_females,
+    }
+    generator_config.dict_hair = {
+        "male": generator_config.dict_male_head_hair,
+        "female": generator_config.dict_female_head_hair,
+    }
+
+    generator_config.dict_outfits = {
+        "male": generator_config.dict_male_outfits,
+        "female": generator_config.dict_female_outfits,
+    }
+    generator_config.dict_outfit_files = {
+        "male": generator_config.dict_male_outfit_files,
+        "female": generator_config.dict_female_outfit_files,
+    }
+
+    if _pathPersonas is None:
+        _pathPersonas = Path(__file__).parent.resolve() / "personas"
+    # endif
+    generator_config.persona_path = Path(_pathPersonas)
+
+    return generator_config
+
+
+# enddef
+
+
+def _ScanFolders(_sAddonPath, _lFolders, _dicFolderMtimes, _dicFolderListings):
+    """
+    Lists the files of the folder trees _lFolders of the content folder like os.walk does, but lists all
+    folders of a level of the trees concurrently, since scans of network storage are bound by the latency
+    of the file system. Folders with names in SKIPPED_FOLDERS are not scanned, and neither are sub folders
+    that are already in _dicFolderListings. The modification times and listings (list of file names,
+    list of sub folders) of the scanned folders are added to _dicFolderMtimes and _dicFolderListings.
+    """
+    lLevel = [sFolder for sFolder in _lFolders if os.path.isdir(os.path.join(_sAddonPath, sFolder))]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=SCAN_THREADS) as xExecutor:
+        while len(lLevel) > 0:
+            lNextLevel = []
+            for sFolder, tListing in zip(lLevel, xExecutor.map(_ListFolder, [_sAddonPath] * len(lLevel), lLevel)):
+                if tListing is None:
+                    continue
+                # endif
+                lFiles, lSubFolders, iMtime = tListing
+                _dicFolderListings[sFolder] = [lFiles, lSubFolders]
+                _dicFolderMtimes[sFolder] = iMtime
+                lNextLevel.extend(sSubFolder for sSubFolder in lSubFolders if sSubFolder not in _dicFolderListings)
+            # endfor
+            lLevel = lNextLevel
+        # endwhile
+    # endwith
+
+
+# enddef
+
+
+def _GetTrees(_lFolders, _dicFolderListings):
+    """
+    Returns the listed files of the folder trees _lFolders, see _ScanFolders.
+
+    Returns
+    -------
+    dict
+        list of (folder relative to the tree, list of file names) per tree, in the order of os.walk
+    """
+    dicTrees = {}
+    for sTop in _lFolders:
+        # depth first, top down like os.walk
+        lTree = []
+        lStack = [sTop] if sTop in _dicFolderListings else []
+        while len(lStack) > 0:
+            sFolder = lStack.pop()
+            lFiles, lSubFolders = _dicFolderListings[sFolder]
+            sRelFolder = "." if sFolder == sTop else sFolder[len(sTop) + 1 :].replace("/", os.path.sep)
+            lTree.append((sRelFolder, lFiles))
+            lStack.extend(sSubFolder for sSubFolder in reversed(lSubFolders) if sSubFolder in _dicFolderListings)
+        # endwhile
+        dicTrees[sTop] = lTree
+    # endfor
+    return dicTrees
+
+
+# enddef
+
+
+def _ListFolder(_sAddonPath, _sFolder):
+    # file names, sub folders to scan and modification time of a folder, or None if it cannot be read
+    sPath = os.path.join(_sAddonPath, *_sFolder.split("/"))
+    lFiles = []
+    lSubFolders = []
+    try:
+        iMtime = os.stat(sPath).st_mtime_ns
+        with os.scandir(sPath) as iterEntries:
+            for xEntry in iterEntries:
+                try:
+                    bIsDir = xEntry.is_dir()
+                except OSError:
+                    bIsDir = False
+                # endtry
+                if not bIsDir:
+                    lFiles.append(xEntry.name)
+                elif xEntry.name.lower() not in SKIPPED_FOLDERS and not xEntry.is_symlink():
+                    lSubFolders.append(f"{_sFolder}/{xEntry.name}")
+                # endif
+            # endfor
+        # endwith
+    except OSError:
+        return None
+    # endtry
+    return lFiles, lSubFolders, iMtime
+
+
+# enddef
+
+
+#########################################################################################################
+def LoadCatalog(_sAddonPath, _pathPersonas=None, _pathCache=None, _bExcludeBroken=True):
+    """
+    Returns the asset catalog of a HumGen3D content folder, like ScanCatalog, but reads it from a
+    cache file if the content did not change since it was written.
+
+    The cache stores the modification times of all scanned folders. Since the modification time of
+    a folder changes if a file or folder in it is added, removed or renamed, the cache is valid if
+    all these times are unchanged, which only needs a stat per folder instead of a scan of all files.
+    If the cache is missing or outdated, the content folder is scanned and the cache is written.
+
+    The records of the asset health check are loaded into the attribute dict_asset_health of the
+    catalog, and assets that failed the check are removed from the catalog (see ExcludeBrokenAssets).
+
+    Parameters
+    ----------
+    _sAddonPath : str
+        content folder of the HumGen3D add-on
+    _pathPersonas : Path, optional
+        folder of the persona files, by default the personas of this package
+    _pathCache : Path, optional
+        cache file, by default CATALOG_CACHE_FILENAME in the content folder, or in the
+        user cache folder if the content folder is not writable
+    _bExcludeBroken : bool, optional
+        remove the assets that failed the health check, by default True
+
+    Returns
+    -------
+    HumGenConfigValues
+        asset catalog
+    """
+    lCacheFiles = [Path(_pathCache)] if _pathCache is not None else _GetCacheFiles(_sAddonPath)
+
+    generator_config = None
+    for pathCache in lCacheFiles:
+        generator_config = _ReadCache(pathCache, _sAddonPath, _pathPersonas)
+        if generator_config is not None:
+            break
+        # endif
+    # endfor
+
+    if generator_config is None:
+        generator_config = ScanCatalog(_sAddonPath, _pathPersonas)
+        for pathCache in lCacheFiles:
+            if _WriteCache(pathCache, generator_config):
+                break
+            # endif
+        # endfor
+    # endif
+
+    _LoadHealth(generator_config, _bExcludeBroken)
+    return generator_config
+
+
+# enddef
+
+
+def _LoadHealth(generator_config, _bExcludeBroken):
+    # loads the asset health records into the catalog and removes the broken assets
+    generator_config.health_file_mtimes = _GetHealthMtimes(generator_config.addon_path)
+    generator_config.dict_asset_health = LoadAssetHealth(generator_config.addon_path)
+    if _bExcludeBroken:
+        ExcludeBrokenAssets(generator_config)
+    # endif
+
+
+# enddef
+
+
+def _GetHealthMtimes(_sAddonPath):
+    # modification times of the possible asset health files, None for missing ones
+    lMtimes = []
+    for pathHealth in _GetCacheFiles(_sAddonPath, ASSET_HEALTH_FILENAME, "health"):
+        try:
+            lMtimes.append(pathHealth.stat().st_mtime_ns)
+        except OSError:
+            lMtimes.append(None)
+        # endtry
+    # endfor
+    return tuple(lMtimes)
+
+
+# enddef
+
+
+#########################################################################################################
+def RefreshCatalog(generator_config, _bExcludeBroken=True):
+    """
+    Updates a catalog returned by LoadCatalog in place to the current content of its content folder,
+    e.g. in a Blender process that generates humans for many jobs while assets are added.
+
+    Only the folders whose modification time changed are listed again, together with new sub folders,
+    so a check of an unchanged content folder only needs a stat per folder, like the check of the cache.
+    The bodies, hair and beard styles or outfits are then rebuilt from the kept listings of their
+    folders, where a folder tree changed, in the order of a new scan. If the trees or the asset health
+    file changed, the health records are loaded again and broken assets are removed (see LoadCatalog),
+    the cache file is updated, and the attribute catalog_version is increased, which invalidates the
+    structures the parameter generators derived from the catalog.
+
+    Parameters
+    ----------
+    generator_config : HumGenConfigValues
+        catalog to update
+    _bExcludeBroken : bool, optional
+        remove the assets that failed the health check, by default True
+
+    Returns
+    -------
+    bool
+        True if the catalog was updated
+
+    Raises
+    ------
+    RuntimeError
+        if the updated catalog misses bodies, hair, beard styles or outfits, like ScanCatalog
+    """
+    sAddonPath = generator_config.addon_path
+    dicMtimes = generator_config.dict_folder_mtimes
+    dicListings = generator_config.dict_folder_listings
+
+    lChanged = [
+        sFolder
+        for sFolder in CATALOG_FOLDERS
+        if sFolder not in dicMtimes and os.path.isdir(os.path.join(sAddonPath, sFolder))
+    ]
+    for sFolder, iMtime in dicMtimes.items():
+        try:
+            bChanged = os.stat(os.path.join(sAddonPath, *sFolder.split("/"))).st_mtime_ns != iMtime
+        except OSError:
+            bChanged = True
+        # endtry
+        if bChanged:
+            lChanged.append(sFolder)
+        # endif
+    # endfor
+    bHealthChanged = _GetHealthMtimes(sAddonPath) != generator_config.health_file_mtimes
+    if len(lChanged) == 0 and not bHealthChanged:
+        return False
+    # endif
+
+    if len(lChanged) > 0:
+        for sFolder in lChanged:
+            dicListings.pop(sFolder, None)
+            dicMtimes.pop(sFolder, None)
+        # endfor
+        _ScanFolders(sAddonPath, lChanged, dicMtimes, dicListings)
+
+        # forget removed and renamed folders, which are not reachable anymore
+        setReachable = set()
+        lStack = [sFolder for sFolder in CATALOG_FOLDERS if sFolder in dicListings]
+        while len(lStack) > 0:
+            sFolder = lStack.pop()
+            setReachable.add(sFolder)
+            lStack.extend(sSubFolder for sSubFolder in dicListings[sFolder][1] if sSubFolder in dicListings)
+        # endwhile
+        for sFolder in [sFolder for sFolder in dicListings if sFolder not in setReachable]:
+            del dicListings[sFolder]
+            dicMtimes.pop(sFolder, None)
+        # endfor
+
+        for pathCache in _GetCacheFiles(sAddonPath):
+            if _WriteCache(pathCache, generator_config):
+                break
+            # endif
+        # endfor
+    # endif
+
+    # the health records may remove assets of unchanged trees or return assets to them
+    if bHealthChanged:
+        lTops = list(CATALOG_FOLDERS)
+    else:
+        setChanged = set(sFolder.split("/")[0] for sFolder in lChanged)
+        lTops = [sTop for sTop in CATALOG_FOLDERS if sTop in setChanged]
+    # endif
+    _AddAssets(generator_config, _GetTrees(lTops, dicListings))
+    _FinishCatalog(generator_config, generator_config.persona_path)
+    _LoadHealth(generator_config, _bExcludeBroken)
+    generator_config.catalog_version += 1
+    return True
+
+
+# enddef
+
+
+def _GetCacheFiles(_sAddonPath, _sFilename=CATALOG_CACHE_FILENAME, _sPrefix="catalog"):
+    # cache file in the content folder, and in the user cache folder as fallback
+    sKey = hashlib.sha256(os.path.abspath(_sAddonPath).encode("utf-8")).hexdigest()[:16]
+    pathUserCache = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "anyhuman"
+    return [Path(_sAddonPath) / _sFilename, pathUserCache / f"{_sPrefix}-{sKey}.json"]
+
+
+# enddef
+
+
+def _ReadCache(_pathCache, _sAddonPath, _pathPersonas):
+    # catalog from a cache file, or None if it does not exist or is outdated
+    try:
+        with open(_pathCache, "r") as xFile:
+            dicCache = json.load(xFile)
+        # endwith
+    except (OSError, ValueError):
+        return None
+    # endtry
+
+    if (
+        dicCache.get("iVersion") != CATALOG_CACHE_VERSION
+        or dicCache.get("sAddonPath") != os.path.abspath(_sAddonPath)
+        or not _IsUnchanged(_sAddonPath, dicCache["mFolderMtimes"])
+    ):
+        return None
+    # endif
+
+    generator_config = HumGenConfigValues()
+    generator_config.addon_path = str(_sAddonPath)
+    generator_config.dict_folder_mtimes = dicCache["mFolderMtimes"]
+    generator_config.dict_folder_listings = dicCache["mFolderListings"]
+    _AddAssets(generator_config, _GetTrees(CATALOG_FOLDERS, generator_config.dict_folder_listings))
+    return _FinishCatalog(generator_config, _pathPersonas)
+
+
+# enddef
+
+
+def _IsUnchanged(_sAddonPath, _dicFolderMtimes):
+    # checks that the scanned folders exist with unchanged modification times
+    try:
+        for sFolder in CATALOG_FOLDERS:
+            if os.path.isdir(os.path.join(_sAddonPath, sFolder)) != (sFolder in _dicFolderMtimes):
+                return False
+            # endif
+        # endfor
+        for sFolder, iMtime in _dicFolderMtimes.items():
+            if os.stat(os.path.join(_sAddonPath, *sFolder.split("/"))).st_mtime_ns != iMtime:
+                return False
+            # endif
+        # endfor
+    except OSError:
+        return False
+    # endtry
+    return True
+
+
+# enddef
+
+
+def _WriteCache(_pathCache, generator_config):
+    # writes the cache file, returns False if it could not be written
+    dicCache = {
+        "iVersion": CATALOG_CACHE_VERSION,
+        "sAddonPath": os.path.abspath(generator_config.addon_path),
+        "mFolderMtimes": generator_config.dict_folder_mtimes,
+        "mFolderListings": generator_config.dict_folder_listings,
+    }
+    return _WriteJson(_pathCache, dicCache)
+
+
+# enddef
+
+
+def _WriteJson(_pathFile, _dicData):
+    # writes a JSON file atomically, returns False if it could not be written
+    pathTemp = _pathFile.with_name(f"{_pathFile.name}.{os.getpid()}.tmp")
+    try:
+        _pathFile.parent.mkdir(parents=True, exist_ok=True)
+        with open(pathTemp, "w") as xFile:
+            json.dump(_dicData, xFile)
+        # endwith
+        os.replace(pathTemp, _pathFile)
+    except OSError:
+        if pathTemp.exists():
+            pathTemp.unlink()
+        # endif
+        return False
+    # endtry
+    return True
+
+
+# enddef
+
+
+#########################################################################################################
+def GetAssetKey(_sFile):
+    """
+    Returns the key of an asset file in the asset health records: its path relative to the
+    content folder with '/' as separator, e.g. '/outfits/female/Summer/Beach_Day.blend'.
+    """
+    return _sFile.replace("\\", "/")
+
+
+# enddef
+
+
+#########################################################################################################
+def LoadAssetHealth(_sAddonPath):
+    """
+    Returns the records of the asset health check of a content folder (see anyhuman.health),
+    from ASSET_HEALTH_FILENAME in the content folder or in the user cache folder.
+
+    A record is a dict with the kind of the asset ('sKind'), whether it could be loaded ('bOk'),
+    the error if not ('sError'), the load time in seconds ('fLoadTime'), the number of polygons,
+    textures and texture pixels it adds ('iPolygons', 'iTextures', 'iTexturePixels'), and the
+    modification time of the file when it was checked ('iMtime'). Records of files that failed
+    the check and were modified since are dropped, so that fixed assets are used again.
+
+    Returns
+    -------
+    dict
+        record per asset key (see GetAssetKey), empty if the assets were never checked
+    """
+    for pathHealth in _GetCacheFiles(_sAddonPath, ASSET_HEALTH_FILENAME, "health"):
+        try:
+            with open(pathHealth, "r") as xFile:
+                dicHealth = json.load(xFile)
+            # endwith
+        except (OSError, ValueError):
+            continue
+        # endtry
+        if dicHealth.get("iVersion") != ASSET_HEALTH_VERSION:
+            continue
+        # endif
+
+        dicAssets = {}
+        for sFile, dicRecord in dicHealth["mAssets"].items():
+            if not dicRecord["bOk"] and dicRecord.get("iMtime") != GetAssetMtime(_sAddonPath, sFile):
+                continue
+            # endif
+            dicAssets[sFile] = dicRecord
+        # endfor
+        return dicAssets
+    # endfor
+    return {}
+
+
+# enddef
+
+
+def SaveAssetHealth(_sAddonPath, _dicAssets):
+    """
+    Writes the records of the asset health check of a content folder, see LoadAssetHealth.
+
+    Returns
+    -------
+    Path
+        the written file
+
+    Raises
+    ------
+    OSError
+        if neither the content folder nor the user cache folder is writable
+    """
+    dicHealth = {
+        "iVersion": ASSET_HEALTH_VERSION,
+        "sAddonPath": os.path.abspath(_sAddonPath),
+        "mAssets": _dicAssets,
+    }
+    for pathHealth in _GetCacheFiles(_sAddonPath, ASSET_HEALTH_FILENAME, "health"):
+        if _WriteJson(pathHealth, dicHealth):
+            return pathHealth
+        # endif
+    # endfor
+    raise OSError(f"Asset health file of '{_sAddonPath}' could not be written")
+
+
+# enddef
+
+
+def GetAssetMtime(_sAddonPath, _sFile):
+    """
+    Returns the modification time of an asset file in nanoseconds, or None if it does not exist.
+    """
+    try:
+        return os.stat(os.path.join(_sAddonPath, *_sFile.strip("/").split("/"))).st_mtime_ns
+    except OSError:
+        return None
+    # endtry
+
+
+# enddef
+
+
+#########################################################################################################
+def GetBrokenAssets(generator_config):
+    """
+    Returns the assets of the catalog that failed the health check, as dict of asset key
+    (see GetAssetKey) to error message.
+    """
+    return {
+        sFile: dicRecord.get("sError") or "failed to load"
+        for sFile, dicRecord in generator_config.dict_asset_health.items()
+        if not dicRecord["bOk"]
+    }
+
+
+# enddef
+
+
+def ExcludeBrokenAssets(generator_config):
+    """
+    Removes the bodies, hair and beard styles and outfits that failed the health check
+    from the catalog, so that no parameter generator draws them. Outfits in KNOWN_BROKEN_OUTFITS
+    without a health record are added to the records as failed and removed as well.
+    """
+    # outfits per set with the files of the outfits in the same order
+    tOutfits = (
+        (generator_config.dict_female_outfits, generator_config.dict_female_outfit_files),
+        (generator_config.dict_male_outfits, generator_config.dict_male_outfit_files),
+    )
+    for dicSets, dicFiles in tOutfits:
+        for sSet, lOutfits in dicSets.items():
+            for sOutfit, sFile in zip(lOutfits, dicFiles[sSet]):
+                sFile = GetAssetKey(sFile)
+                if sOutfit in KNOWN_BROKEN_OUTFITS and sFile not in generator_config.dict_asset_health:
+                    generator_config.dict_asset_health[sFile] = {
+                        "sKind": "outfit",
+                        "bOk": False,
+                        "sError": "known to fail loading, not checked yet",
+                    }
+                # endif
+            # endfor
+        # endfor
+    # endfor
+
+    dicBroken = GetBrokenAssets(generator_config)
+    if len(dicBroken) == 0:
+        return
+    # endif
+
+    for sGender, lBodies in (("female", generator_config.list_females), ("male", generator_config.list_males)):
+        lBodies[:] = [sBody for sBody in lBodies if f"/models/{sGender}/{sBody}.json" not in dicBroken]
+    # endfor
+    for dicHair in (
+        generator_config.dict_female_head_hair,
+        generator_config.dict_male_head_hair,
+        generator_config.dict_male_face_hair,
+    ):
+        for sStyle in [sStyle for sStyle, sFile in dicHair.items() if GetAssetKey(sFile) in dicBroken]:
+            del dicHair[sStyle]
+        # endfor
+    # endfor
+    for dicSets, dicFiles in tOutfits:
+        for sSet, lOutfits in dicSets.items():
+            lKeep = [
+                (sOutfit, sFile)
+                for sOutfit, sFile in zip(lOutfits, dicFiles[sSet])
+                if GetAssetKey(sFile) not in dicBroken
+            ]
+            lOutfits[:] = [sOutfit for sOutfit, _ in lKeep]
+            dicFiles[sSet][:] = [sFile for _, sFile in lKeep]
+        # endfor
+    # endfor
+
+
+# enddef
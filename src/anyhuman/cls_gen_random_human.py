@@ -28,6 +28,8 @@
 
 import bpy
 from . import dev
+from . import cls_humgen
+from .warmup import IsWarmUpEnabled
 
 
 class GenRandomHumans(bpy.types.Operator):
@@ -64,6 +66,16 @@ def register():
     # bpy.utils.register_class(GenRandomHumans)
     # bpy.types.VIEW3D_MT_object.append(menu_func)  # Adds the new operator to an existing menu.
 
+    # opt-in: load the asset catalog in the background, so the first generated human does not wait for it
+    if IsWarmUpEnabled():
+        try:
+            cls_humgen.StartCatalogWarmUp()
+            print("anyhuman: catalog warm-up started")
+        except Exception as xEx:
+            print("anyhuman: catalog warm-up not started:\n{}".format(str(xEx)))
+        # endtry
+    # endif
+
 
 # enddef
 
@@ -32,9 +32,9 @@ import bmesh
 
 import random
 import os
+import time
 import os.path
 import colorsys
-import collections
 
 import json
 
@@ -51,6 +51,13 @@ except Exception as xEx:
 # endtry
 
 from . import tools
+from .catalog import GetBrokenAssets, RefreshCatalog
+from .warmup import StartWarmUp, LoadWarmCatalog
+
+# environment variable with the minimal time in seconds between two checks of the content folder
+# for changed assets, see HumGenWrapper.RefreshCatalog; a negative value disables the checks
+CATALOG_REFRESH_ENV = "ANYHUMAN_CATALOG_REFRESH"
+CATALOG_REFRESH_INTERVAL = 30.0
 
 color_dict = {
     # color set from HG3D (see HG_COLORS.py)
@@ -100,125 +107,38 @@ color_dict = {
 
 
 #########################################################################################################
-class HumGenWrapper:
-    def __init__(self):
-        """
-        Sets lists for base humans/hair/beard styles from humgen content folder
-        """
-        addon_name = "humgen3d"
-        addon_path = bpy.context.preferences.addons[addon_name].preferences["filepath"]
-        base_human_path = os.path.join(addon_path, "models")
-        hair_path = os.path.join(addon_path, "hair")
-        outfit_path = os.path.join(addon_path, "outfits")
-
-        class HumGenConfigValues:
-            def __init__(self):
-                self.list_females = []
-                self.list_males = []
-                self.dict_female_head_hair = {}
-                self.dict_male_head_hair = {}
-                self.dict_male_face_hair = {}
-                self.dict_female_outfits = collections.defaultdict(list)
-                self.dict_male_outfits = collections.defaultdict(list)
-
-            # enddef
-
-        # endclass
-
-        self.generator_config = HumGenConfigValues()
-
-        for dir_, _, files in os.walk(base_human_path):
-            for file_name in files:
-                rel_dir = os.path.relpath(dir_, base_human_path)
-                rel_file = os.path.join("models", rel_dir, file_name)
-                rel_file = os.path.sep + rel_file
-                if ".json" in rel_file:
-                    file_name = os.path.splitext(os.path.basename(rel_file))[0]
-                    if "female" in rel_file:
-                        self.generator_config.list_females.append(file_name)
-                    elif "male" in rel_file:
-                        self.generator_config.list_males.append(file_name)
-                    # endif gender
-                # endif model
-            # endfor
-        # endfor
-
-        for dir_, _, files in os.walk(hair_path):
-            for file_name in files:
-                rel_dir = os.path.relpath(dir_, hair_path)
-                rel_file = os.path.join("hair", rel_dir, file_name)
-                rel_file = os.path.sep + rel_file
-                if "head" in rel_file and ".json" in rel_file:
-                    file_name = os.path.splitext(os.path.basename(rel_file))[0]
-                    if "female" in rel_file:
-                        self.generator_config.dict_female_head_hair[file_name] = rel_file
-                    elif "male" in rel_file:
-                        self.generator_config.dict_male_head_hair[file_name] = rel_file
-                    # endif gender
-                if "face_hair" in rel_file and ".json" in rel_file:
-                    file_name = os.path.splitext(os.path.basename(file_name))[0]
-                    self.generator_config.dict_male_face_hair[file_name] = rel_file
-                # endif face/head hair
-            # endif hair
-        # endfor
-
-        for dir_, _, files in os.walk(outfit_path):
-            for file_name in files:
-                rel_dir = os.path.relpath(dir_, hair_path)
-                rel_file = os.path.join("outputs", rel_dir, file_name)
-                rel_file = os.path.sep + rel_file
-                components = Path(rel_file).parts
-                if ".blend" in rel_file and len(components) > 5:
-                    set_name = components[5]
-                    file_name = os.path.splitext(os.path.basename(rel_file))[0]
-
-                    # skip faulty outfits
-                    if file_name in ["BBQ_Barbara", "New_Intern"]:
-                        continue
-
-                    if "female" in rel_file:
-                        self.generator_config.dict_female_outfits[set_name].append(file_name)
-                    elif "male" in rel_file:
-                        self.generator_config.dict_male_outfits[set_name].append(file_name)
-                    # endif gender
-                # endif face/head hair
-            # endif hair
-        # endfor
+def GetAddonPath():
+    """
+    Returns the content folder set in the preferences of the HumGen3D add-on.
+    """
+    return bpy.context.preferences.addons["humgen3d"].preferences["filepath"]
 
-        if len(self.generator_config.list_males) == 0:
-            raise RuntimeError("list of male model files empty")
 
-        if len(self.generator_config.dict_male_head_hair) == 0:
-            raise RuntimeError("list of male hair model files empty")
+# enddef
 
-        if len(self.generator_config.dict_male_face_hair) == 0:
-            raise RuntimeError("list of male face hair model files empty")
 
-        if len(self.generator_config.list_females) == 0:
-            raise RuntimeError("list of female model files empty")
+#########################################################################################################
+def StartCatalogWarmUp():
+    """
+    Starts loading the asset catalog of the HumGen3D content folder on a background thread,
+    see warmup.StartWarmUp. The first HumGenWrapper waits for it instead of loading the catalog.
+    """
+    StartWarmUp(GetAddonPath())
 
-        if len(self.generator_config.dict_female_head_hair) == 0:
-            raise RuntimeError("list of female hair model files empty")
 
-        if len(self.generator_config.dict_female_outfits) == 0:
-            raise RuntimeError("list of female outfit files empty")
+# enddef
 
-        if len(self.generator_config.dict_male_outfits) == 0:
-            raise RuntimeError("list of male outfit files empty")
 
-        self.generator_config.dict_bodies = {
-            "male": self.generator_config.list_males,
-            "female": self.generator_config.list_females,
-        }
-        self.generator_config.dict_hair = {
-            "male": self.generator_config.dict_male_head_hair,
-            "female": self.generator_config.dict_female_head_hair,
-        }
+#########################################################################################################
+class HumGenWrapper:
+    def __init__(self):
+        """
+        Sets lists for base humans/hair/beard styles from humgen content folder
+        """
+        addon_path = GetAddonPath()
 
-        self.generator_config.dict_outfits = {
-            "male": self.generator_config.dict_male_outfits,
-            "female": self.generator_config.dict_female_outfits,
-        }
+        # waits for the catalog warm-up if one was started on register
+        self.generator_config = LoadWarmCatalog(addon_path)
 
         try:
             self.generator_config.persona_path = Path(bpy.context.space_data.text.filepath).parent.resolve()
@@ -226,6 +146,39 @@ class HumGenWrapper:
             self.generator_config.persona_path = Path(__file__).parent.resolve()
         # endtry
         self.generator_config.persona_path = Path.joinpath(self.generator_config.persona_path, "personas")
+        self.catalog_checked = time.monotonic()
+
+    # enddef
+
+    ############################################################################################
+    def RefreshCatalog(self):
+        """
+        Updates the asset catalog to assets added, removed or fixed in the content folder since it was
+        loaded, see catalog.RefreshCatalog. The content folder is checked at most once per
+        CATALOG_REFRESH_INTERVAL seconds, which can be changed with the environment variable
+        ANYHUMAN_CATALOG_REFRESH.
+
+        Returns
+        -------
+        bool
+            True if the catalog was updated
+        """
+        try:
+            fInterval = float(os.environ.get(CATALOG_REFRESH_ENV, CATALOG_REFRESH_INTERVAL))
+        except ValueError:
+            fInterval = CATALOG_REFRESH_INTERVAL
+        # endtry
+        fNow = time.monotonic()
+        if fInterval < 0.0 or fNow - self.catalog_checked < fInterval:
+            return False
+        # endif
+        self.catalog_checked = fNow
+
+        bChanged = RefreshCatalog(self.generator_config)
+        if bChanged:
+            print("anyhuman: asset catalog updated to changes of the content folder")
+        # endif
+        return bChanged
 
     # enddef
 
@@ -238,7 +191,7 @@ class HumGenWrapper:
     # enddef
 
     ############################################################################################
-    def CreateHuman(self, _sName, _mParams, _bDeleteBackup=True):
+    def CreateHuman(self, _sName, _mParams, _bDeleteBackup=True, _xRandom=None):
         """
         generates a random human given gender and name
 
@@ -249,6 +202,9 @@ class HumGenWrapper:
             is overwritten by this name
         _mParams: dict
             dictionary of all values that should be used for generation of the human
+        _xRandom : random.Random, optional
+            random number generator for the randomized details of the human (e.g. outfit colors),
+            by default the global generator of the random module
 
         Returns
         -------
@@ -314,7 +270,7 @@ class HumGenWrapper:
 
         self._prepare_body(sGender, _mParams)
         self._prepare_skin(sGender, name_human, _mParams)
-        self._prepare_eyes(sGender, _mParams)
+        self._prepare_eyes(sGender, _mParams, _xRandom)
         self._prepare_hair(sGender, name_human, _mParams)
 
         self.human_obj.finish_creation_phase()
@@ -332,14 +288,14 @@ class HumGenWrapper:
         density = 1.0
         self.human_obj.rig_object["weight"] = volume * density * 1000.0
 
-        self._prepare_outfit(sGender, _mParams)
+        self._prepare_outfit(sGender, _mParams, _xRandom)
 
         tools.FixClothBoneWeights(
             skinMesh=self.human_obj.body_object,
             clothMeshes=self.human_obj.clothing_objects,
         )
 
-        self._prepare_pose(sGender, _mParams)
+        self._prepare_pose(sGender, _mParams, _xRandom)
 
         self.human_obj.name = _sName
 
@@ -365,9 +321,9 @@ class HumGenWrapper:
     # enddef
 
     ############################################################################################
-    def ModifyHuman(self, gender, _mParams):
-        self._prepare_outfit(gender, _mParams)
-        self._prepare_pose(gender, _mParams)
+    def ModifyHuman(self, gender, _mParams, _xRandom=None):
+        self._prepare_outfit(gender, _mParams, _xRandom)
+        self._prepare_pose(gender, _mParams, _xRandom)
 
     # enddef
 
@@ -492,7 +448,9 @@ class HumGenWrapper:
     # enddef
 
     ############################################################################################
-    def _prepare_eyes(self, gender, params):
+    def _prepare_eyes(self, gender, params, _xRandom=None):
+        xRandom = random if _xRandom is None else _xRandom
+
         eye_nodes = bpy.data.materials[".HG_Eyes_Inner"].node_tree.nodes
         eye_nodes["HG_Eye_Color"].inputs[2].default_value = params["eyes"]["iris_color"]
 
@@ -507,7 +465,7 @@ class HumGenWrapper:
                 raise RuntimeError(
                     "random value not supported here, has to be resolved before with ResolveRandomParameters(...)"
                 )
-                eyebrowsindex = random.randint(0, 10)
+                eyebrowsindex = xRandom.randint(0, 10)
             elif eyebrowsindex != -1:
                 pass
             else:
@@ -571,7 +529,9 @@ class HumGenWrapper:
     # enddef
 
     ############################################################################################
-    def _prepare_outfit(self, _sGender, _mParams):
+    def _prepare_outfit(self, _sGender, _mParams, _xRandom=None):
+        xRandom = random if _xRandom is None else _xRandom
+
         ##################################################################
         def getValue(set, key, name, index, default):
             try:
@@ -700,7 +660,7 @@ class HumGenWrapper:
             bpy.context.object.active_material = matCloth
 
             if outfit_color == "random":
-                fR, fG, fB, _ = random.choice(list(color_dict[palette].values()))
+                fR, fG, fB, _ = xRandom.choice(list(color_dict[palette].values()))
 
             elif outfit_color in color_dict[palette]:
                 fR, fG, fB, _ = color_dict[palette][outfit_color]
@@ -726,29 +686,33 @@ class HumGenWrapper:
             # mat.node_tree.links.new(ndHgCtrl.inputs["Diffuse"], bright_node["Color"])
 
             # randomize roughness multiplier
-            ndHgCtrl.inputs["Roughness Multiplier"].default_value = tools.RandomUniformDiscrete(0.8, 1.2, 11)
+            ndHgCtrl.inputs["Roughness Multiplier"].default_value = tools.RandomUniformDiscrete(
+                0.8, 1.2, 11, _xRandom=xRandom
+            )
 
             # randomize normal strength
-            ndHgCtrl.inputs["Normal Strength"].default_value = tools.RandomUniformDiscrete(1.8, 2.2, 11)
+            ndHgCtrl.inputs["Normal Strength"].default_value = tools.RandomUniformDiscrete(
+                1.8, 2.2, 11, _xRandom=xRandom
+            )
 
             if sOutfitPattern == "random":
                 bpy.ops.hg3d.pattern(add=True)
                 bpy.ops.hg3d.random(random_type="patterns")
 
                 # only add a patter to every second cloth object
-                if random.choice([True, False]):
+                if xRandom.choice([True, False]):
                     bpy.ops.hg3d.pattern(add=True)
                     bpy.ops.hg3d.random(random_type="patterns")
 
                     # colorize every second pattern
-                    if random.choice([True, False]):
+                    if xRandom.choice([True, False]):
                         bpy.ops.hg3d.color_random(input_name="PC1", color_group="C0")
                         bpy.ops.hg3d.color_random(input_name="PC2", color_group="C0")
                         bpy.ops.hg3d.color_random(input_name="PC3", color_group="C0")
                     # endif
                     # set opacity of every second pattern
-                    if random.choice([True, False]):
-                        ndHgCtrl.inputs[13].default_value = random.uniform(0.0, 1.0)
+                    if xRandom.choice([True, False]):
+                        ndHgCtrl.inputs[13].default_value = xRandom.uniform(0.0, 1.0)
                     # endif
                 # endif
 
@@ -797,7 +761,7 @@ class HumGenWrapper:
             bpy.context.object.active_material = matCloth
 
             if footwear_color == "random":
-                fR, fG, fB, _ = random.choice(list(color_dict[palette].values()))
+                fR, fG, fB, _ = xRandom.choice(list(color_dict[palette].values()))
             elif footwear_color in color_dict[palette]:
                 fR, fG, fB, _ = color_dict[palette][outfit_color]
             # endif
@@ -831,7 +795,9 @@ class HumGenWrapper:
     # enddef
 
     ############################################################################################
-    def _prepare_pose(self, gender, params):
+    def _prepare_pose(self, gender, params, _xRandom=None):
+        xRandom = random if _xRandom is None else _xRandom
+
         # get options need to called first to populate internal list
         lAvailablePoses = self.human_obj.get_pose_options()
         # print("Available Poses: {}".format(lAvailablePoses))
@@ -842,7 +808,11 @@ class HumGenWrapper:
         if posefilename is None:
             posefilename = self._make_rel_path("/poses/Base Poses/HG_A_Pose.blend")
         elif posefilename == "random":
-            posefilename = random.choice(lAvailablePoses)
+            # skip poses that failed the asset health check
+            dicBroken = GetBrokenAssets(self.generator_config)
+            posefilename = xRandom.choice(
+                [sPose for sPose in lAvailablePoses if sPose.replace("\\", "/") not in dicBroken] or lAvailablePoses
+            )
         else:
             posefilename = self._make_rel_path(posefilename)
 
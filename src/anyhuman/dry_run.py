@@ -0,0 +1,374 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Dry run of a dataset generation outside of Blender, which checks that all assets referenced
+# by the parameters of the humans exist in the HumGen3D content folder:
+#   python -m anyhuman.dry_run --humgen <HumGen3D content folder> --plan <plan .jsonl>
+#   python -m anyhuman.dry_run --humgen <HumGen3D content folder> --mode ZWICKY --params <json> --count 100000
+
+import os
+import sys
+import json
+import argparse
+import collections
+import concurrent.futures
+
+from .catalog import LoadCatalog
+from .plan import IterPlan, LoadJsonArgument
+from .paramgenerators.file import IterFileParams
+from .paramgenerators.hashing import DEFAULT_POSE
+from .paramgenerators.jsonl_file import GetJsonlFile
+from .paramgenerators.validator import GetParamsValidator
+
+# kinds of assets referenced by the parameters of a human
+ASSET_KINDS = ("body", "hair", "beard", "outfit", "footwear", "pose", "expression")
+
+# number of humans listed per missing asset or error in a report
+REPORT_EXAMPLES = 5
+
+
+######################################################################
+class AssetCheck:
+    """
+    Collects the assets referenced by the parameter sets of many humans, as HumGenWrapper.CreateHuman
+    would load them, and the ones missing in the HumGen3D content folder. Every file is only looked
+    up once, so checking a plan of 100000 humans takes seconds.
+    """
+
+    def __init__(self, _xGeneratorParams):
+        """
+        Parameters
+        ----------
+        _xGeneratorParams : HumGenConfigValues
+            asset catalog of the content folder, see catalog.ScanCatalog
+        """
+        self.xGeneratorParams = _xGeneratorParams
+        self.sAddonPath = _xGeneratorParams.addon_path
+        self.xValidator = GetParamsValidator(_xGeneratorParams)
+        self.iCount = 0
+        # existence per relative file path
+        self.dicExists = {}
+        # number of references per kind and relative file path
+        self.dicReferences = {sKind: collections.Counter() for sKind in ASSET_KINDS}
+        # number of humans and some of them as [count, names] per kind and missing file, and per validation error
+        self.dicMissing = {sKind: {} for sKind in ASSET_KINDS}
+        self.dicErrors = {}
+
+    # enddef
+
+    ##################################################################
+    def Add(self, _dicParams, _sName=None):
+        """
+        Checks the assets of a human.
+
+        Parameters
+        ----------
+        _dicParams : dict
+            parameters for human generation
+        _sName : str, optional
+            name of the human in the report, by default its index
+        """
+        sName = str(self.iCount) if _sName is None else _sName
+        self.iCount += 1
+
+        for sError in self.xValidator.Validate(_dicParams):
+            _AddExample(self.dicErrors, sError, 1, [sName])
+        # endfor
+
+        for sKind, sFile in GetAssetFiles(_dicParams, self.xGeneratorParams):
+            self.dicReferences[sKind][sFile] += 1
+            bExists = self.dicExists.get(sFile)
+            if bExists is None:
+                bExists = os.path.isfile(os.path.join(self.sAddonPath, *sFile.replace("\\", "/").split("/")))
+                self.dicExists[sFile] = bExists
+            # endif
+            if bExists is False:
+                _AddExample(self.dicMissing[sKind], sFile, 1, [sName])
+            # endif
+        # endfor
+
+    # enddef
+
+    ##################################################################
+    def Merge(self, _xOther):
+        """
+        Adds the results of another check of the same content folder, e.g. of a worker process.
+        """
+        self.iCount += _xOther.iCount
+        for sKind in ASSET_KINDS:
+            self.dicReferences[sKind].update(_xOther.dicReferences[sKind])
+            for sFile, (iCount, lNames) in _xOther.dicMissing[sKind].items():
+                _AddExample(self.dicMissing[sKind], sFile, iCount, lNames)
+            # endfor
+        # endfor
+        for sError, (iCount, lNames) in _xOther.dicErrors.items():
+            _AddExample(self.dicErrors, sError, iCount, lNames)
+        # endfor
+        self.dicExists.update(_xOther.dicExists)
+
+    # enddef
+
+    ##################################################################
+    def IsValid(self):
+        return len(self.dicErrors) == 0 and all(len(dicMissing) == 0 for dicMissing in self.dicMissing.values())
+
+    # enddef
+
+    ##################################################################
+    def Report(self):
+        """
+        Returns a JSON serializable report: the numbers of referenced and missing files per kind
+        of asset, and per missing file and validation error the number of humans and some of them.
+        """
+        return {
+            "humans": self.iCount,
+            "valid": self.IsValid(),
+            "assets": {
+                sKind: {
+                    "referenced": len(self.dicReferences[sKind]),
+                    "missing": {
+                        sFile: {"humans": iCount, "examples": lNames}
+                        for sFile, (iCount, lNames) in sorted(self.dicMissing[sKind].items())
+                    },
+                }
+                for sKind in ASSET_KINDS
+            },
+            "errors": {
+                sError: {"humans": iCount, "examples": lNames}
+                for sError, (iCount, lNames) in sorted(self.dicErrors.items())
+            },
+        }
+
+    # enddef
+
+
+# endclass
+
+
+def _AddExample(_dicExamples, _sKey, _iCount, _lNames):
+    # counts humans and keeps the first REPORT_EXAMPLES of them
+    lEntry = _dicExamples.get(_sKey)
+    if lEntry is None:
+        lEntry = _dicExamples[_sKey] = [0, []]
+    # endif
+    lEntry[0] += _iCount
+    lEntry[1].extend(_lNames[: REPORT_EXAMPLES - len(lEntry[1])])
+
+
+# enddef
+
+
+######################################################################
+def GetAssetFiles(_dicParams, _xGeneratorParams):
+    """
+    Returns the files relative to the HumGen3D content folder, which HumGenWrapper.CreateHuman
+    loads for a parameter set. Values drawn by HumGen3D itself, i.e. 'random', reference no file.
+
+    Returns
+    -------
+    list
+        tuples (kind of asset, relative file path)
+    """
+    lFiles = []
+    sGender = _dicParams.get("gender")
+
+    if isinstance(_dicParams.get("body"), str):
+        lFiles.append(("body", f"/models/{sGender}/{_dicParams['body']}.json"))
+    # endif
+
+    sHairStyle = (_dicParams.get("hair") or {}).get("hair_style")
+    if sHairStyle is not None:
+        sFile = _xGeneratorParams.dict_hair.get(sGender, {}).get(sHairStyle)
+        lFiles.append(("hair", sFile if sFile is not None else f"/hair/head/{sGender}/{sHairStyle}.json"))
+    # endif
+
+    sBeardStyle = (_dicParams.get("beard") or {}).get("beard_style")
+    if sGender == "male" and sBeardStyle is not None:
+        sFile = _xGeneratorParams.dict_male_face_hair.get(sBeardStyle)
+        lFiles.append(("beard", sFile if sFile is not None else f"/hair/face_hair/{sBeardStyle}.json"))
+    # endif
+
+    sOutfitStyle = (_dicParams.get("outfit") or {}).get("outfit_style")
+    if isinstance(sOutfitStyle, str) and sOutfitStyle != "random":
+        lFiles.append(("outfit", f"/outfits/{sGender}/{sOutfitStyle}.blend"))
+    # endif
+
+    sFootwearStyle = (_dicParams.get("footwear") or {}).get("footwear_style")
+    if isinstance(sFootwearStyle, str) and sFootwearStyle != "random":
+        lFiles.append(("footwear", sFootwearStyle))
+    # endif
+
+    sPose = _dicParams.get("posefilename")
+    if sPose != "random":
+        lFiles.append(("pose", DEFAULT_POSE if sPose is None else sPose))
+    # endif
+
+    sExpression = _dicParams.get("expression")
+    if isinstance(sExpression, str) and sExpression != "random":
+        lFiles.append(("expression", sExpression))
+    # endif
+
+    return lFiles
+
+
+# enddef
+
+
+######################################################################
+def CheckPlanFile(_pathPlan, _xGeneratorParams, _iWorkers=None):
+    """
+    Checks the assets of all humans of a JSONL plan, see plan.WritePlan, in parallel
+    on ranges of the records. Humans are named by their index in the report.
+
+    Parameters
+    ----------
+    _pathPlan : str
+        JSONL file with a parameter set per line
+    _xGeneratorParams : HumGenConfigValues
+        asset catalog of the content folder, see catalog.ScanCatalog
+    _iWorkers : int, optional
+        number of worker processes, by default the number of CPUs
+
+    Returns
+    -------
+    AssetCheck
+        results of the check
+    """
+    iCount = len(GetJsonlFile(_pathPlan))
+    if _iWorkers is None:
+        _iWorkers = os.cpu_count() or 1
+    # endif
+    iChunkSize = max(1000, -(-iCount // (4 * _iWorkers)))
+    lRanges = [(iStart, min(iStart + iChunkSize, iCount)) for iStart in range(0, iCount, iChunkSize)]
+
+    xCheck = AssetCheck(_xGeneratorParams)
+    if _iWorkers <= 1 or len(lRanges) <= 1:
+        for iStart, iStop in lRanges:
+            xCheck.Merge(_CheckPlanRange(_pathPlan, _xGeneratorParams, iStart, iStop))
+        # endfor
+        return xCheck
+    # endif
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=_iWorkers) as xExecutor:
+        lFutures = [
+            xExecutor.submit(_CheckPlanRange, _pathPlan, _xGeneratorParams, iStart, iStop) for iStart, iStop in lRanges
+        ]
+        for xFuture in lFutures:
+            xCheck.Merge(xFuture.result())
+        # endfor
+    # endwith
+    return xCheck
+
+
+# enddef
+
+
+def _CheckPlanRange(_pathPlan, _xGeneratorParams, _iStart, _iStop):
+    xCheck = AssetCheck(_xGeneratorParams)
+    for iIndex, dicParams in enumerate(IterFileParams(_pathPlan, _iStart, _iStop), start=_iStart):
+        xCheck.Add(dicParams, str(iIndex))
+    # endfor
+    # the validator is not needed for merging
+    xCheck.xValidator = None
+    return xCheck
+
+
+# enddef
+
+
+######################################################################
+def main(_lArgs=None):
+    xParser = argparse.ArgumentParser(
+        description="Check that the assets of a dataset exist in the HumGen3D content folder, without Blender"
+    )
+    xParser.add_argument("--humgen", required=True, help="content folder of the HumGen3D add-on")
+    xParser.add_argument("--plan", default=None, help="plan to check, a JSONL file written by anyhuman.plan")
+    xParser.add_argument("--personas", default=None, help="folder of the persona files for the PERSONA mode")
+    xParser.add_argument("--mode", default="RANDOM_REALISTIC", help="mode for the parameter computation")
+    xParser.add_argument("--params", default=None, help="parameters for the mode, as JSON or JSON file")
+    xParser.add_argument(
+        "--overwrite", default=None, help="parameters overwriting the computed ones, as JSON or JSON file"
+    )
+    xParser.add_argument("--count", type=int, default=1000, help="number of humans")
+    xParser.add_argument("--seed", type=int, default=0, help="base seed, human i gets the seed <seed> + i")
+    xParser.add_argument("--keyed", action="store_true", help="draw every parameter from a separate random stream")
+    xParser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    xParser.add_argument("--report", default=None, help="file for the report as JSON")
+    xArgs = xParser.parse_args(_lArgs)
+    if xArgs.plan is None and xArgs.mode == "DIVERSE":
+        xParser.error("the mode DIVERSE cannot be planned, see paramgenerators.diversity.IterDiverseParams")
+    # endif
+
+    xGeneratorParams = LoadCatalog(xArgs.humgen, xArgs.personas)
+    if xArgs.plan is not None:
+        xCheck = CheckPlanFile(xArgs.plan, xGeneratorParams, xArgs.workers)
+    else:
+        xCheck = AssetCheck(xGeneratorParams)
+        for sId, _, _, sParams in IterPlan(
+            xArgs.mode,
+            LoadJsonArgument(xArgs.params),
+            LoadJsonArgument(xArgs.overwrite),
+            xGeneratorParams,
+            xArgs.count,
+            _iSeed=xArgs.seed,
+            _bKeyedRandom=xArgs.keyed,
+            _iWorkers=xArgs.workers,
+            _bValidate=False,
+        ):
+            xCheck.Add(json.loads(sParams), sId)
+        # endfor
+    # endif
+
+    dicReport = xCheck.Report()
+    if xArgs.report is not None:
+        with open(xArgs.report, "w") as xFile:
+            json.dump(dicReport, xFile, indent=4)
+        # endwith
+    # endif
+
+    print(f"Checked {dicReport['humans']} humans")
+    for sKind, dicAssets in dicReport["assets"].items():
+        print(f"{sKind}: {dicAssets['referenced']} referenced, {len(dicAssets['missing'])} missing")
+        for sFile, dicMissing in dicAssets["missing"].items():
+            print(f"    {sFile} (used by {dicMissing['humans']} humans, e.g. {', '.join(dicMissing['examples'])})")
+        # endfor
+    # endfor
+    for sError, dicError in dicReport["errors"].items():
+        print(f"!!! {sError} ({dicError['humans']} humans, e.g. {', '.join(dicError['examples'])})")
+    # endfor
+
+    return 0 if dicReport["valid"] else 1
+
+
+# enddef
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# endif
@@ -0,0 +1,425 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Health check of the HumGen3D assets: every outfit, hair and beard style, footwear and pose is loaded
+# once in a background Blender session, and the result, the load time and the polygons and textures
+# it adds are recorded in the asset health file of the content folder (see catalog.LoadAssetHealth).
+# LoadCatalog removes the assets that failed to load, so that no parameter generator draws them:
+#   python -m anyhuman.health --humgen <HumGen3D content folder> --blender <Blender executable>
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import subprocess
+from pathlib import Path
+
+from .catalog import SKIPPED_FOLDERS, GetAssetKey, GetAssetMtime, LoadAssetHealth, LoadCatalog, SaveAssetHealth
+
+# kinds of assets that are checked
+ASSET_KINDS = ("hair", "beard", "outfit", "footwear", "pose")
+
+# seconds without progress of a Blender session, after which the asset being loaded is considered hanging
+DEFAULT_TIMEOUT = 300.0
+
+# seconds between two polls of the results of a Blender session
+POLL_INTERVAL = 0.2
+
+
+######################################################################
+def GetAssets(_sAddonPath, _lKinds=ASSET_KINDS):
+    """
+    Lists the assets of a content folder to check, including the ones that failed a former check.
+
+    Returns
+    -------
+    list
+        tuples (kind, gender of the human to load the asset on, asset key), see catalog.GetAssetKey
+    """
+    xCatalog = LoadCatalog(_sAddonPath, _bExcludeBroken=False)
+    lAssets = []
+    if "hair" in _lKinds:
+        for sGender, dicHair in xCatalog.dict_hair.items():
+            lAssets += [("hair", sGender, GetAssetKey(sFile)) for sFile in dicHair.values()]
+        # endfor
+    # endif
+    if "beard" in _lKinds:
+        lAssets += [("beard", "male", GetAssetKey(sFile)) for sFile in xCatalog.dict_male_face_hair.values()]
+    # endif
+    if "outfit" in _lKinds:
+        for sGender, dicFiles in xCatalog.dict_outfit_files.items():
+            for lFiles in dicFiles.values():
+                lAssets += [("outfit", sGender, GetAssetKey(sFile)) for sFile in lFiles]
+            # endfor
+        # endfor
+    # endif
+    if "footwear" in _lKinds:
+        for sFile in _ListBlendFiles(_sAddonPath, "footwear"):
+            lAssets.append(("footwear", "female" if "female" in sFile else "male", sFile))
+        # endfor
+    # endif
+    if "pose" in _lKinds:
+        lAssets += [("pose", "male", sFile) for sFile in _ListBlendFiles(_sAddonPath, "poses")]
+    # endif
+    return lAssets
+
+
+# enddef
+
+
+def _ListBlendFiles(_sAddonPath, _sFolder):
+    # asset keys of all .blend files below a folder of the content folder
+    lFiles = []
+    for sDir, lDirs, lNames in os.walk(os.path.join(_sAddonPath, _sFolder)):
+        lDirs[:] = sorted(sName for sName in lDirs if sName.lower() not in SKIPPED_FOLDERS)
+        sRelDir = os.path.relpath(sDir, _sAddonPath).replace(os.path.sep, "/")
+        lFiles += [f"/{sRelDir}/{sName}" for sName in sorted(lNames) if sName.endswith(".blend")]
+    # endfor
+    return lFiles
+
+
+# enddef
+
+
+######################################################################
+def CheckAssets(_lAssets, _sBlender="blender", _fTimeout=DEFAULT_TIMEOUT, _pathLog=None):
+    """
+    Loads the assets in background Blender sessions with the HumGen3D add-on enabled.
+
+    If Blender crashes or hangs while loading an asset, the asset is recorded as failed
+    and a new session continues with the remaining assets. If it crashes or hangs while
+    setting up the human for an asset, the asset is retried in a new session.
+
+    Parameters
+    ----------
+    _lAssets : list
+        tuples (kind, gender, asset key), see GetAssets
+    _sBlender : str, optional
+        Blender executable
+    _fTimeout : float, optional
+        seconds without progress, after which a session is considered hanging
+    _pathLog : Path, optional
+        file for the output of Blender, by default it is discarded
+
+    Returns
+    -------
+    dict
+        record per asset key, see catalog.LoadAssetHealth
+
+    Raises
+    ------
+    RuntimeError
+        if setting up a human for an asset fails, or crashes or hangs twice,
+        e.g. if HumGen3D is not installed
+    """
+    dicRecords = {}
+    lPending = list(_lAssets)
+    with tempfile.TemporaryDirectory(prefix="anyhuman-health-") as sTempDir:
+        iSession = 0
+        sRetried = None
+        while len(lPending) > 0:
+            pathJob = Path(sTempDir) / f"job-{iSession}.json"
+            pathResults = Path(sTempDir) / f"results-{iSession}.jsonl"
+            with open(pathJob, "w") as xFile:
+                json.dump(lPending, xFile)
+            # endwith
+            pathResults.touch()
+
+            lCommand = [
+                _sBlender,
+                "--background",
+                "--python-exit-code",
+                "1",
+                "--python-expr",
+                _GetBlenderScript(pathJob, pathResults),
+            ]
+            with open(_pathLog, "a") if _pathLog is not None else open(os.devnull, "w") as xLog:
+                xProcess = subprocess.Popen(lCommand, stdout=xLog, stderr=subprocess.STDOUT)
+                sCurrent, bTimeout = _WatchSession(xProcess, pathResults, dicRecords, _fTimeout)
+            # endwith
+
+            if bTimeout:
+                sError = f"Blender did not respond for {_fTimeout:.0f} seconds"
+            else:
+                sError = f"Blender exited with code {xProcess.returncode}"
+            # endif
+            if sCurrent is not None:
+                dicRecords[sCurrent] = {"bOk": False, "sError": f"{sError} while loading the asset"}
+            elif bTimeout or xProcess.returncode != 0:
+                # the session failed while setting up the human for the next asset, which is retried once
+                sSetup = next(tAsset[2] for tAsset in lPending if tAsset[2] not in dicRecords)
+                if sSetup == sRetried:
+                    raise RuntimeError(f"{sError} while setting up a human for {sSetup}")
+                # endif
+                sRetried = sSetup
+            # endif
+
+            lPending = [tAsset for tAsset in lPending if tAsset[2] not in dicRecords]
+            iSession += 1
+        # endwhile
+    # endwith
+    return dicRecords
+
+
+# enddef
+
+
+def _WatchSession(_xProcess, _pathResults, _dicRecords, _fTimeout):
+    # reads the results of a Blender session until it exits or hangs,
+    # returns the asset being loaded at the end and whether the session hung
+    sCurrent = None
+    bTimeout = False
+    fLastProgress = time.monotonic()
+    with open(_pathResults, "r") as xResults:
+        sPartial = ""
+        while True:
+            bExited = _xProcess.poll() is not None
+            sPartial += xResults.read()
+            lLines = sPartial.split("\n")
+            sPartial = lLines.pop()
+            for sLine in lLines:
+                dicLine = json.loads(sLine)
+                sState = dicLine.pop("sState")
+                if sState == "failed":
+                    _xProcess.kill()
+                    _xProcess.wait()
+                    raise RuntimeError(f"Blender session failed: {dicLine['sError']}")
+                elif sState == "started":
+                    sCurrent = dicLine["sFile"]
+                else:
+                    _dicRecords[dicLine.pop("sFile")] = dicLine
+                    sCurrent = None
+                # endif
+                fLastProgress = time.monotonic()
+            # endfor
+
+            if bExited:
+                break
+            # endif
+            if time.monotonic() - fLastProgress > _fTimeout:
+                _xProcess.kill()
+                _xProcess.wait()
+                bTimeout = True
+                break
+            # endif
+            time.sleep(POLL_INTERVAL)
+        # endwhile
+    # endwith
+    return sCurrent, bTimeout
+
+
+# enddef
+
+
+def _GetBlenderScript(_pathJob, _pathResults):
+    # Python code run by Blender, importing this package from the same location
+    sPackagePath = str(Path(__file__).parent.parent.resolve())
+    return (
+        "import sys\n"
+        f"sys.path.insert(0, {sPackagePath!r})\n"
+        "from anyhuman.health import RunInBlender\n"
+        f"RunInBlender({str(_pathJob)!r}, {str(_pathResults)!r})\n"
+    )
+
+
+# enddef
+
+
+######################################################################
+def RunInBlender(_sJob, _sResults):
+    """
+    Loads the assets of a job file within Blender and appends a line to the results file
+    before and after loading each, see CheckAssets. Every asset is loaded on a new human
+    in an empty scene, so that failures do not affect the next asset.
+    """
+    with open(_sJob, "r") as xFile:
+        lAssets = json.load(xFile)
+    # endwith
+    with open(_sResults, "a") as xResults:
+        for sKind, sGender, sFile in lAssets:
+            # the asset is only started after the setup, so that a failing setup is not recorded against it
+            try:
+                xHuman = _CreateHuman(sGender, sKind not in ("hair", "beard"))
+                _PrepareOptions(xHuman, sKind)
+            except Exception as xEx:
+                _WriteLine(xResults, {"sState": "failed", "sError": f"setting up a human failed: {xEx!r}"})
+                return
+            # endtry
+            _WriteLine(xResults, {"sState": "started", "sFile": sFile})
+            dicRecord = _LoadAsset(xHuman, sKind, sFile)
+            _WriteLine(xResults, dict(dicRecord, sState="done", sFile=sFile))
+        # endfor
+    # endwith
+
+
+# enddef
+
+
+def _WriteLine(_xFile, _dicLine):
+    _xFile.write(json.dumps(_dicLine) + "\n")
+    _xFile.flush()
+
+
+# enddef
+
+
+def _CreateHuman(_sGender, _bFinish):
+    # new human in an empty scene, in the creation phase for hair and finished for all other assets
+    import bpy
+    from humgen3d.API import HG_Human
+
+    bpy.ops.wm.read_homefile(use_empty=True)
+    bpy.ops.outliner.orphans_purge(do_recursive=True)
+
+    xHuman = HG_Human()
+    lStartingHumans = xHuman.get_starting_human_options(gender=_sGender)
+    xHuman.create(chosen_starting_human=lStartingHumans[0])
+    if _bFinish:
+        xHuman.finish_creation_phase()
+    # endif
+    return xHuman
+
+
+# enddef
+
+
+def _PrepareOptions(_xHuman, _sKind):
+    # populates the list of options the asset is chosen from, as in HumGenWrapper._prepare_outfit
+    import bpy
+
+    if _sKind == "outfit":
+        bpy.ops.hg3d.random(random_type="outfit")
+    elif _sKind == "footwear":
+        bpy.ops.hg3d.random(random_type="footwear")
+    elif _sKind == "pose":
+        _xHuman.get_pose_options()
+    # endif
+
+
+# enddef
+
+
+def _LoadAsset(_xHuman, _sKind, _sFile):
+    # loads an asset like HumGenWrapper.CreateHuman and measures what it adds to the scene
+    import bpy
+
+    xHG3D = bpy.context.scene.HG3D
+    sFile = _sFile.replace("/", "\\") if os.name == "nt" else _sFile
+    setObjects = set(bpy.data.objects)
+    setImages = set(bpy.data.images)
+    fStart = time.perf_counter()
+    try:
+        if _sKind == "hair":
+            xHG3D.hair_sub = "All"
+            xHG3D.pcoll_hair = sFile
+        elif _sKind == "beard":
+            xHG3D.face_hair_sub = "All"
+            xHG3D.pcoll_face_hair = sFile
+        elif _sKind == "outfit":
+            xHG3D.pcoll_outfit = sFile
+        elif _sKind == "footwear":
+            xHG3D.pcoll_footwear = sFile
+        elif _sKind == "pose":
+            _xHuman.set_pose(chosen_pose_option=sFile)
+        # endif
+        bpy.context.view_layer.update()
+    except Exception as xEx:
+        return {"bOk": False, "sError": repr(xEx), "fLoadTime": time.perf_counter() - fStart}
+    # endtry
+    fLoadTime = time.perf_counter() - fStart
+
+    lMeshes = [objX for objX in bpy.data.objects if objX not in setObjects and objX.type == "MESH"]
+    lImages = [imgX for imgX in bpy.data.images if imgX not in setImages]
+    dicRecord = {
+        "bOk": True,
+        "sError": None,
+        "fLoadTime": fLoadTime,
+        "iPolygons": sum(len(objX.data.polygons) for objX in lMeshes),
+        "iTextures": len(lImages),
+        "iTexturePixels": sum(imgX.size[0] * imgX.size[1] for imgX in lImages),
+    }
+    if _sKind in ("outfit", "footwear") and len(lMeshes) == 0:
+        dicRecord["bOk"] = False
+        dicRecord["sError"] = "no objects were loaded"
+    # endif
+    return dicRecord
+
+
+# enddef
+
+
+######################################################################
+def main(_lArgs=None):
+    xParser = argparse.ArgumentParser(
+        description="Load every HumGen3D asset once in background Blender sessions and record the broken ones"
+    )
+    xParser.add_argument("--humgen", required=True, help="content folder of the HumGen3D add-on")
+    xParser.add_argument("--blender", default="blender", help="Blender executable with HumGen3D installed")
+    xParser.add_argument("--kinds", nargs="+", choices=ASSET_KINDS, default=list(ASSET_KINDS), help="assets to check")
+    xParser.add_argument("--recheck", action="store_true", help="also check assets with a record of an unchanged file")
+    xParser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds after which a hanging session is stopped"
+    )
+    xParser.add_argument("--log", default=None, help="file for the output of Blender")
+    xArgs = xParser.parse_args(_lArgs)
+
+    dicHealth = LoadAssetHealth(xArgs.humgen)
+    lAssets = GetAssets(xArgs.humgen, xArgs.kinds)
+    if not xArgs.recheck:
+        lAssets = [tAsset for tAsset in lAssets if tAsset[2] not in dicHealth]
+    # endif
+    print(f"Checking {len(lAssets)} assets...")
+
+    dicRecords = CheckAssets(lAssets, xArgs.blender, xArgs.timeout, xArgs.log)
+
+    sChecked = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    for sKind, _, sFile in lAssets:
+        dicHealth[sFile] = dict(
+            dicRecords[sFile], sKind=sKind, iMtime=GetAssetMtime(xArgs.humgen, sFile), sChecked=sChecked
+        )
+    # endfor
+    pathHealth = SaveAssetHealth(xArgs.humgen, dicHealth)
+
+    lBroken = [(sFile, dicRecords[sFile]["sError"]) for _, _, sFile in lAssets if not dicRecords[sFile]["bOk"]]
+    print(f"Checked {len(lAssets)} assets, {len(lBroken)} failed, records written to {pathHealth}")
+    for sFile, sError in lBroken:
+        print(f"!!! {sFile}: {sError}")
+    # endfor
+    return 0
+
+
+# enddef
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# endif
@@ -30,8 +30,6 @@ import bpy
 import mathutils
 import math
 
-import random
-
 import warnings
 import json
 
@@ -41,6 +39,10 @@ from anybase import convert
 from .cls_humgen import SingletonHumGenWrapper
 
 from .paramgenerators import ComputeParams, ResolveRandomParams
+from .paramgenerators.hashing import HashParams
+from .paramgenerators.stats import GetStatistics
+from .paramgenerators.validator import GetParamsValidator
+from .paramgenerators.rng import CreateRandom, DeriveKey, KeyedRandom, SeedGlobalRandom
 
 try:
     from humgen3d.API import HG_Human, HG_Batch_Generator
@@ -64,11 +66,19 @@ def GenerateHuman(_dicParams, **kwargs):
     The _dicParams dictionaly can contain the keys:
     - sId: name that should be used for the generated blender object
     - xSeed: object for seeding the randomization
+    - bKeyedRandom: set to True to draw every parameter from a separate random stream derived from
+        xSeed, sId and the parameter path. Then the value of a parameter does not change if other
+        parameters are added to or removed from a generator. Default is False.
     - sMode: mode for computation of the parameters of the human
     - mParamConfig: dict with parameters for the parameter computation, see HumGenWrapper
     - mOverwrite: dict with parameters that should be used to overwrite the computed paramter values
     - bDeleteBackup: set to False to prevent the deletion of the humgen backup human
         that is necessary for certain operations
+    - sStatisticsFile: path of a JSON file the statistics of all humans created by this process with this
+        file are written to after every human, see paramgenerators.stats. Files of several processes or jobs
+        can be merged with 'python -m anyhuman.paramgenerators.stats <files>'.
+    - bValidate: set to False to skip the check of the computed parameters against the asset catalog
+        before the human is created. Default is True.
 
     Parameters
     ----------
@@ -83,19 +93,17 @@ def GenerateHuman(_dicParams, **kwargs):
 
     # print("Starting Generate Human")
 
-    # set a seed for the following randomization
-    if "xSeed" in _dicParams:
-        import numpy as np
-        import random
-
-        np_seed = hash(_dicParams["xSeed"]) % (2**32)
-
-        random.seed(_dicParams["xSeed"])
-        np.random.seed(np_seed)
+    # random number generator for this human, independent of the global random state
+    if _dicParams.get("bKeyedRandom", False) is True:
+        xRandom = KeyedRandom(_dicParams.get("xSeed"), _dicParams["sId"])
+    else:
+        xRandom = CreateRandom(_dicParams.get("xSeed"))
+    # endif
 
     mode = _dicParams.get("sMode", "RANDOM_REALISTIC")
 
     lHumanGenerator = SingletonHumGenWrapper()
+    lHumanGenerator.RefreshCatalog()
 
     params = _dicParams.get("mParamConfig", {})
 
@@ -113,7 +121,19 @@ def GenerateHuman(_dicParams, **kwargs):
     # gender = _dicParams["sGender"]
 
     # first compute the parameters that should be used for the creation of the human
-    generator_params = ComputeParams(mode, params, overwrite, lHumanGenerator.generator_config)
+    generator_params = ComputeParams(mode, params, overwrite, lHumanGenerator.generator_config, rng=xRandom)
+
+    # reject malformed parameters before any Blender work is done
+    if _dicParams.get("bValidate", True) is True:
+        GetParamsValidator(lHumanGenerator.generator_config).Check(generator_params)
+    # endif
+
+    # the operators of the HumGen3D add-on draw from the global random state, which is seeded
+    # with a key derived from the seed, so that it is independent of the parameter draws
+    if "xSeed" in _dicParams:
+        xHumanId = _dicParams["sId"] if _dicParams.get("bKeyedRandom", False) is True else None
+        SeedGlobalRandom(DeriveKey(_dicParams["xSeed"], xHumanId, "humgen3d"))
+    # endif
 
     # apply
     # params['posefilename'] =_dicParams.get('sPosefile')
@@ -122,9 +142,19 @@ def GenerateHuman(_dicParams, **kwargs):
         _sName=_dicParams["sId"],
         _mParams=generator_params,
         _bDeleteBackup=_dicParams.get("bDeleteBackup", True),
+        _xRandom=xRandom,
     )
 
     objX["generator_param_dict"] = json.dumps(generator_params)
+    objX["generator_param_hash"] = HashParams(generator_params, lHumanGenerator.generator_config)
+
+    # statistics of the created humans, to monitor the balance of a dataset
+    GetStatistics().Add(generator_params)
+    if "sStatisticsFile" in _dicParams:
+        xStatistics = GetStatistics(_dicParams["sStatisticsFile"])
+        xStatistics.Add(generator_params)
+        xStatistics.Save(_dicParams["sStatisticsFile"])
+    # endif
 
     return objX
 
@@ -145,12 +175,13 @@ def ModifyHumanPostCreation(_objX, _dicParams, sMode, **kwargs):
         Dictionary with configuration arguments
     """
 
-    if "xSeed" in _dicParams:
-        import numpy as np
-        import random
+    xRandom = CreateRandom(_dicParams.get("xSeed"))
 
-        random.seed(_dicParams["xSeed"])
-        np.random.seed(hash(_dicParams["xSeed"]) % (2**32))
+    # the operators of the HumGen3D add-on draw from the global random state,
+    # seeded independently of xRandom (see GenerateHuman)
+    if "xSeed" in _dicParams:
+        SeedGlobalRandom(DeriveKey(_dicParams["xSeed"], None, "humgen3d"))
+    # endif
 
     # first, make sure that nothing is selected in the scene
     # and activate the human
@@ -173,9 +204,9 @@ def ModifyHumanPostCreation(_objX, _dicParams, sMode, **kwargs):
     params = _dicParams["mParams"]
     params["gender"] = gender
 
-    params = ResolveRandomParams(sRandomMode, params, lHumanGenerator.generator_config)
+    params = ResolveRandomParams(sRandomMode, params, lHumanGenerator.generator_config, rng=xRandom)
 
-    lHumanGenerator.ModifyHuman(gender, params)
+    lHumanGenerator.ModifyHuman(gender, params, _xRandom=xRandom)
 
     lRevertHandler = []
     if sMode == "INIT":
@@ -366,7 +397,6 @@ def PlaceHumanOnSeat(obj, args, sMode, **kwargs):
 
         sId: Blender Name of the Armature
         sGender: 'female' or 'male'
-        xSeed: Seed for RNG for reproducability purposes
         fRotateZ : Rotation of Human asset around z Axis
         fShiftX : Shift x Axis, in Armature Coordinates to fine tune asset placement, default value 0.0
         fShiftY : Shift y Axis, in Armature Coordinates to fine tune asset placement, default value 0.0
@@ -397,14 +427,6 @@ def PlaceHumanOnSeat(obj, args, sMode, **kwargs):
     lShift[2] += fShiftZ
     xShift = mathutils.Vector(lShift)
 
-    if "xSeed" in args:
-        import numpy as np
-        import random
-
-        random.seed(args["xSeed"])
-        np.random.seed(hash(args["xSeed"]) % (2**32))
-    # endif
-
     # first, make sure that nothing is selected in the scene
     try:
         bpy.ops.object.select_all(action="DESELECT")
@@ -534,8 +556,12 @@ def ReplaceMaterials(obj, args, sMode, **kwargs):
 
     # enddef
 
+    xRandom = CreateRandom(args.get("xSeed"))
+
+    # the shader randomization of the replacement library draws from the global random state,
+    # seeded independently of xRandom (see GenerateHuman)
     if "xSeed" in args:
-        random.seed(args["xSeed"])
+        SeedGlobalRandom(DeriveKey(args["xSeed"], None, "replace_materials"))
     # endif
 
     if "sReplacementBlendFile" not in args:
@@ -563,7 +589,7 @@ def ReplaceMaterials(obj, args, sMode, **kwargs):
 
         for sName, lMaterials in name2materials.items():
             if sName in xChild.name:
-                sMaterial = random.choice(lMaterials)
+                sMaterial = xRandom.choice(lMaterials)
                 # Link the material
                 with bpy.data.libraries.load(sLibPath, link=False) as (data_src, data_dst):
                     data_dst.materials = [sMaterial]
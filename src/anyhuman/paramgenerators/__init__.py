@@ -27,16 +27,21 @@
 # -----
 ###
 
-import random
 
+import json
+
+from . import diversity
 from . import file
 from . import persona
 from . import random_full
 from . import random_realistic
 from . import zwicky
+from .catalog_index import GetCatalogKey
+from .overwrite import GetOverwritePlan
+from .rng import KeyedUniformSource, LatinHypercubeSource, Stream
 
 ######################################################################
-def ComputeParams(mode, params, overwrite, generator_params):
+def ComputeParams(mode, params, overwrite, generator_params, rng=None):
     """
     Computes a set of parameters for human generation.
     Currently available modes are:
@@ -45,6 +50,8 @@ def ComputeParams(mode, params, overwrite, generator_params):
     - RANDOM_REALISTIC: randomize every parameter but within realistically apearing bounds
     - ZWICKY: randomize based on a Zwicky box like description
     - FILE: specify a path to a json file with predefined values
+    - LHS: human of a batch drawn by Latin hypercube sampling with one of the random modes
+    - DIVERSE: randomize with one of the random modes, rejecting humans similar to the ones before
 
     Parameters
     ----------
@@ -53,7 +60,15 @@ def ComputeParams(mode, params, overwrite, generator_params):
     params : dict
         dictionary of parameters for the mode, see the implementation of the mode for details
     overwrite : dict
-        dict of parameters that shall overwrite the computed values
+        dict of parameters that shall overwrite the computed values. Nested dicts are
+        merged, and keys of digits index lists, see overwrite.OverwritePlan
+    generator_params : dict
+        dictionary of settings of humgen plugin
+    rng : random.Random, optional
+        random number generator used for all random draws. By default, the global
+        generator of the random module is used. Pass a separate generator per thread
+        to compute parameters concurrently. Pass a rng.KeyedRandom to draw every
+        parameter from its own random stream.
 
     Returns
     -------
@@ -61,19 +76,12 @@ def ComputeParams(mode, params, overwrite, generator_params):
         dictionary with parameters for human generation
 
     """
-    new_params = GetParams(mode, params, generator_params)
-    new_params = ResolveRandomParams(mode, new_params, generator_params)
+    new_params = GetParams(mode, params, generator_params, rng)
+    new_params = ResolveRandomParams(mode, new_params, generator_params, rng)
 
     # overwrite the configuration values if present in overwrite dict
     # also, deal with nested values (only overwrite values given in overwrite dict)
-    for key, value in overwrite.items():
-        if isinstance(value, dict):
-            for inner_key, inner_value in value.items():
-                new_params[key][inner_key] = inner_value
-            # endfor
-        else:
-            new_params[key] = value
-        # endif
+    new_params = GetOverwritePlan(overwrite).Apply(new_params)
 
     return new_params
 
@@ -81,7 +89,85 @@ def ComputeParams(mode, params, overwrite, generator_params):
 # enddef
 
 ######################################################################
-def GetParams(mode, params, generator_params):
+def ComputeParamsBatch(
+    mode, n, seed, params, generator_params, human_ids=None, overwrite=None, sampling_mode="RANDOM"
+):
+    """
+    Computes the parameters of a batch of humans at once.
+    All randomized fields are drawn for all humans with vectorized NumPy calls.
+    Currently available modes are:
+    - RANDOM_FULL: randomize every parameter of its possible range
+    - RANDOM_REALISTIC: randomize every parameter but within realistically apearing bounds
+    - ZWICKY: randomize based on a Zwicky box like description
+
+    Every value is derived from the seed, the id of the human and the path of the
+    parameter (e.g. 'skin.tone'). Hence, the values of a human do not depend on the
+    other humans in the batch and changing one field does not change any other.
+
+    The returned batch stores the parameters column-wise. Iterating over it
+    returns the parameters of each human as a dict in the same format as returned
+    by ComputeParams, so that each can be passed to HumGenWrapper.CreateHuman.
+
+    Parameters
+    ----------
+    mode : string
+        Mode for parameter computation, see above
+    n : int
+        number of humans
+    seed : object
+        seed for the randomization, None for a non-deterministic seed
+    params : dict
+        dictionary of parameters for the mode, see the implementation of the mode for details
+    generator_params : dict
+        dictionary of settings of humgen plugin
+    human_ids : list, optional
+        id of every human, by default the index of the human in the batch
+    overwrite : dict, optional
+        dict of parameters that shall overwrite the computed values of all humans
+    sampling_mode : string, optional
+        - RANDOM: draw every value of every human independently (default)
+        - LHS: Latin hypercube sampling, i.e. the values of every parameter are stratified
+          over the batch, so the batch covers the parameter ranges evenly. The values of a
+          human depend on the size of the batch, and human_ids are not supported.
+
+    Returns
+    -------
+    batch.ParamsBatch
+        parameters of all humans
+    """
+    if sampling_mode == "RANDOM":
+        source = KeyedUniformSource(n, seed, human_ids)
+    elif sampling_mode == "LHS":
+        if human_ids is not None:
+            raise ValueError("Latin hypercube sampling does not support human ids")
+        # endif
+        source = LatinHypercubeSource(n, seed)
+    else:
+        raise NotImplementedError(f"Sampling mode {sampling_mode} is not available")
+    # endif
+
+    if mode == "RANDOM_FULL":
+        params_batch = random_full.FullyRandomizeParamsBatch(params, generator_params, source)
+    elif mode == "RANDOM_REALISTIC":
+        params_batch = random_realistic.RealisticRandomizeParamsBatch(params, generator_params, source)
+    elif mode == "ZWICKY":
+        params_batch = zwicky.ZwickyParamsBatch(params, generator_params, source)
+    else:
+        raise NotImplementedError(f"Batch parameter generation is not available for mode {mode}")
+    # endif
+
+    if overwrite:
+        params_batch = GetOverwritePlan(overwrite).ApplyBatch(params_batch)
+    # endif
+
+    return params_batch
+
+
+# enddef
+
+
+######################################################################
+def GetParams(mode, params, generator_params, rng=None):
     """
     Computes a set of parameters for human generation.
     Currently available modes are:
@@ -90,6 +176,8 @@ def GetParams(mode, params, generator_params):
     - RANDOM_REALISTIC: randomize every parameter but within realistically apearing bounds
     - ZWICKY: randomize based on a Zwicky box like description
     - FILE: specify a path to a json file with predefined values
+    - LHS: human of a batch drawn by Latin hypercube sampling with one of the random modes
+    - DIVERSE: randomize with one of the random modes, rejecting humans similar to the ones before
 
     Parameters
     ----------
@@ -97,6 +185,10 @@ def GetParams(mode, params, generator_params):
         Mode for parameter computation, see above
     params : dict
         dictionary of parameters for the mode, see the implementation of the mode for details
+    generator_params : dict
+        dictionary of settings of humgen plugin
+    rng : random.Random, optional
+        random number generator, by default the global generator of the random module
 
     Returns
     -------
@@ -107,15 +199,19 @@ def GetParams(mode, params, generator_params):
     new_params = {}
 
     if mode == "RANDOM_FULL":
-        new_params = random_full.FullyRandomizeParams(params, generator_params)
+        new_params = random_full.FullyRandomizeParams(params, generator_params, rng)
     elif mode == "RANDOM_REALISTIC":
-        new_params = random_realistic.RealisticRandomizeParams(params, generator_params)
+        new_params = random_realistic.RealisticRandomizeParams(params, generator_params, rng)
     elif mode == "ZWICKY":
-        new_params = zwicky.ZwickyParams(params, generator_params)
+        new_params = zwicky.ZwickyParams(params, generator_params, rng)
     elif mode == "PERSONA":
         new_params = persona.PersonaParams(params, generator_params)
     elif mode == "FILE":
         new_params = file.FileParams(params)
+    elif mode == "LHS":
+        new_params = LatinHypercubeParams(params, generator_params)
+    elif mode == "DIVERSE":
+        new_params = DiverseParams(params, generator_params, rng)
     else:
         raise NotImplementedError(
             f"Please specify a valid mode for anyhuman parameter generation, not {mode}"
@@ -124,18 +220,190 @@ def GetParams(mode, params, generator_params):
     return new_params
 
 
-def ResolveRandomParamValue(mode, param, params, generator_params):
-    # get a set of parameters matching to generator mode
-    new_params = GetParams(mode, params, generator_params)
+######################################################################
+_lhs_batch_cache = {}
+
+
+def LatinHypercubeParams(params, generator_params):
+    """
+    Returns the parameters of a single human of a batch, which is drawn with
+    Latin hypercube sampling (see ComputeParamsBatch). The batch is computed
+    once per process and reused for all humans of the batch.
+
+    Parameters
+    ----------
+    params : dict
+        - sBaseMode: mode of the batch, RANDOM_FULL, RANDOM_REALISTIC or ZWICKY
+        - iCount: number of humans of the batch
+        - iIndex: index of the human in the batch
+        - xSeed: seed of the batch, has to be the same for all humans of the batch
+        - mParams: dictionary of parameters for the base mode (optional)
+    generator_params : dict
+        dictionary of settings of humgen plugin
 
+    Returns
+    -------
+    dict
+        dictionary with parameters for human generation
+    """
+    base_mode = params["sBaseMode"]
+    count = params["iCount"]
+    index = params["iIndex"]
+    seed = params.get("xSeed", 0)
+    base_params = params.get("mParams", {})
+
+    if index < 0 or index >= count:
+        raise IndexError(f"Index {index} out of range for a Latin hypercube batch of {count} humans")
+    # endif
+
+    # keys are not sorted, as the order of weighted Zwicky values determines the values drawn
+    key = (json.dumps([base_mode, count, seed, base_params], default=str), GetCatalogKey(generator_params))
+    cached_generator_params, params_batch = _lhs_batch_cache.get(key, (None, None))
+    if params_batch is None or cached_generator_params is not generator_params:
+        if len(_lhs_batch_cache) >= 8:
+            _lhs_batch_cache.clear()
+        # endif
+        params_batch = ComputeParamsBatch(base_mode, count, seed, base_params, generator_params, sampling_mode="LHS")
+        _lhs_batch_cache[key] = (generator_params, params_batch)
+    # endif
+
+    return params_batch.GetParams(index)
+
+
+# enddef
+
+
+######################################################################
+# samplers of the DIVERSE mode with the humans accepted so far, by key, see DiverseParams
+_diversity_sampler_cache = {}
+
+# maximal number of samplers kept, the oldest one is dropped if another one is needed
+DIVERSITY_SAMPLER_CACHE_SIZE = 16
+
+
+def _GetDiversityKey(params):
+    # key of the sampler of the DIVERSE parameters params, see LatinHypercubeParams for the order of the keys
+    return json.dumps(
+        [params.get("sDiversityKey"), params["sBaseMode"], params["fMinDistance"], params.get("mParams", {})],
+        default=str,
+    )
+
+
+# enddef
+
+
+def DiverseParams(params, generator_params, rng=None):
+    """
+    Returns the parameters of a human, which differs from all humans returned before
+    by this process with the same parameters (see diversity.DiversitySampler).
+
+    The accepted humans are kept per process, so the humans depend on the humans generated before
+    by the process. 'sDiversityKey' separates the humans of different jobs or plans, and
+    ResetDiverseParams forgets the accepted humans. At most DIVERSITY_SAMPLER_CACHE_SIZE samplers
+    are kept. For reproducible sets of diverse humans, use diversity.IterDiverseParams.
+
+    Parameters
+    ----------
+    params : dict
+        - sBaseMode: random mode to draw the candidates with, e.g. RANDOM_REALISTIC
+        - fMinDistance: minimal distance of two humans
+        - mParams: dictionary of parameters for the base mode (optional)
+        - iMaxTries: maximal number of candidates (optional, default 1000). If no candidate
+          is accepted, the last candidate is returned.
+        - sDiversityKey: key of the set of humans the new human has to differ from, e.g. the id
+          of a job (optional, by default all humans of the process with the same parameters)
+    generator_params : dict
+        dictionary of settings of humgen plugin
+    rng : random.Random, optional
+        random number generator, by default the global generator of the random module
+
+    Returns
+    -------
+    dict
+        dictionary with parameters for human generation
+    """
+    base_mode = params["sBaseMode"]
+    base_params = params.get("mParams", {})
+    max_tries = params.get("iMaxTries", 1000)
+
+    key = _GetDiversityKey(params)
+    sampler = _diversity_sampler_cache.get(key)
+    if sampler is None:
+        while len(_diversity_sampler_cache) >= DIVERSITY_SAMPLER_CACHE_SIZE:
+            del _diversity_sampler_cache[next(iter(_diversity_sampler_cache))]
+        # endwhile
+        sampler = diversity.DiversitySampler(params["fMinDistance"])
+        _diversity_sampler_cache[key] = sampler
+    # endif
+
+    for _ in range(max_tries):
+        new_params = GetParams(base_mode, base_params, generator_params, rng)
+        if sampler.TryAdd(new_params):
+            return new_params
+        # endif
+    # endfor
+
+    print(f"!!! No human with minimal distance found in {max_tries} candidates")
+    return new_params
+
+
+# enddef
+
+
+def ResetDiverseParams(params=None):
+    """
+    Forgets the humans accepted by DiverseParams with the DIVERSE parameters params,
+    or the humans accepted for all parameters if params is None.
+    """
+    if params is None:
+        _diversity_sampler_cache.clear()
+    else:
+        _diversity_sampler_cache.pop(_GetDiversityKey(params), None)
+    # endif
+
+
+# enddef
+
+
+######################################################################
+def ResolveRandomParamValue(mode, param, params, generator_params, rng=None, get_backing_params=None):
+    """
+    Resolves the value 'random' of a single parameter.
+
+    Parameters
+    ----------
+    mode : string
+        Mode for parameter computation, see GetParams
+    param : str
+        name of the parameter, e.g. 'outfit_style'
+    params : dict
+        dictionary of parameters for the mode
+    generator_params : dict
+        dictionary of settings of humgen plugin
+    rng : random.Random, optional
+        random number generator, by default the global generator of the random module
+    get_backing_params : callable, optional
+        function returning a parameter set generated by the mode, to take the value from.
+        By default a new parameter set is generated.
+
+    Returns
+    -------
+    object
+        resolved value, or 'random' if the parameter cannot be resolved
+    """
     value = "random"
     if param == "eyebrows_style":
-        value = random.randint(0, 10)
+        value = Stream(rng, param).randint(0, 10)
     # elif param == 'face':
     #     pass
     elif param == "outfit_style":
+        if get_backing_params is None:
+            # get a set of parameters matching to generator mode
+            new_params = GetParams(mode, params, generator_params, rng)
+        else:
+            new_params = get_backing_params()
+        # endif
         value = new_params["outfit"]["outfit_style"]
-        pass
     # elif param == 'outfit_color':
     # pass
     # elif param == 'footwear_style':
@@ -147,41 +415,83 @@ def ResolveRandomParamValue(mode, param, params, generator_params):
 
 
 ######################################################################
-def ResolveRandomParamsRecursive(mode, rec_params, params, generator_params):
-    for key, value in rec_params.items():
-        print(key)
-        if isinstance(value, dict):
-            rec_params[key] = ResolveRandomParamsRecursive(
-                mode, value, params, generator_params
-            )
-        elif value == "random":
-            print(value)
-            rec_params[key] = ResolveRandomParamValue(
-                mode, key, params, generator_params
-            )
-        # endif
-    # endfor
+def FindRandomParamPaths(params):
+    """
+    Finds all entries 'random' in a nested dict of human generation parameters.
+
+    Parameters
+    ----------
+    params : dict
+        dict of parameters created by a parameter generator
+
+    Returns
+    -------
+    list
+        key paths of the entries in traversal order, each path as a tuple of keys
+    """
+    paths = []
+
+    def _find(rec_params, path):
+        for key, value in rec_params.items():
+            if isinstance(value, dict):
+                _find(value, path + (key,))
+            elif isinstance(value, str) and value == "random":
+                paths.append(path + (key,))
+            # endif
+        # endfor
+
+    # enddef
 
-    return rec_params
+    _find(params, ())
+    return paths
+
+
+# enddef
 
 
 ######################################################################
-def ResolveRandomParams(mode, params, generator_params):
+def ResolveRandomParams(mode, params, generator_params, rng=None):
     """
     Resolve all entires 'random' in a dict of human generation parameters.
 
+    The entries are resolved in a single traversal. Entries, whose value is taken from
+    a parameter set generated by the mode, share a single parameter set, which is only
+    generated if such an entry exists.
+
     Parameters
     ----------
+    mode : string
+        Mode for parameter computation, see GetParams
     params : dict
         dict of parameters created by a parameter generator
     generator_params : dict
         dictionary of settings of humgen plugin
+    rng : random.Random, optional
+        random number generator, by default the global generator of the random module
 
     Returns
     -------
     params
         dictionary with parameters for human generation without random entries
     """
-    params = ResolveRandomParamsRecursive(mode, params, params, generator_params)
+    backing_params = []
+
+    def _get_backing_params():
+        if not backing_params:
+            backing_params.append(GetParams(mode, params, generator_params, rng))
+        # endif
+        return backing_params[0]
+
+    # enddef
+
+    for path in FindRandomParamPaths(params):
+        parent = params
+        for key in path[:-1]:
+            parent = parent[key]
+        # endfor
+        parent[path[-1]] = ResolveRandomParamValue(
+            mode, path[-1], params, generator_params, rng, _get_backing_params
+        )
+    # endfor
 
     return params
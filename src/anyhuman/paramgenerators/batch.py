@@ -0,0 +1,219 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+import pickle
+
+import numpy as np
+
+from . import sampling
+from .catalog_index import GetCatalogIndex
+
+
+######################################################################
+class ParamsBatch:
+    """
+    Parameters for a batch of humans, stored column-wise.
+
+    Every randomized field is stored as a NumPy array with one entry
+    (or one row, for vector values like colors) per human. The column
+    is addressed by its parameter path, e.g. 'skin.tone'. All other
+    fields are shared by every human and stored in a template dict.
+
+    Iterating over the batch returns the parameters of each human in the
+    nested dict format expected by HumGenWrapper.CreateHuman.
+    """
+
+    def __init__(self, _iCount, _dicTemplate, _dicColumns=None):
+        self.iCount = _iCount
+        self.dicTemplate = _dicTemplate
+        self.dicColumns = {}
+
+        if _dicColumns is not None:
+            for sPath, aValues in _dicColumns.items():
+                self.SetColumn(sPath, aValues)
+            # endfor
+        # endif
+
+    # enddef
+
+    def __len__(self):
+        return self.iCount
+
+    # enddef
+
+    def __iter__(self):
+        return self.IterParams()
+
+    # enddef
+
+    def SetColumn(self, _sPath, _aValues):
+        if len(_aValues) != self.iCount:
+            raise ValueError(
+                f"Column '{_sPath}' has {len(_aValues)} entries, but the batch contains {self.iCount} humans"
+            )
+        # endif
+        self.dicColumns[_sPath] = _aValues
+
+    # enddef
+
+    def GetParams(self, _iIdx):
+        """
+        Returns the nested parameter dict of a single human of the batch.
+        """
+        dicParams = pickle.loads(self._GetPickledTemplate())
+        for sPath, aValues in self.dicColumns.items():
+            xValue = aValues[_iIdx]
+            xValue = xValue.tolist() if isinstance(xValue, (np.ndarray, np.generic)) else xValue
+            _SetPath(dicParams, sPath.split("."), xValue)
+        # endfor
+        return dicParams
+
+    # enddef
+
+    def IterParams(self, _lIndices=None):
+        """
+        Iterates over the nested parameter dicts of all humans of the batch,
+        or of the humans with the indices _lIndices.
+        """
+        bTemplate = self._GetPickledTemplate()
+
+        # group the columns by their parent dict and convert every column
+        # to Python values once instead of per element
+        dicGroups = {}
+        for sPath, aValues in self.dicColumns.items():
+            lKeys = sPath.split(".")
+            dicGroups.setdefault(tuple(lKeys[:-1]), []).append((lKeys[-1], aValues.tolist()))
+        # endfor
+        lGroups = list(dicGroups.items())
+
+        for iIdx in range(self.iCount) if _lIndices is None else _lIndices:
+            # unpickling is the fastest way to deep copy the template
+            dicParams = pickle.loads(bTemplate)
+            for tParentKeys, lColumns in lGroups:
+                dicTarget = dicParams
+                for sKey in tParentKeys:
+                    dicTarget = dicTarget[sKey]
+                # endfor
+                for sKey, lValues in lColumns:
+                    dicTarget[sKey] = lValues[iIdx]
+                # endfor
+            # endfor
+            yield dicParams
+        # endfor
+
+    # enddef
+
+    def _GetPickledTemplate(self):
+        # make sure that all dicts containing columns exist in the template
+        dicTemplate = pickle.loads(pickle.dumps(self.dicTemplate))
+        for sPath in self.dicColumns:
+            _SetPath(dicTemplate, sPath.split("."), None)
+        # endfor
+        return pickle.dumps(dicTemplate, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def _SetPath(_dicParams, _lKeys, _xValue):
+    dicTarget = _dicParams
+    for sKey in _lKeys[:-1]:
+        dicTarget = dicTarget.setdefault(sKey, {})
+    # endfor
+    dicTarget[_lKeys[-1]] = _xValue
+
+
+# enddef
+
+
+######################################################################
+def DrawGender(_dicParams, _xSource):
+    """
+    Draws the gender of every human, unless it is fixed by the 'gender' parameter.
+    """
+    # always draw, so that the values of all following fields do not depend on a fixed gender
+    aU = _xSource.Draw("gender")
+
+    if "gender" in _dicParams:
+        return np.full(_xSource.iCount, _dicParams["gender"], dtype=object)
+    # endif
+
+    return sampling.ChooseFrom(aU, ["male", "female"])
+
+
+# enddef
+
+
+######################################################################
+def DrawOutfitStyle(_aGender, _lSets, _lIgnore, _xSource, _generator_params):
+    """
+    Draws an outfit style '<set>/<outfit>' per human from the outfits
+    available for its gender, skipping outfits in the ignore list.
+    """
+    aSet = sampling.ChooseFrom(_xSource.Draw("outfit.outfit_set"), _lSets)
+
+    xIndex = GetCatalogIndex(_generator_params)
+    dicOutfits = {}
+    for sGender in np.unique(_aGender):
+        for sSet in _lSets:
+            dicOutfits[(sGender, sSet)] = xIndex.GetOutfits(sGender, sSet, _lIgnore)
+        # endfor
+    # endfor
+
+    aU = _xSource.Draw("outfit.outfit_style")
+    aOutfit = np.empty(_xSource.iCount, dtype=object)
+    for tKey, lOutfits in dicOutfits.items():
+        aMask = (_aGender == tKey[0]) & (aSet == tKey[1])
+        if np.any(aMask):
+            aOutfit[aMask] = sampling.ChooseFrom(aU[aMask], lOutfits)
+        # endif
+    # endfor
+
+    return aSet + "/" + aOutfit
+
+
+# enddef
+
+
+######################################################################
+def DrawBeardStyle(_aGender, _xSource, _generator_params):
+    """
+    Draws a beard style per human. Half of the male humans get no beard.
+    """
+    aBeard = sampling.ChooseFrom(_xSource.Draw("beard.beard_style"), GetCatalogIndex(_generator_params).GetBeards())
+    aNoBeard = (_aGender == "male") & (_xSource.Draw("beard.no_beard") < 0.5)
+    aBeard[aNoBeard] = None
+
+    return aBeard
+
+
+# enddef
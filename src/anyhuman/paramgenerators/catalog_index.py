@@ -0,0 +1,317 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Index of the asset catalog for the parameter generators. The HumGen catalog only stores
+# lists and dicts of file names, so the generators used to filter them for every human,
+# e.g. the bodies of an ethnicity or the outfits of a set without the ignored ones.
+# The index groups the assets once per catalog and returns the same tuples on every lookup.
+
+from types import MappingProxyType
+
+# hair styles per gender and hair length
+HAIR_GROUPS = MappingProxyType(
+    {
+        "female": MappingProxyType(
+            {
+                "long": (
+                    "Bob Bangs",
+                    "Bob Long",
+                    "Medium Center Part",
+                    "Medium Side Part",
+                    "Undercut",
+                    "Wavy Bob Bangs",
+                ),
+                "average": (
+                    "Afro Dreads",
+                    "Afro",
+                    "Curly Afro",
+                    "Dreadlocks",
+                    "Bob Short",
+                    "Bun Bangs",
+                    "Bun",
+                    "Ponytail Short",
+                    "Ponytail",
+                ),
+                "short": (
+                    "Curls High Top Fade",
+                    "Bowl",
+                    "Combed Stylized",
+                    "Flat top",
+                    "Mohawk",
+                    "Pixie Messy",
+                    "Pixie",
+                    "Slicked Back Side Part",
+                    "Slicked Back",
+                    "Spiked Up",
+                    "Buzzcut Curly Fade",
+                    "Buzzcut Fade",
+                    "Short Combed",
+                    "Short Curly Fade",
+                    "Short Side Part",
+                ),
+            }
+        ),
+        "male": MappingProxyType(
+            {
+                "long": (
+                    "Bob Long",
+                    "Medium Center Part",
+                    "Medium Side Part",
+                    "Undercut",
+                    "Wavy Bob Bangs",
+                ),
+                "average": (
+                    "Afro Dreads",
+                    "Afro",
+                    "Curly Afro",
+                    "Dreadlocks",
+                    "Bun",
+                    "Ponytail Short",
+                    "Ponytail",
+                ),
+                "short": (
+                    "Curls High Top Fade",
+                    "Bowl",
+                    "Combed Stylized",
+                    "Flat top",
+                    "Mohawk",
+                    "Pixie Messy",
+                    "Pixie",
+                    "Slicked Back Side Part",
+                    "Slicked Back",
+                    "Spiked Up",
+                    "Buzzcut Curly Fade",
+                    "Buzzcut Fade",
+                    "Short Combed",
+                    "Short Curly Fade",
+                    "Short Side Part",
+                ),
+            }
+        ),
+    }
+)
+
+
+######################################################################
+class CatalogIndex:
+    """
+    Index of the assets of a HumGen catalog (HumGenConfigValues), built once per catalog.
+
+    All lookups return tuples in the order of the catalog, so that drawing from them
+    gives the same values as drawing from the lists of the catalog.
+
+    Assets are tagged: bodies with their ethnicity, which is the first word of the body name
+    in lower case (e.g. 'caucasian'), and head hair styles with their hair length class
+    ('short', 'average' or 'long') from HAIR_GROUPS.
+    """
+
+    def __init__(self, _xGeneratorParams):
+        self.xGeneratorParams = _xGeneratorParams
+
+        self.dicBodies = {sGender: tuple(lBodies) for sGender, lBodies in _xGeneratorParams.dict_bodies.items()}
+        self.dicHairStyles = {sGender: tuple(dicHair) for sGender, dicHair in _xGeneratorParams.dict_hair.items()}
+        self.tBeards = tuple(_xGeneratorParams.dict_male_face_hair)
+        self.dicOutfitSets = {
+            sGender: tuple(sSet for sSet, lOutfits in dicSets.items() if len(lOutfits) > 0)
+            for sGender, dicSets in _xGeneratorParams.dict_outfits.items()
+        }
+        self.dicOutfits = {
+            (sGender, sSet): tuple(lOutfits)
+            for sGender, dicSets in _xGeneratorParams.dict_outfits.items()
+            for sSet, lOutfits in dicSets.items()
+        }
+
+        # assets per (kind, gender, tag)
+        self.dicTags = {}
+        for sGender, tBodies in self.dicBodies.items():
+            for sBody in tBodies:
+                sEthnicity = sBody.split(" ")[0].lower()
+                if ("body", sGender, sEthnicity) not in self.dicTags:
+                    self.dicTags[("body", sGender, sEthnicity)] = self._FilterBodies(sGender, sEthnicity)
+                # endif
+            # endfor
+        # endfor
+
+        # hair length class per (gender, hair style)
+        self.dicHairLength = {}
+        for sGender, tStyles in self.dicHairStyles.items():
+            setStyles = frozenset(tStyles)
+            for sLength, tGroup in HAIR_GROUPS.get(sGender, {}).items():
+                self.dicTags[("hair", sGender, sLength)] = tuple(sStyle for sStyle in tGroup if sStyle in setStyles)
+                for sStyle in tGroup:
+                    self.dicHairLength.setdefault((sGender, sStyle), sLength)
+                # endfor
+            # endfor
+        # endfor
+
+        # outfits per (gender, set, ignored outfits)
+        self.dicOutfitViews = {}
+
+    # enddef
+
+    ##################################################################
+    def _FilterBodies(self, _sGender, _sType):
+        # a body is of a type if the capitalized type is part of its name, e.g. 'Asian 2'
+        sName = _sType.capitalize()
+        return tuple(sBody for sBody in self.dicBodies[_sGender] if sName in sBody)
+
+    # enddef
+
+    ##################################################################
+    def GetBodies(self, _sGender, _sType=None):
+        """
+        Returns the bodies of a gender, optionally only the ones of an ethnicity,
+        e.g. 'asian', 'black' or 'caucasian'.
+        """
+        if _sType is None:
+            return self.dicBodies[_sGender]
+        # endif
+        tKey = ("body", _sGender, _sType)
+        tBodies = self.dicTags.get(tKey)
+        if tBodies is None:
+            tBodies = self._FilterBodies(_sGender, _sType)
+            self.dicTags[tKey] = tBodies
+        # endif
+        return tBodies
+
+    # enddef
+
+    ##################################################################
+    def GetHairStyles(self, _sGender, _sLength=None):
+        """
+        Returns the head hair styles of a gender, optionally only the ones of a hair length class.
+        Only styles contained in the catalog are returned.
+        """
+        if _sLength is None:
+            return self.dicHairStyles[_sGender]
+        # endif
+        return self.dicTags.get(("hair", _sGender, _sLength), ())
+
+    # enddef
+
+    ##################################################################
+    def GetHairLength(self, _sGender, _sHairStyle):
+        """
+        Returns the hair length class of a hair style, or None if it is not in HAIR_GROUPS.
+        """
+        return self.dicHairLength.get((_sGender, _sHairStyle))
+
+    # enddef
+
+    ##################################################################
+    def GetBeards(self):
+        """
+        Returns the beard styles.
+        """
+        return self.tBeards
+
+    # enddef
+
+    ##################################################################
+    def GetOutfitSets(self, _sGender):
+        """
+        Returns the outfit sets with at least one outfit for a gender.
+        """
+        return self.dicOutfitSets.get(_sGender, ())
+
+    # enddef
+
+    ##################################################################
+    def GetOutfits(self, _sGender, _sSet, _xIgnore=()):
+        """
+        Returns the outfits of a set for a gender, without the outfits in _xIgnore.
+        The filtered views are kept, so every ignore list is only applied once.
+        """
+        if _sGender not in self.dicOutfitSets:
+            raise KeyError(f"No outfits available for gender '{_sGender}'")
+        # endif
+        tOutfits = self.dicOutfits.get((_sGender, _sSet), ())
+        if len(_xIgnore) == 0:
+            return tOutfits
+        # endif
+        tKey = (_sGender, _sSet, frozenset(_xIgnore))
+        tView = self.dicOutfitViews.get(tKey)
+        if tView is None:
+            if len(self.dicOutfitViews) >= 256:
+                self.dicOutfitViews.clear()
+            # endif
+            tView = tuple(sOutfit for sOutfit in tOutfits if sOutfit not in tKey[2])
+            self.dicOutfitViews[tKey] = tView
+        # endif
+        return tView
+
+    # enddef
+
+    ##################################################################
+    def GetTagged(self, _sKind, _sGender, _sTag):
+        """
+        Returns the assets of a kind ('body' or 'hair') and gender with a tag, see the class description.
+        """
+        return self.dicTags.get((_sKind, _sGender, _sTag), ())
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def GetCatalogKey(_xGeneratorParams):
+    """
+    Returns the key of a catalog for caches of structures derived from it: its id and its version,
+    which is increased when the catalog is changed in place (see catalog.RefreshCatalog).
+    """
+    return (id(_xGeneratorParams), getattr(_xGeneratorParams, "catalog_version", 0))
+
+
+# enddef
+
+
+######################################################################
+_dicIndices = {}
+
+
+def GetCatalogIndex(_xGeneratorParams):
+    """
+    Returns the index of the catalog of the generator params.
+    Indices are cached, so every catalog is only indexed once.
+    """
+    tKey = GetCatalogKey(_xGeneratorParams)
+    xIndex = _dicIndices.get(tKey)
+    if xIndex is None or xIndex.xGeneratorParams is not _xGeneratorParams:
+        if len(_dicIndices) >= 16:
+            _dicIndices.clear()
+        # endif
+        xIndex = CatalogIndex(_xGeneratorParams)
+        _dicIndices[tKey] = xIndex
+    # endif
+    return xIndex
+
+
+# enddef
@@ -0,0 +1,443 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Codec between the nested parameter dicts of the generators and fixed length
+# records of a NumPy structured array. Many humans are stored in one contiguous
+# array without a Python object per parameter.
+
+import json
+import math
+import pickle
+
+import numpy as np
+
+from .catalog_index import HAIR_GROUPS
+
+# value of an integer field representing None
+INT_NONE = -(2**31)
+
+
+######################################################################
+def GetCatalogVocabularies(_xGeneratorParams):
+    """
+    Returns the values of the categorical parameters, which are defined by the asset catalog
+    and by the tables of the generators.
+
+    Parameters
+    ----------
+    _xGeneratorParams : HumGenConfigValues
+        settings of humgen plugin
+
+    Returns
+    -------
+    dict
+        sorted list of values per parameter path
+    """
+    setOutfits = set()
+    for dicSets in _xGeneratorParams.dict_outfits.values():
+        for sSet, lOutfits in dicSets.items():
+            setOutfits.update(f"{sSet}/{sOutfit}" for sOutfit in lOutfits)
+        # endfor
+    # endfor
+
+    setHair = {sHair for dicHair in _xGeneratorParams.dict_hair.values() for sHair in dicHair}
+    for dicGroups in HAIR_GROUPS.values():
+        for tStyles in dicGroups.values():
+            setHair.update(tStyles)
+        # endfor
+    # endfor
+
+    return {
+        "gender": sorted(_xGeneratorParams.dict_bodies.keys()),
+        "body": sorted({sBody for lBodies in _xGeneratorParams.dict_bodies.values() for sBody in lBodies}),
+        "hair.hair_style": sorted(setHair),
+        "beard.beard_style": sorted(_xGeneratorParams.dict_male_face_hair.keys()),
+        "outfit.outfit_style": sorted(setOutfits),
+    }
+
+
+# enddef
+
+
+######################################################################
+class ParamsSchema:
+    """
+    Fixed schema of the parameter sets of a generator.
+
+    Every leaf of a parameter set is a field of the schema with one of the kinds
+    - float: stored as float32, None as NaN
+    - int: stored as int32, None as INT_NONE
+    - category: stored as int32 index into the list of values of the field
+    - vector: list of numbers of fixed length, stored as float32 sub-array
+    Other lists are stored element-wise, e.g. 'outfit.outfit_pattern.0'.
+
+    The schema also keeps a template of the nested dict structure, so that decoding
+    returns dicts with the same structure and key order as the generators.
+    """
+
+    def __init__(self, _lFields, _dicTemplate):
+        """
+        Parameters
+        ----------
+        _lFields : list
+            (path, kind, info) per field, where info is the list of values of a category
+            field, the length of a vector field, and None otherwise
+        _dicTemplate : dict
+            parameter set with the structure of the parameter sets, the values are ignored
+        """
+        self.lFields = [
+            (sPath, sKind, list(xInfo) if sKind == "category" else xInfo) for sPath, sKind, xInfo in _lFields
+        ]
+        self.dicTemplate = _dicTemplate
+        self.bTemplate = pickle.dumps(_dicTemplate, protocol=pickle.HIGHEST_PROTOCOL)
+
+        lDtype = []
+        self.dicIndices = {}
+        for sPath, sKind, xInfo in self.lFields:
+            if sKind == "float":
+                lDtype.append((sPath, "<f4"))
+            elif sKind in ("int", "category"):
+                lDtype.append((sPath, "<i4"))
+            elif sKind == "vector":
+                lDtype.append((sPath, "<f4", (xInfo,)))
+            else:
+                raise ValueError(f"Unknown kind '{sKind}' of field '{sPath}'")
+            # endif
+
+            if sKind == "category":
+                self.dicIndices[sPath] = {_CategoryKey(xValue): iIdx for iIdx, xValue in enumerate(xInfo)}
+            # endif
+        # endfor
+        self.xDtype = np.dtype(lDtype)
+
+    # enddef
+
+    ##################################################################
+    def Encode(self, _dicParams):
+        """
+        Encodes a single parameter set into a record of the structured dtype xDtype.
+        """
+        return self.EncodeMany([_dicParams])[0]
+
+    # enddef
+
+    ##################################################################
+    def EncodeMany(self, _lParams):
+        """
+        Encodes parameter sets into a structured array with one record per set.
+
+        Parameters
+        ----------
+        _lParams : list
+            parameter sets
+
+        Returns
+        -------
+        numpy.ndarray
+            structured array of dtype xDtype
+        """
+        lParams = list(_lParams)
+        aRecords = np.zeros(len(lParams), dtype=self.xDtype)
+        for sPath, sKind, xInfo in self.lFields:
+            lKeys = sPath.split(".")
+            aRecords[sPath] = self._EncodeValues(sPath, sKind, [_GetPath(dicParams, lKeys) for dicParams in lParams])
+        # endfor
+        return aRecords
+
+    # enddef
+
+    ##################################################################
+    def EncodeBatch(self, _xBatch):
+        """
+        Encodes all humans of a batch.ParamsBatch column-wise into a structured array.
+        """
+        aRecords = np.zeros(len(_xBatch), dtype=self.xDtype)
+        for sPath, sKind, xInfo in self.lFields:
+            xColumn = _GetBatchColumn(_xBatch, sPath)
+            if xColumn is None:
+                # value shared by all humans
+                xValue = _GetPath(_xBatch.dicTemplate, sPath.split("."))
+                aRecords[sPath] = self._EncodeValues(sPath, sKind, [xValue])[0]
+            elif sKind in ("float", "vector") and xColumn.dtype != object:
+                aRecords[sPath] = xColumn
+            elif sKind == "int" and xColumn.dtype != object:
+                aRecords[sPath] = xColumn.astype(np.int32)
+            else:
+                aRecords[sPath] = self._EncodeValues(sPath, sKind, xColumn.tolist())
+            # endif
+        # endfor
+        return aRecords
+
+    # enddef
+
+    ##################################################################
+    def Decode(self, _aRecord):
+        """
+        Decodes a single record into a parameter set.
+        """
+        return next(self.DecodeMany(np.asarray(_aRecord, dtype=self.xDtype).reshape(1)))
+
+    # enddef
+
+    ##################################################################
+    def DecodeMany(self, _aRecords):
+        """
+        Iterates over the parameter sets of the records of a structured array.
+        """
+        # convert every field to Python values once instead of per record
+        lColumns = []
+        for sPath, sKind, xInfo in self.lFields:
+            aValues = _aRecords[sPath]
+            if sKind == "float":
+                lValues = [None if math.isnan(fValue) else fValue for fValue in aValues.astype(np.float64).tolist()]
+            elif sKind == "int":
+                lValues = [None if iValue == INT_NONE else iValue for iValue in aValues.tolist()]
+            elif sKind == "category":
+                lValues = [xInfo[iIdx] for iIdx in aValues.tolist()]
+            else:
+                lValues = aValues.astype(np.float64).tolist()
+            # endif
+            lColumns.append((sPath.split("."), lValues))
+        # endfor
+
+        for iIdx in range(len(_aRecords)):
+            dicParams = pickle.loads(self.bTemplate)
+            for lKeys, lValues in lColumns:
+                _SetPath(dicParams, lKeys, lValues[iIdx])
+            # endfor
+            yield dicParams
+        # endfor
+
+    # enddef
+
+    ##################################################################
+    def ToDict(self):
+        """
+        Returns a JSON serializable description of the schema, see FromDict.
+        """
+        return {"lFields": [list(tField) for tField in self.lFields], "mTemplate": self.dicTemplate}
+
+    # enddef
+
+    ##################################################################
+    @staticmethod
+    def FromDict(_dicSchema):
+        return ParamsSchema([tuple(lField) for lField in _dicSchema["lFields"]], _dicSchema["mTemplate"])
+
+    # enddef
+
+    ##################################################################
+    def _EncodeValues(self, _sPath, _sKind, _lValues):
+        if _sKind == "float":
+            return np.array([math.nan if xValue is None else xValue for xValue in _lValues], dtype=np.float32)
+        # endif
+        if _sKind == "int":
+            return np.array([INT_NONE if xValue is None else xValue for xValue in _lValues], dtype=np.int32)
+        # endif
+        if _sKind == "vector":
+            iLength = self.xDtype[_sPath].shape[0]
+            return np.array(
+                [[math.nan] * iLength if xValue is None else xValue for xValue in _lValues], dtype=np.float32
+            )
+        # endif
+
+        dicIndices = self.dicIndices[_sPath]
+        try:
+            return np.array([dicIndices[_CategoryKey(xValue)] for xValue in _lValues], dtype=np.int32)
+        except KeyError as xEx:
+            raise ValueError(f"Value {xEx.args[0][1]!r} of field '{_sPath}' is not in the schema") from None
+        # endtry
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def CreateSchema(_lSamples, _xGeneratorParams=None):
+    """
+    Creates the schema of parameter sets from samples, e.g. parameter sets
+    generated with a mode. The values of categorical fields are the values of
+    the samples and, if the generator params are given, the values of the catalog
+    (see GetCatalogVocabularies).
+
+    Parameters
+    ----------
+    _lSamples : list
+        parameter sets with the same structure, all 'random' entries resolved
+    _xGeneratorParams : HumGenConfigValues, optional
+        settings of humgen plugin
+
+    Returns
+    -------
+    ParamsSchema
+        schema
+    """
+    lSamples = list(_lSamples)
+    if len(lSamples) == 0:
+        raise ValueError("At least one sample is needed to create a schema")
+    # endif
+
+    # values of every leaf of all samples, in the order of the first sample
+    dicLeaves = {}
+    for dicSample in lSamples:
+        for sPath, xValue in _IterLeaves(dicSample, ()):
+            dicLeaves.setdefault(sPath, []).append(xValue)
+        # endfor
+    # endfor
+
+    dicVocabularies = {} if _xGeneratorParams is None else GetCatalogVocabularies(_xGeneratorParams)
+    lFields = []
+    for sPath, lValues in dicLeaves.items():
+        lNotNone = [xValue for xValue in lValues if xValue is not None]
+        if len(lNotNone) > 0 and all(isinstance(xValue, list) for xValue in lNotNone):
+            iLength = len(lNotNone[0])
+            lFields.append((sPath, "vector", iLength))
+        elif sPath not in dicVocabularies and len(lNotNone) > 0 and all(_IsNumber(x) for x in lNotNone):
+            if all(isinstance(xValue, int) for xValue in lNotNone):
+                lFields.append((sPath, "int", None))
+            else:
+                lFields.append((sPath, "float", None))
+            # endif
+        else:
+            lVocabulary = list(dicVocabularies.get(sPath, []))
+            setKnown = {_CategoryKey(xValue) for xValue in lVocabulary}
+            for xValue in lValues:
+                if _CategoryKey(xValue) not in setKnown:
+                    lVocabulary.append(xValue)
+                    setKnown.add(_CategoryKey(xValue))
+                # endif
+            # endfor
+            lFields.append((sPath, "category", lVocabulary))
+        # endif
+    # endfor
+
+    # template with the structure of the first sample
+    dicTemplate = json.loads(json.dumps(lSamples[0]))
+    for sPath, _, _ in lFields:
+        lKeys = sPath.split(".")
+        xTarget = dicTemplate
+        for sKey in lKeys[:-1]:
+            xTarget = xTarget[int(sKey)] if isinstance(xTarget, list) else xTarget.setdefault(sKey, {})
+        # endfor
+        _SetPath(xTarget, lKeys[-1:], None)
+    # endfor
+
+    return ParamsSchema(lFields, dicTemplate)
+
+
+# enddef
+
+
+######################################################################
+def _IsNumber(_xValue):
+    return isinstance(_xValue, (int, float)) and not isinstance(_xValue, bool)
+
+
+# enddef
+
+
+######################################################################
+def _CategoryKey(_xValue):
+    # distinguishes values, which are equal in Python, like False, 0 and 0.0
+    return (type(_xValue).__name__, _xValue)
+
+
+# enddef
+
+
+######################################################################
+def _IterLeaves(_xValue, _tPath):
+    # yields (path, value) of all leaves, lists of numbers are leaves
+    if isinstance(_xValue, dict):
+        for sKey, xChild in _xValue.items():
+            yield from _IterLeaves(xChild, _tPath + (str(sKey),))
+        # endfor
+    elif isinstance(_xValue, list) and not all(_IsNumber(xChild) for xChild in _xValue):
+        for iIdx, xChild in enumerate(_xValue):
+            yield from _IterLeaves(xChild, _tPath + (str(iIdx),))
+        # endfor
+    else:
+        yield ".".join(_tPath), _xValue
+    # endif
+
+
+# enddef
+
+
+######################################################################
+def _GetPath(_xParams, _lKeys):
+    # value at a path, where keys of digits index lists, or None if it does not exist
+    xValue = _xParams
+    for sKey in _lKeys:
+        if isinstance(xValue, dict):
+            xValue = xValue.get(sKey)
+        elif isinstance(xValue, list) and sKey.isdigit() and int(sKey) < len(xValue):
+            xValue = xValue[int(sKey)]
+        else:
+            return None
+        # endif
+    # endfor
+    return xValue
+
+
+# enddef
+
+
+######################################################################
+def _SetPath(_xParams, _lKeys, _xValue):
+    xTarget = _xParams
+    for sKey in _lKeys[:-1]:
+        xTarget = xTarget[int(sKey)] if isinstance(xTarget, list) else xTarget[sKey]
+    # endfor
+    if isinstance(xTarget, list):
+        xTarget[int(_lKeys[-1])] = _xValue
+    else:
+        xTarget[_lKeys[-1]] = _xValue
+    # endif
+
+
+# enddef
+
+
+######################################################################
+def _GetBatchColumn(_xBatch, _sPath):
+    # array of the values of a path for all humans, or None if the value is shared by all humans
+    if _sPath in _xBatch.dicColumns:
+        return np.asarray(_xBatch.dicColumns[_sPath])
+    # endif
+    sParent, _, sIndex = _sPath.rpartition(".")
+    if sParent in _xBatch.dicColumns and sIndex.isdigit():
+        return np.asarray(_xBatch.dicColumns[sParent])[:, int(sIndex)]
+    # endif
+    return None
+
+
+# enddef
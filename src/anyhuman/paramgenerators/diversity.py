@@ -0,0 +1,357 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Sampling of diverse humans, which rejects candidates that are too similar to the
+# humans accepted before (Poisson disk sampling in the space of human parameters).
+
+import itertools
+import math
+
+import numpy as np
+
+# continuous parameters compared by default: (parameter path, minimal value, maximal value).
+# The values are normalized to [0, 1] by these ranges, which cover the ranges of all generators.
+DEFAULT_CONTINUOUS_FIELDS = (
+    ("height", 150.0, 195.0),
+    ("skin.tone", 0.1, 2.0),
+    ("overweight", 0.0, 1.0),
+    ("muscular", 0.0, 1.0),
+    ("skinny", 0.0, 0.5),
+    ("skin.redness", -0.2, 0.8),
+    ("skin.saturation", 0.0, 1.5),
+    ("hair.lightness", 0.0, 4.0),
+    ("hair.redness", 0.0, 1.0),
+    ("eyes.iris_color.0", 0.0, 1.0),
+    ("eyes.iris_color.1", 0.0, 1.0),
+    ("eyes.iris_color.2", 0.0, 1.0),
+)
+
+# categorical parameters compared by default. Humans differing in any of these
+# parameters are considered distinct, independent of their continuous parameters.
+DEFAULT_CATEGORICAL_FIELDS = ("gender", "body")
+
+
+######################################################################
+class DiversitySampler:
+    """
+    Keeps the humans accepted so far and rejects new candidates, whose distance
+    to an accepted human is smaller than a minimal distance.
+
+    Every human is mapped to a vector of its continuous parameters, normalized to [0, 1],
+    and a key of its categorical parameters. The distance of two humans is the Euclidean
+    distance of their vectors, if the keys are equal, and infinite otherwise.
+
+    The accepted humans are stored in a hash grid per key with a cell size of the
+    minimal distance, spanned by the first _iGridDims continuous parameters. Candidates
+    are only compared with the humans in the neighboring cells, so inserting a human
+    costs about the same for the first and for the 100000th human.
+    """
+
+    def __init__(self, _fMinDistance, _lContinuousFields=None, _lCategoricalFields=None, _iGridDims=3):
+        """
+        Parameters
+        ----------
+        _fMinDistance : float
+            minimal distance of two accepted humans, in units of the normalized ranges
+        _lContinuousFields : list, optional
+            (parameter path, minimal value, maximal value) per continuous parameter,
+            by default DEFAULT_CONTINUOUS_FIELDS. Components of lists are addressed by
+            their index, e.g. 'eyes.iris_color.0'.
+        _lCategoricalFields : list, optional
+            paths of the categorical parameters, by default DEFAULT_CATEGORICAL_FIELDS
+        _iGridDims : int, optional
+            number of continuous parameters spanning the hash grid
+        """
+        if not _fMinDistance > 0.0:
+            raise ValueError("The minimal distance has to be positive")
+        # endif
+
+        self.fMinDistance = float(_fMinDistance)
+        self.lContinuousFields = list(DEFAULT_CONTINUOUS_FIELDS if _lContinuousFields is None else _lContinuousFields)
+        self.lCategoricalFields = list(
+            DEFAULT_CATEGORICAL_FIELDS if _lCategoricalFields is None else _lCategoricalFields
+        )
+        self.iGridDims = min(_iGridDims, len(self.lContinuousFields))
+
+        self.aMin = np.array([fMin for _, fMin, _ in self.lContinuousFields], dtype=np.float64)
+        self.aRange = np.array([fMax - fMin for _, fMin, fMax in self.lContinuousFields], dtype=np.float64)
+        self.aRange[self.aRange == 0.0] = 1.0
+
+        # offsets of a grid cell to its neighbor cells including itself
+        self.lNeighborOffsets = list(itertools.product((-1, 0, 1), repeat=self.iGridDims))
+
+        # vectors of the accepted humans, grown by doubling the capacity
+        self.aPoints = np.zeros((1024, len(self.lContinuousFields)), dtype=np.float64)
+        self.iCount = 0
+        # indices of the accepted humans per categorical key and grid cell
+        self.dicGrids = {}
+
+    # enddef
+
+    def __len__(self):
+        return self.iCount
+
+    # enddef
+
+    def Vectorize(self, _dicParams):
+        """
+        Returns the categorical key and the normalized vector of continuous parameters of a human.
+        """
+        tKey = tuple(_GetValue(_dicParams, sPath) for sPath in self.lCategoricalFields)
+        aValues = np.array(
+            [_ToFloat(_GetValue(_dicParams, sPath)) for sPath, _, _ in self.lContinuousFields], dtype=np.float64
+        )
+        return tKey, self._Normalize(aValues)
+
+    # enddef
+
+    def VectorizeBatch(self, _xBatch):
+        """
+        Vectorized version of Vectorize for all humans of a batch.
+
+        Returns
+        -------
+        tuple
+            (list of categorical keys, array of normalized vectors of shape (iCount, iDims))
+        """
+        lKeys = list(zip(*[_GetBatchValues(_xBatch, sPath).tolist() for sPath in self.lCategoricalFields]))
+        if len(self.lCategoricalFields) == 0:
+            lKeys = [()] * len(_xBatch)
+        # endif
+
+        aValues = np.empty((len(_xBatch), len(self.lContinuousFields)), dtype=np.float64)
+        for iDim, (sPath, _, _) in enumerate(self.lContinuousFields):
+            aValues[:, iDim] = [_ToFloat(xValue) for xValue in _GetBatchValues(_xBatch, sPath).tolist()]
+        # endfor
+        return lKeys, self._Normalize(aValues)
+
+    # enddef
+
+    def TryAdd(self, _dicParams):
+        """
+        Accepts a human, if it is far enough from all humans accepted so far.
+
+        Returns
+        -------
+        bool
+            True, if the human has been accepted
+        """
+        tKey, aVector = self.Vectorize(_dicParams)
+        return self.TryAddVector(tKey, aVector)
+
+    # enddef
+
+    def TryAddVector(self, _tKey, _aVector):
+        """
+        Accepts a human given by its categorical key and normalized vector,
+        if it is far enough from all humans accepted so far.
+        """
+        dicGrid = self.dicGrids.setdefault(_tKey, {})
+        tCell = tuple(math.floor(fX / self.fMinDistance) for fX in _aVector[: self.iGridDims].tolist())
+
+        lCandidates = []
+        for tOffset in self.lNeighborOffsets:
+            lIndices = dicGrid.get(tuple(iX + iOffset for iX, iOffset in zip(tCell, tOffset)))
+            if lIndices is not None:
+                lCandidates.extend(lIndices)
+            # endif
+        # endfor
+
+        if len(lCandidates) > 0:
+            aDiff = self.aPoints[lCandidates] - _aVector
+            if np.einsum("ij,ij->i", aDiff, aDiff).min() < self.fMinDistance**2:
+                return False
+            # endif
+        # endif
+
+        if self.iCount == len(self.aPoints):
+            self.aPoints = np.concatenate([self.aPoints, np.zeros_like(self.aPoints)])
+        # endif
+        self.aPoints[self.iCount] = _aVector
+        dicGrid.setdefault(tCell, []).append(self.iCount)
+        self.iCount += 1
+        return True
+
+    # enddef
+
+    def FilterBatch(self, _xBatch, _iMaxCount=None):
+        """
+        Tries to add the humans of a batch one after the other,
+        until _iMaxCount humans have been accepted.
+
+        Returns
+        -------
+        list
+            indices of the accepted humans of the batch
+        """
+        lKeys, aVectors = self.VectorizeBatch(_xBatch)
+        lAccepted = []
+        for iIdx in range(len(lKeys)):
+            if _iMaxCount is not None and len(lAccepted) >= _iMaxCount:
+                break
+            # endif
+            if self.TryAddVector(lKeys[iIdx], aVectors[iIdx]):
+                lAccepted.append(iIdx)
+            # endif
+        # endfor
+        return lAccepted
+
+    # enddef
+
+    def _Normalize(self, _aValues):
+        # values not given or not numeric, e.g. None, are placed in the middle of the range
+        aNormalized = (_aValues - self.aMin) / self.aRange
+        return np.where(np.isnan(aNormalized), 0.5, aNormalized)
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def _ToFloat(_xValue):
+    if isinstance(_xValue, (int, float)) and not isinstance(_xValue, bool):
+        return float(_xValue)
+    # endif
+    return math.nan
+
+
+# enddef
+
+
+######################################################################
+def _GetValue(_dicParams, _sPath):
+    # value at a parameter path, where integer keys index lists, or None if it does not exist
+    xValue = _dicParams
+    for sKey in _sPath.split("."):
+        if isinstance(xValue, dict):
+            xValue = xValue.get(sKey)
+        elif isinstance(xValue, list) and sKey.isdigit() and int(sKey) < len(xValue):
+            xValue = xValue[int(sKey)]
+        else:
+            return None
+        # endif
+    # endfor
+    return xValue
+
+
+# enddef
+
+
+######################################################################
+def _GetBatchValues(_xBatch, _sPath):
+    # values of a parameter path for all humans of a batch as object array
+    lKeys = _sPath.split(".")
+    for iSplit in range(len(lKeys), 0, -1):
+        sColumn = ".".join(lKeys[:iSplit])
+        if sColumn in _xBatch.dicColumns:
+            aColumn = np.asarray(_xBatch.dicColumns[sColumn])
+            lIndices = lKeys[iSplit:]
+            if aColumn.ndim != 1 + len(lIndices) or not all(sKey.isdigit() for sKey in lIndices):
+                break
+            # endif
+            aValues = np.empty(len(_xBatch), dtype=object)
+            aValues[:] = aColumn[(slice(None),) + tuple(int(sKey) for sKey in lIndices)].tolist()
+            return aValues
+        # endif
+    # endfor
+
+    aValues = np.empty(len(_xBatch), dtype=object)
+    aValues.fill(_GetValue(_xBatch.dicTemplate, _sPath))
+    return aValues
+
+
+# enddef
+
+
+######################################################################
+def IterDiverseParams(
+    mode, count, seed, params, generator_params, min_distance=None, sampler=None, batch_size=1000, max_candidates=None
+):
+    """
+    Streams the parameters of diverse humans. Candidates are generated in batches
+    with ComputeParamsBatch and rejected, if they are too similar to a human accepted before.
+
+    Parameters
+    ----------
+    mode : string
+        mode of the batch generator, see ComputeParamsBatch
+    count : int
+        number of humans
+    seed : object
+        seed for the randomization
+    params : dict
+        dictionary of parameters for the mode
+    generator_params : dict
+        dictionary of settings of humgen plugin
+    min_distance : float, optional
+        minimal distance of two humans, see DiversitySampler. Required if no sampler is given.
+    sampler : DiversitySampler, optional
+        sampler with the humans accepted so far, by default a new sampler
+    batch_size : int, optional
+        number of candidates generated at once
+    max_candidates : int, optional
+        maximal number of candidates, by default 100 times count. If all candidates are used,
+        fewer than count humans are returned.
+
+    Yields
+    ------
+    dict
+        Dictionary of parameters for human generator
+    """
+    from . import ComputeParamsBatch
+
+    if sampler is None:
+        sampler = DiversitySampler(min_distance)
+    # endif
+    if max_candidates is None:
+        max_candidates = 100 * count
+    # endif
+
+    accepted = 0
+    candidates = 0
+    while accepted < count and candidates < max_candidates:
+        candidate_count = min(batch_size, max_candidates - candidates)
+        # the human ids continue over the batches, so that every candidate is new
+        human_ids = range(candidates, candidates + candidate_count)
+        params_batch = ComputeParamsBatch(mode, candidate_count, seed, params, generator_params, human_ids)
+        candidates += candidate_count
+
+        indices = sampler.FilterBatch(params_batch, count - accepted)
+        yield from params_batch.IterParams(indices)
+        accepted += len(indices)
+    # endwhile
+
+    if accepted < count:
+        print(f"!!! Only {accepted} of {count} humans with minimal distance found in {candidates} candidates")
+    # endif
+
+
+# enddef
@@ -30,9 +30,26 @@
 
 import json
 
+from .jsonl_file import GetJsonlFile
+
+
 ######################################################################
 def FileParams(params):
-    """ """
+    """
+    Loads a set of parameters for human generation from a file.
+
+    The file 'sFilename' is either a JSON file containing a single parameter set,
+    or a JSONL file (extension '.jsonl') with one record per line. A record of a
+    JSONL file is selected by its index 'iIndex' or by its id 'sId' (see jsonl_file.JsonlFile).
+    """
+    if str(params["sFilename"]).lower().endswith(".jsonl"):
+        jsonl_file = GetJsonlFile(params["sFilename"])
+        if "sId" in params:
+            return jsonl_file.GetParamsById(params["sId"])
+        # endif
+        return jsonl_file.GetParams(params["iIndex"])
+    # endif
+
     filename = (params["sFilename"]).lower()
 
     with open(filename, "r") as file:
@@ -42,3 +59,16 @@ def FileParams(params):
 
 
 # enddef
+
+
+######################################################################
+def IterFileParams(filename, start=0, stop=None):
+    """
+    Iterates over the parameter sets of the records of a JSONL file in range [start, stop),
+    e.g. to generate the humans of a pre-planned dataset one after the other.
+    Only one record is held in memory at a time.
+    """
+    return GetJsonlFile(filename).IterRecords(start, stop)
+
+
+# enddef
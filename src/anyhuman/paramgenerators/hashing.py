@@ -0,0 +1,246 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Canonical content hash of human parameter sets, e.g. as key for caching generated humans
+# or for finding duplicate jobs. Parameter sets describing the same human hash identically,
+# independent of key order, float formatting, and values that do not affect the human.
+
+import json
+import math
+import hashlib
+import importlib.metadata
+
+from .catalog_index import GetCatalogKey
+
+# number of decimals floats are rounded to before hashing
+FLOAT_DECIMALS = 6
+
+# pose used by HumGenWrapper.CreateHuman, if no pose is given
+DEFAULT_POSE = "/poses/Base Poses/HG_A_Pose.blend"
+
+# hair colors, which are ignored by HumGenWrapper.CreateHuman if there is no hair style
+HAIR_COLOR_KEYS = {
+    "hair": ("lightness", "redness", "roughness", "salt_and_pepper", "roots", "hue"),
+    "eyes": ("hair_lightness", "hair_redness", "hair_roughness"),
+}
+
+# version of the canonical form, to be increased when the normalization changes
+CANONICAL_VERSION = 2
+
+
+######################################################################
+def CanonicalizeParams(_dicParams, _iDecimals=FLOAT_DECIMALS):
+    """
+    Returns a normalized copy of a parameter set, in which equivalent parameter sets are equal:
+    - numbers are floats rounded to _iDecimals decimals, except the integer eyebrow index
+    - tuples are lists
+    - a missing pose is the default pose of HumGenWrapper.CreateHuman
+    - the hair colors are removed if there is no hair style, the beard of females and a missing beard style
+
+    Parameters
+    ----------
+    _dicParams : dict
+        parameters for human generation
+    _iDecimals : int, optional
+        number of decimals floats are rounded to
+
+    Returns
+    -------
+    dict
+        normalized parameter set
+    """
+    dicParams = _Canonicalize(_dicParams, _iDecimals)
+
+    if dicParams.get("posefilename") is None:
+        dicParams["posefilename"] = DEFAULT_POSE
+    # endif
+
+    dicEyes = dicParams.get("eyes")
+    if isinstance(dicEyes, dict) and "eyebrows_style" in dicEyes:
+        try:
+            dicEyes["eyebrows_style"] = int(_dicParams["eyes"]["eyebrows_style"])
+        except (TypeError, ValueError):
+            pass
+        # endtry
+    # endif
+
+    dicHair = dicParams.get("hair")
+    if isinstance(dicHair, dict) and dicHair.get("hair_style") is None:
+        for sGroup, tKeys in HAIR_COLOR_KEYS.items():
+            if isinstance(dicParams.get(sGroup), dict):
+                for sKey in tKeys:
+                    dicParams[sGroup].pop(sKey, None)
+                # endfor
+            # endif
+        # endfor
+    # endif
+
+    # the beard shadow is applied to every male, the beard style only if it is given
+    dicBeard = dicParams.get("beard")
+    if dicParams.get("gender") != "male":
+        dicParams.pop("beard", None)
+    elif isinstance(dicBeard, dict) and "beard_style" in dicBeard and dicBeard["beard_style"] is None:
+        dicBeard.pop("beard_style")
+    # endif
+
+    return dicParams
+
+
+# enddef
+
+
+def _Canonicalize(_xValue, _iDecimals):
+    if isinstance(_xValue, dict):
+        return {str(sKey): _Canonicalize(xValue, _iDecimals) for sKey, xValue in _xValue.items()}
+    # endif
+    if isinstance(_xValue, (list, tuple)):
+        return [_Canonicalize(xValue, _iDecimals) for xValue in _xValue]
+    # endif
+    if isinstance(_xValue, bool) or _xValue is None or isinstance(_xValue, str):
+        return _xValue
+    # endif
+    try:
+        fValue = float(_xValue)
+    except (TypeError, ValueError):
+        raise TypeError(f"Value {_xValue!r} of type {type(_xValue).__name__} cannot be hashed")
+    # endtry
+    if not math.isfinite(fValue):
+        return str(fValue)
+    # endif
+    # adding 0.0 turns -0.0 into 0.0
+    return round(fValue, _iDecimals) + 0.0
+
+
+# enddef
+
+
+######################################################################
+def CanonicalJson(_dicParams, _iDecimals=FLOAT_DECIMALS):
+    """
+    Returns the canonical JSON string of a parameter set, see CanonicalizeParams.
+    """
+    return json.dumps(
+        CanonicalizeParams(_dicParams, _iDecimals), sort_keys=True, separators=(",", ":"), ensure_ascii=True
+    )
+
+
+# enddef
+
+
+######################################################################
+def HashParams(_dicParams, _xGeneratorParams=None, _iDecimals=FLOAT_DECIMALS):
+    """
+    Returns the content hash of a parameter set. The hash also covers the fingerprint of the
+    asset catalog, if _xGeneratorParams is given, and the version of this package, so humans
+    only hash identically if they are generated from the same assets with the same code.
+
+    Parameters
+    ----------
+    _dicParams : dict
+        parameters for human generation
+    _xGeneratorParams : HumGenConfigValues, optional
+        asset catalog, see GetCatalogFingerprint
+    _iDecimals : int, optional
+        number of decimals floats are rounded to
+
+    Returns
+    -------
+    str
+        hexadecimal SHA-256 hash
+    """
+    xHash = hashlib.sha256()
+    xHash.update(f"anyhuman-params/{CANONICAL_VERSION}/{GetPackageVersion()}/".encode("utf-8"))
+    if _xGeneratorParams is not None:
+        xHash.update(GetCatalogFingerprint(_xGeneratorParams).encode("utf-8"))
+    # endif
+    xHash.update(b"/")
+    xHash.update(CanonicalJson(_dicParams, _iDecimals).encode("utf-8"))
+    return xHash.hexdigest()
+
+
+# enddef
+
+
+######################################################################
+_dicFingerprints = {}
+
+
+def GetCatalogFingerprint(_xGeneratorParams):
+    """
+    Returns a hash of the asset catalog: the names and files of all bodies, hair and beard styles
+    and outfits. It only depends on the content of the catalog, not on the order the files
+    were found in, so equal HumGen3D installations have equal fingerprints.
+    """
+    tKey = GetCatalogKey(_xGeneratorParams)
+    tEntry = _dicFingerprints.get(tKey)
+    if tEntry is None or tEntry[0] is not _xGeneratorParams:
+        dicCatalog = {
+            "bodies": {sGender: sorted(lBodies) for sGender, lBodies in _xGeneratorParams.dict_bodies.items()},
+            "hair": {sGender: dict(dicHair) for sGender, dicHair in _xGeneratorParams.dict_hair.items()},
+            "beards": dict(_xGeneratorParams.dict_male_face_hair),
+            "outfits": {
+                sGender: {sSet: sorted(lOutfits) for sSet, lOutfits in dicSets.items() if len(lOutfits) > 0}
+                for sGender, dicSets in _xGeneratorParams.dict_outfits.items()
+            },
+        }
+        sCatalog = json.dumps(dicCatalog, sort_keys=True, separators=(",", ":"))
+        # paths of the catalog use the separator of the operating system
+        sCatalog = sCatalog.replace("\\\\", "/")
+        if len(_dicFingerprints) >= 16:
+            _dicFingerprints.clear()
+        # endif
+        tEntry = (_xGeneratorParams, hashlib.sha256(sCatalog.encode("utf-8")).hexdigest())
+        _dicFingerprints[tKey] = tEntry
+    # endif
+    return tEntry[1]
+
+
+# enddef
+
+
+######################################################################
+_sPackageVersion = None
+
+
+def GetPackageVersion():
+    """
+    Returns the version of the installed anyhuman package, or 'unknown' if it is not installed.
+    """
+    global _sPackageVersion
+    if _sPackageVersion is None:
+        try:
+            _sPackageVersion = importlib.metadata.version("image-render-blender-human")
+        except importlib.metadata.PackageNotFoundError:
+            _sPackageVersion = "unknown"
+        # endtry
+    # endif
+    return _sPackageVersion
+
+
+# enddef
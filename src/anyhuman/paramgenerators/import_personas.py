@@ -0,0 +1,55 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Bulk import of a folder of persona JSON files into the persona store of the folder:
+#   python -m anyhuman.paramgenerators.import_personas <persona folder>
+
+import argparse
+
+from .persona_store import STORE_FILENAME, ImportPersonas
+
+
+######################################################################
+def main(_lArgs=None):
+    xParser = argparse.ArgumentParser(
+        description=f"Import a folder of persona JSON files into the persona store '{STORE_FILENAME}' of the folder"
+    )
+    xParser.add_argument("folder", help="folder with persona files '<persona id>.json'")
+    xArgs = xParser.parse_args(_lArgs)
+
+    iCount = ImportPersonas(xArgs.folder)
+    print(f"Imported {iCount} personas")
+
+
+# enddef
+
+
+if __name__ == "__main__":
+    main()
+# endif
@@ -0,0 +1,313 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Random access to the records of a JSONL file (one JSON record per line).
+#
+# The byte offsets of the lines are stored in an index file next to the JSONL file,
+# which is memory mapped together with the JSONL file. So looking up a record by its
+# index only parses this record. The index is rebuilt, if the JSONL file changes.
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# version of the index file format
+INDEX_VERSION = 1
+
+
+######################################################################
+class JsonlFile:
+    """
+    JSONL file with persisted line offset index.
+
+    A record is either a dict of human generation parameters, or a dict
+    {"sId": <id>, "mParams": <parameters>}, which allows to look up the parameters by id.
+    """
+
+    def __init__(self, _pathFile):
+        self.pathFile = Path(_pathFile)
+        self.pathOffsets = Path(f"{self.pathFile}.idx.npy")
+        self.pathIds = Path(f"{self.pathFile}.ids.npy")
+        self.pathMeta = Path(f"{self.pathFile}.idx.json")
+
+        self.xLock = threading.Lock()
+        self.tStat = None
+        self.xFile = None
+        self.xMap = None
+        self.aOffsets = None
+        self.aIds = None
+
+    # enddef
+
+    def __len__(self):
+        return len(self._GetOffsets()) - 1
+
+    # enddef
+
+    def __iter__(self):
+        return self.IterRecords()
+
+    # enddef
+
+    def GetRecord(self, _iIndex):
+        """
+        Returns the parsed record at an index, negative indices count from the end.
+        """
+        self._GetOffsets()
+        # the map and the offsets are read together under the lock,
+        # since a concurrent _Open for a changed file closes the map
+        with self.xLock:
+            aOffsets = self.aOffsets
+            iCount = len(aOffsets) - 1
+            iIndex = _iIndex + iCount if _iIndex < 0 else _iIndex
+            if iIndex < 0 or iIndex >= iCount:
+                raise IndexError(f"Record index {_iIndex} out of range for {iCount} records in file '{self.pathFile}'")
+            # endif
+            bRecord = self.xMap[int(aOffsets[iIndex]) : int(aOffsets[iIndex + 1])]
+        # endwith
+
+        return json.loads(bRecord)
+
+    # enddef
+
+    def GetParams(self, _iIndex):
+        """
+        Returns the parameters of the record at an index.
+        """
+        return _GetRecordParams(self.GetRecord(_iIndex))
+
+    # enddef
+
+    def GetParamsById(self, _sId):
+        """
+        Returns the parameters of the record with the id _sId.
+        The ids are indexed on the first lookup by id.
+        """
+        aIds = self._GetIds()
+        iHash = _HashId(_sId)
+        iPos = int(np.searchsorted(aIds["hash"], iHash))
+        while iPos < len(aIds) and aIds["hash"][iPos] == iHash:
+            dicRecord = self.GetRecord(int(aIds["index"][iPos]))
+            if dicRecord.get("sId") == _sId:
+                return _GetRecordParams(dicRecord)
+            # endif
+            iPos += 1
+        # endwhile
+
+        raise KeyError(f"Record with id '{_sId}' not found in file '{self.pathFile}'")
+
+    # enddef
+
+    def IterRecords(self, _iStart=0, _iStop=None):
+        """
+        Iterates sequentially over the parameters of the records in range [_iStart, _iStop),
+        without holding more than one record in memory.
+        """
+        aOffsets = self._GetOffsets()
+        iStop = len(aOffsets) - 1 if _iStop is None else min(_iStop, len(aOffsets) - 1)
+
+        with open(self.pathFile, "rb") as xFile:
+            if _iStart < iStop:
+                xFile.seek(int(aOffsets[_iStart]))
+            # endif
+            for iIndex in range(_iStart, iStop):
+                yield _GetRecordParams(json.loads(xFile.read(int(aOffsets[iIndex + 1] - aOffsets[iIndex]))))
+            # endfor
+        # endwith
+
+    # enddef
+
+    def _GetOffsets(self):
+        # (re)opens the file and its index, if the file has changed
+        xStat = os.stat(self.pathFile)
+        tStat = (xStat.st_size, xStat.st_mtime_ns)
+        with self.xLock:
+            if tStat != self.tStat:
+                self._Open(tStat)
+            # endif
+            return self.aOffsets
+        # endwith
+
+    # enddef
+
+    def _GetIds(self):
+        self._GetOffsets()
+        with self.xLock:
+            if self.aIds is None:
+                self.aIds = self._LoadIds()
+            # endif
+            return self.aIds
+        # endwith
+
+    # enddef
+
+    def _Open(self, _tStat):
+        if self.xMap is not None:
+            self.xMap.close()
+            self.xFile.close()
+        # endif
+
+        self.xFile = open(self.pathFile, "rb")
+        # an empty file cannot be memory mapped
+        self.xMap = mmap.mmap(self.xFile.fileno(), 0, access=mmap.ACCESS_READ) if _tStat[0] > 0 else b""
+        self.tStat = _tStat
+        self.aIds = None
+
+        dicMeta = self._ReadMeta()
+        if dicMeta is not None and self.pathOffsets.is_file():
+            self.aOffsets = np.load(self.pathOffsets, mmap_mode="r")
+        else:
+            self.aOffsets = self._BuildOffsets()
+            dicMeta = {"iVersion": INDEX_VERSION, "iSize": _tStat[0], "iMtimeNs": _tStat[1]}
+            self._WriteIndex(dicMeta, self.pathOffsets, self.aOffsets)
+        # endif
+
+    # enddef
+
+    def _LoadIds(self):
+        dicMeta = self._ReadMeta()
+        if dicMeta is not None and dicMeta.get("bIds", False) and self.pathIds.is_file():
+            return np.load(self.pathIds, mmap_mode="r")
+        # endif
+
+        # index the ids of all records, this parses every record once
+        lOffsets = self.aOffsets.tolist()
+        aIds = np.zeros(len(lOffsets) - 1, dtype=[("hash", "<u8"), ("index", "<u8")])
+        aIds["hash"] = [
+            _HashId(json.loads(self.xMap[lOffsets[iIndex] : lOffsets[iIndex + 1]]).get("sId"))
+            for iIndex in range(len(aIds))
+        ]
+        aIds["index"] = np.arange(len(aIds))
+        aIds.sort(order=["hash", "index"])
+
+        self._WriteIndex(dict(self._ReadMeta() or {}, bIds=True), self.pathIds, aIds)
+        return aIds
+
+    # enddef
+
+    def _BuildOffsets(self):
+        # the start of every non-empty line and the end of the last line
+        aBytes = np.frombuffer(self.xMap, dtype=np.uint8) if len(self.xMap) > 0 else np.zeros(0, dtype=np.uint8)
+        aNewlines = np.flatnonzero(aBytes == ord("\n"))
+        aStarts = np.concatenate([[0], aNewlines + 1]).astype(np.uint64)
+        aEnds = np.concatenate([aNewlines, [len(aBytes)]]).astype(np.uint64)
+        aNonEmpty = aEnds > aStarts
+        aStarts = aStarts[aNonEmpty]
+        aEnds = aEnds[aNonEmpty]
+        # a record ranges up to the start of the next record, i.e. including
+        # its line break and empty lines, which are ignored by the JSON parser
+        return np.concatenate([aStarts, aEnds[-1:]]) if len(aStarts) > 0 else np.zeros(1, dtype=np.uint64)
+
+    # enddef
+
+    def _ReadMeta(self):
+        # returns the index meta data, if the index belongs to the current file
+        try:
+            with open(self.pathMeta, "r") as xFile:
+                dicMeta = json.load(xFile)
+            # endwith
+        except (OSError, ValueError):
+            return None
+        # endtry
+
+        if (
+            dicMeta.get("iVersion") != INDEX_VERSION
+            or dicMeta.get("iSize") != self.tStat[0]
+            or dicMeta.get("iMtimeNs") != self.tStat[1]
+        ):
+            return None
+        # endif
+        return dicMeta
+
+    # enddef
+
+    def _WriteIndex(self, _dicMeta, _pathArray, _aArray):
+        # the index is only a cache, so it is not an error if it cannot be written
+        try:
+            pathTemp = _pathArray.with_name(f"{_pathArray.name}.{os.getpid()}.tmp.npy")
+            np.save(pathTemp, _aArray)
+            os.replace(pathTemp, _pathArray)
+
+            pathTemp = self.pathMeta.with_name(f"{self.pathMeta.name}.{os.getpid()}.tmp")
+            with open(pathTemp, "w") as xFile:
+                json.dump(_dicMeta, xFile)
+            # endwith
+            os.replace(pathTemp, self.pathMeta)
+        except OSError as xEx:
+            print(f"!!! Index of file '{self.pathFile}' could not be written: {xEx}")
+        # endtry
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def _GetRecordParams(_dicRecord):
+    return _dicRecord["mParams"] if "mParams" in _dicRecord else _dicRecord
+
+
+# enddef
+
+
+######################################################################
+def _HashId(_sId):
+    return int.from_bytes(hashlib.blake2b(str(_sId).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# enddef
+
+
+######################################################################
+_dicFiles = {}
+_xFilesLock = threading.Lock()
+
+
+def GetJsonlFile(_pathFile):
+    """
+    Returns the JsonlFile object of a file, which is created once per file.
+    """
+    pathFile = Path(_pathFile).resolve()
+    with _xFilesLock:
+        xFile = _dicFiles.get(pathFile)
+        if xFile is None:
+            xFile = JsonlFile(pathFile)
+            _dicFiles[pathFile] = xFile
+        # endif
+    # endwith
+    return xFile
+
+
+# enddef
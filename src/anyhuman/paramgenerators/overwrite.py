@@ -0,0 +1,270 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+import copy
+import json
+
+
+######################################################################
+class OverwritePlan:
+    """
+    Overwrite dict compiled into a flat list of assignments, which can be applied
+    to many parameter sets without walking the overwrite dict again.
+
+    Nested dicts of the overwrite dict are merged into the parameter set, i.e. only
+    the values given are replaced, so empty dicts do not change anything. All other values,
+    including empty lists, replace the value in the parameter set. A key, which is an integer
+    or a string of an integer, indexes a list if the value it is applied to is a list, e.g.
+    {"eyes": {"iris_color": {"3": 0.5}}} only sets the alpha value of the iris color, as does "-1".
+    An index outside of the list, or another key applied to a list, raises a ValueError
+    when the plan is applied.
+    """
+
+    def __init__(self, _dicOverwrite):
+        # (key path, list index per key or None, value, value needs to be copied)
+        self.lAssignments = []
+        self._Compile(_dicOverwrite, ())
+
+    # enddef
+
+    def __len__(self):
+        return len(self.lAssignments)
+
+    # enddef
+
+    def _Compile(self, _dicOverwrite, _tPath):
+        for xKey, xValue in _dicOverwrite.items():
+            tPath = _tPath + (xKey,)
+            if isinstance(xValue, dict):
+                self._Compile(xValue, tPath)
+            else:
+                tIndices = tuple(_ToIndex(xPathKey) for xPathKey in tPath)
+                bCopy = isinstance(xValue, (dict, list))
+                self.lAssignments.append((tPath, tIndices, xValue, bCopy))
+            # endif
+        # endfor
+
+    # enddef
+
+    def Apply(self, _dicParams):
+        """
+        Applies the overwrite values to a parameter set in place.
+
+        Parameters
+        ----------
+        _dicParams : dict
+            parameters for human generation
+
+        Returns
+        -------
+        dict
+            the updated parameter set
+        """
+        for tPath, tIndices, xValue, bCopy in self.lAssignments:
+            _Assign(_dicParams, tPath, tIndices, xValue, bCopy)
+        # endfor
+
+        return _dicParams
+
+    # enddef
+
+    def ApplyBatch(self, _xBatch):
+        """
+        Applies the overwrite values to all humans of a batch in place.
+
+        Overwritten columns are removed from the batch and their value is stored
+        in the template shared by all humans, so the cost does not depend on the
+        number of humans. Only list indices into vector columns, like a single
+        component of the iris color, update the column.
+
+        Parameters
+        ----------
+        _xBatch : batch.ParamsBatch
+            parameters of a batch of humans
+
+        Returns
+        -------
+        batch.ParamsBatch
+            the updated batch
+        """
+        for tPath, tIndices, xValue, bCopy in self.lAssignments:
+            lPath = [str(xKey) for xKey in tPath]
+
+            # list index into a vector column
+            for iSplit in range(1, len(lPath)):
+                sColumn = ".".join(lPath[:iSplit])
+                if sColumn not in _xBatch.dicColumns:
+                    continue
+                # endif
+                aColumn = _xBatch.dicColumns[sColumn]
+                tColumnIndices = tIndices[iSplit:]
+                if aColumn.ndim != 1 + len(tColumnIndices) or any(iIdx is None for iIdx in tColumnIndices):
+                    raise KeyError(f"Cannot overwrite '{'.'.join(lPath)}' of the batch column '{sColumn}'")
+                # endif
+                for iIdx, iSize in zip(tColumnIndices, aColumn.shape[1:]):
+                    if not -iSize <= iIdx < iSize:
+                        raise ValueError(_GetIndexError(tPath, iIdx, iSize))
+                    # endif
+                # endfor
+                aColumn = aColumn.copy()
+                aColumn[(slice(None),) + tColumnIndices] = xValue
+                _xBatch.SetColumn(sColumn, aColumn)
+                break
+            else:
+                # the value replaces all columns at or below its path
+                sPath = ".".join(lPath)
+                for sColumn in [sColumn for sColumn in _xBatch.dicColumns if (sColumn + ".").startswith(sPath + ".")]:
+                    del _xBatch.dicColumns[sColumn]
+                # endfor
+                _Assign(_xBatch.dicTemplate, tPath, tIndices, xValue, bCopy)
+            # endfor
+        # endfor
+
+        return _xBatch
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def _ToIndex(_xKey):
+    # list index represented by a key, or None
+    if isinstance(_xKey, int) and not isinstance(_xKey, bool):
+        return _xKey
+    # endif
+    if isinstance(_xKey, str):
+        try:
+            return int(_xKey)
+        except ValueError:
+            return None
+        # endtry
+    # endif
+    return None
+
+
+# enddef
+
+
+######################################################################
+def _GetIndexError(_tPath, _iIdx, _iSize):
+    # message for a list index of an overwrite path outside of the list
+    sPath = ".".join(str(xKey) for xKey in _tPath)
+    return f"Overwrite '{sPath}': index {_iIdx} is out of range for a list of length {_iSize}"
+
+
+# enddef
+
+
+def _CheckListIndex(_lTarget, _xKey, _iIdx, _tPath):
+    # raises a ValueError naming the overwrite path if a key does not index the list
+    if _iIdx is None:
+        sPath = ".".join(str(xKey) for xKey in _tPath)
+        raise ValueError(f"Overwrite '{sPath}': key '{_xKey}' is not an index of a list")
+    # endif
+    if not -len(_lTarget) <= _iIdx < len(_lTarget):
+        raise ValueError(_GetIndexError(_tPath, _iIdx, len(_lTarget)))
+    # endif
+
+
+# enddef
+
+
+######################################################################
+def _Descend(_xTarget, _xKey, _iIdx, _tPath):
+    # returns the container at a key, creating missing dicts
+    if isinstance(_xTarget, list):
+        _CheckListIndex(_xTarget, _xKey, _iIdx, _tPath)
+        return _xTarget[_iIdx]
+    # endif
+    xChild = _xTarget.get(_xKey)
+    if not isinstance(xChild, (dict, list)):
+        xChild = {}
+        _xTarget[_xKey] = xChild
+    # endif
+    return xChild
+
+
+# enddef
+
+
+######################################################################
+def _Assign(_dicParams, _tPath, _tIndices, _xValue, _bCopy):
+    xTarget = _dicParams
+    for xKey, iIdx in zip(_tPath[:-1], _tIndices[:-1]):
+        xTarget = _Descend(xTarget, xKey, iIdx, _tPath)
+    # endfor
+
+    if _bCopy:
+        _xValue = copy.deepcopy(_xValue)
+    # endif
+    if isinstance(xTarget, list):
+        _CheckListIndex(xTarget, _tPath[-1], _tIndices[-1], _tPath)
+        xTarget[_tIndices[-1]] = _xValue
+    else:
+        xTarget[_tPath[-1]] = _xValue
+    # endif
+
+
+# enddef
+
+
+######################################################################
+_dicPlanCache = {}
+
+
+def GetOverwritePlan(_dicOverwrite):
+    """
+    Returns the compiled plan of an overwrite dict. Plans are cached,
+    so that applying the same overwrite dict to many humans compiles it only once.
+
+    Parameters
+    ----------
+    _dicOverwrite : dict
+        dict of parameters that shall overwrite the computed values
+
+    Returns
+    -------
+    OverwritePlan
+        compiled plan
+    """
+    sKey = json.dumps(_dicOverwrite, sort_keys=True, default=str)
+    xPlan = _dicPlanCache.get(sKey)
+    if xPlan is None:
+        if len(_dicPlanCache) >= 256:
+            _dicPlanCache.clear()
+        # endif
+        xPlan = OverwritePlan(_dicOverwrite)
+        _dicPlanCache[sKey] = xPlan
+    # endif
+    return xPlan
+
+
+# enddef
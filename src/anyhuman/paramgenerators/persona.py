@@ -27,19 +27,17 @@
 # -----
 ###
 
-import json
-from pathlib import Path
+from .persona_store import GetPersonaStore
+
 
 ######################################################################
 def PersonaParams(params, generator_params):
-    """ """
-    persona_id = (params["sPersonaId"]).lower()
-
-    filename = Path.joinpath(generator_params.persona_path, persona_id + ".json")
-    with open(filename, "r") as file:
-        params = json.load(file)
-
-    return params
+    """
+    Returns the parameters of the persona 'sPersonaId' from the persona folder.
+    Personas are read from the persona store of the folder (see persona_store),
+    and each persona is parsed only once.
+    """
+    return GetPersonaStore(generator_params.persona_path).Get(params["sPersonaId"])
 
 
 # enddef
@@ -0,0 +1,280 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Persona store packing many persona JSON files into a single indexed sqlite file.
+# See import_personas for the bulk import of a persona folder.
+
+import os
+import json
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# file name of the store in a persona folder
+STORE_FILENAME = "personas.sqlite"
+
+
+######################################################################
+class PersonaStore:
+    """
+    Access to the personas of a persona folder.
+
+    Personas are looked up in the sqlite store file of the folder, if it exists,
+    and otherwise in the file '<persona id>.json' of the folder. A persona file that
+    was modified after the store is preferred to the persona in the store.
+    Parsed personas are kept in an in-process LRU cache, so that every persona is read
+    only once. Every lookup checks the modification times of the store and of the persona
+    file, so personas are read again after the store or the file changed.
+    """
+
+    def __init__(self, _pathFolder, _iCacheSize=1024, _pathStore=None):
+        self.pathFolder = Path(_pathFolder)
+        self.pathStore = self.pathFolder / STORE_FILENAME if _pathStore is None else Path(_pathStore)
+        self.iCacheSize = _iCacheSize
+
+        # pickled persona per id, unpickling returns an independent copy
+        self.dicCache = OrderedDict()
+        self.xLock = threading.Lock()
+        self.xLocal = threading.local()
+        # (size, modification time) of the store file, None if it does not exist, () if not checked yet
+        self.tStoreStat = ()
+        # increased when the store file changed, to reconnect to it
+        self.iStoreGeneration = 0
+
+    # enddef
+
+    def Get(self, _sPersonaId):
+        """
+        Returns the parameters of a persona.
+
+        Parameters
+        ----------
+        _sPersonaId : str
+            id of the persona, e.g. 'alice'
+
+        Returns
+        -------
+        dict
+            Dictionary of parameters for human generator, a new copy on every call
+        """
+        sId = _sPersonaId.lower()
+        tStoreStat = self._CheckStore()
+        tFileStat = _GetStat(self.pathFolder / (sId + ".json"))
+        bParams = None
+        with self.xLock:
+            tEntry = self.dicCache.get(sId)
+            if tEntry is not None and tEntry[1] == tFileStat:
+                bParams = tEntry[0]
+                self.dicCache.move_to_end(sId)
+            # endif
+        # endwith
+
+        if bParams is None:
+            bParams = pickle.dumps(self._Load(sId, tStoreStat, tFileStat), protocol=pickle.HIGHEST_PROTOCOL)
+            with self.xLock:
+                self.dicCache[sId] = (bParams, tFileStat)
+                while len(self.dicCache) > self.iCacheSize:
+                    self.dicCache.popitem(last=False)
+                # endwhile
+            # endwith
+        # endif
+
+        return pickle.loads(bParams)
+
+    # enddef
+
+    def GetIds(self):
+        """
+        Returns the sorted ids of all available personas.
+        """
+        setIds = {pathFile.stem.lower() for pathFile in self.pathFolder.glob("*.json")}
+        if self._CheckStore() is not None:
+            setIds.update(sId for (sId,) in self._GetConnection().execute("SELECT id FROM personas"))
+        # endif
+        return sorted(setIds)
+
+    # enddef
+
+    def ClearCache(self):
+        """
+        Forgets the parsed personas and checks the store file again on the next lookup.
+        """
+        with self.xLock:
+            self.dicCache.clear()
+            self.tStoreStat = ()
+        # endwith
+
+    # enddef
+
+    def _CheckStore(self):
+        # stat of the store file, the cached personas are dropped if the store changed
+        tStoreStat = _GetStat(self.pathStore)
+        with self.xLock:
+            if tStoreStat != self.tStoreStat:
+                self.tStoreStat = tStoreStat
+                self.iStoreGeneration += 1
+                self.dicCache.clear()
+            # endif
+        # endwith
+        return tStoreStat
+
+    # enddef
+
+    def _GetConnection(self):
+        # sqlite connections must not be shared between threads, a changed store is connected again
+        iGeneration, xConnection = getattr(self.xLocal, "tConnection", (None, None))
+        if iGeneration != self.iStoreGeneration:
+            if xConnection is not None:
+                xConnection.close()
+            # endif
+            iGeneration = self.iStoreGeneration
+            xConnection = sqlite3.connect(f"{self.pathStore.as_uri()}?mode=ro", uri=True)
+            self.xLocal.tConnection = (iGeneration, xConnection)
+        # endif
+        return xConnection
+
+    # enddef
+
+    def _Load(self, _sId, _tStoreStat, _tFileStat):
+        # the persona file is used instead of the store, if it was modified after the store
+        if _tStoreStat is not None and (_tFileStat is None or _tFileStat[1] <= _tStoreStat[1]):
+            lRows = self._GetConnection().execute("SELECT params FROM personas WHERE id = ?", (_sId,)).fetchall()
+            if len(lRows) > 0:
+                return json.loads(lRows[0][0])
+            # endif
+        # endif
+
+        pathFile = self.pathFolder / (_sId + ".json")
+        try:
+            with open(pathFile, "r") as xFile:
+                return json.load(xFile)
+            # endwith
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Persona '{_sId}' not found in store '{self.pathStore}' or as file '{pathFile}'")
+        # endtry
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def _GetStat(_pathFile):
+    # (size, modification time) of a file, or None if it does not exist
+    try:
+        xStat = os.stat(_pathFile)
+    except OSError:
+        return None
+    # endtry
+    return (xStat.st_size, xStat.st_mtime_ns)
+
+
+# enddef
+
+
+######################################################################
+_dicStores = {}
+_xStoresLock = threading.Lock()
+
+
+def GetPersonaStore(_pathFolder):
+    """
+    Returns the persona store of a persona folder, which is created once per folder.
+    """
+    pathFolder = Path(_pathFolder)
+    with _xStoresLock:
+        xStore = _dicStores.get(pathFolder)
+        if xStore is None:
+            xStore = PersonaStore(pathFolder)
+            _dicStores[pathFolder] = xStore
+        # endif
+    # endwith
+    return xStore
+
+
+# enddef
+
+
+######################################################################
+def ImportPersonas(_pathFolder):
+    """
+    Imports all persona JSON files of a folder into the persona store file 'personas.sqlite'
+    of the folder, which is read by GetPersonaStore. Personas already in the store are replaced.
+
+    Parameters
+    ----------
+    _pathFolder : str or Path
+        folder with persona files '<persona id>.json'
+
+    Returns
+    -------
+    int
+        number of imported personas
+    """
+    pathFolder = Path(_pathFolder)
+    pathStore = pathFolder / STORE_FILENAME
+
+    def _IterPersonas():
+        for pathFile in sorted(pathFolder.glob("*.json")):
+            with open(pathFile, "r") as xFile:
+                dicParams = json.load(xFile)
+            # endwith
+            yield pathFile.stem.lower(), json.dumps(dicParams, separators=(",", ":"))
+        # endfor
+
+    # enddef
+
+    xConnection = sqlite3.connect(str(pathStore))
+    try:
+        with xConnection:
+            xConnection.execute("CREATE TABLE IF NOT EXISTS personas (id TEXT PRIMARY KEY, params TEXT NOT NULL)")
+            iCountBefore = xConnection.total_changes
+            xConnection.executemany("INSERT OR REPLACE INTO personas (id, params) VALUES (?, ?)", _IterPersonas())
+            iCount = xConnection.total_changes - iCountBefore
+        # endwith
+    finally:
+        xConnection.close()
+    # endtry
+
+    # stores of this file have to look up the new personas, even if the modification time did not change
+    with _xStoresLock:
+        for xStore in _dicStores.values():
+            if xStore.pathStore == pathStore:
+                xStore.ClearCache()
+            # endif
+        # endfor
+    # endwith
+
+    return iCount
+
+
+# enddef
@@ -27,11 +27,19 @@
 # -----
 ###
 
-import random
-from ..tools import RandomUniformDiscrete
+import numpy as np
+
+from . import batch
+from .catalog_index import GetCatalogIndex
+from .rng import Stream
+from .sampling import RandomUniformDiscrete, UniformDiscrete, RandInt, Triangular, ChooseGrouped
+
+# outfit sets drawn from and outfits never drawn by the realistic parameters
+OUTFIT_SETS = ("Extra Outfits Pack",)
+IGNORED_OUTFITS = ("Flight Suit", "Lab Tech", "Pirate")
 
 ############################################################################################
-def RealisticRandomizeParams(params, generator_params):
+def RealisticRandomizeParams(params, generator_params, rng=None):
     """
     Create a set of completely random parameters for human generation.
     This randomizer is intended for the generation of visually
@@ -47,56 +55,65 @@ def RealisticRandomizeParams(params, generator_params):
     ----------
     params : dict
         set of parameter controlling the randomization
+    generator_params : HumGenConfigValues
+        settings of humgen plugin
+    rng : random.Random, optional
+        random number generator to draw from, by default the global generator of the random module
 
     Returns
     -------
     dict
         Dictionary of parameters for human generator
     """
-    gender = params.get("gender", random.choice(["male", "female"]))
+
+    def _rng(path):
+        # random stream for the parameter with the given path
+        return Stream(rng, path)
+
+    # enddef
+
+    gender = params.get("gender", _rng("gender").choice(["male", "female"]))
 
     sets = ["Casual", "Summer", "Winter", "Office", "Extra Outfits Pack"]
-    sets = ["Extra Outfits Pack"]
+    sets = list(OUTFIT_SETS)
 
-    ignore_list = ["Flight Suit", "Lab Tech", "Pirate"]
+    ignore_list = list(IGNORED_OUTFITS)
     ignore_list.extend(params.get("additional_clothes_to_ignore", []))
 
-    outfit_set = random.choice(sets)
-    outfit_list = [
-        item
-        for item in generator_params.dict_outfits[gender][outfit_set]
-        if item not in ignore_list
-    ]
-    outfit = random.choice(outfit_list)
+    index = GetCatalogIndex(generator_params)
+    outfit_set = _rng("outfit.outfit_set").choice(sets)
+    outfit = _rng("outfit.outfit_style").choice(index.GetOutfits(gender, outfit_set, ignore_list))
     outfit_style = "{}/{}".format(outfit_set, outfit)
 
+    iris_rng = _rng("eyes.iris_color")
+
     new_params = {
         "gender": gender,
-        "body": random.choice(generator_params.dict_bodies[gender]),
-        "muscular": RandomUniformDiscrete(0, 1, 11),
-        "overweight": RandomUniformDiscrete(0, 1, 11),
+        "body": _rng("body").choice(index.GetBodies(gender)),
+        "muscular": RandomUniformDiscrete(0, 1, 11, _xRandom=_rng("muscular")),
+        "overweight": RandomUniformDiscrete(0, 1, 11, _xRandom=_rng("overweight")),
         # set skinny value to 0-0.2 as  persons too skinny look odd
-        "skinny": RandomUniformDiscrete(0, 0.5, 11),
-        "height": RandomUniformDiscrete(160, 185, 26),
+        "skinny": RandomUniformDiscrete(0, 0.5, 11, _xRandom=_rng("skinny")),
+        "height": RandomUniformDiscrete(160, 185, 26, _xRandom=_rng("height")),
         "face": "random",
         "skin": {
-            "tone": RandomUniformDiscrete(0.1, 1.9, 51),
-            "redness": RandomUniformDiscrete(-0.2, 0.8, 51),
-            "saturation": RandomUniformDiscrete(0.1, 0.9, 51),
-            "normal_strength": random.randint(1, 2),
-            "roughness_multiplier": RandomUniformDiscrete(1.5, 2.0, 51),
-            "dark_areas": RandomUniformDiscrete(0.0, 2.0, 101),
-            "light_areas": RandomUniformDiscrete(0.0, 2.0, 101),
-            "freckles": RandomUniformDiscrete(0.0, 0.5, 101),
-            "splotches": RandomUniformDiscrete(0.0, 0.5, 101),
-            "beauty_spots_amount_": random.randint(0, 100),  # TODO clarify what this is
-            "beauty_spots_amount": RandomUniformDiscrete(0.0, 1.0, 101),
-            "beauty_spots_opacity": RandomUniformDiscrete(0.0, 0.5, 101),
-            "sagging": RandomUniformDiscrete(0.3, 1.0, 15),
-            "wrinkles": RandomUniformDiscrete(5.0, 20.0, 51),
+            "tone": RandomUniformDiscrete(0.1, 1.9, 51, _xRandom=_rng("skin.tone")),
+            "redness": RandomUniformDiscrete(-0.2, 0.8, 51, _xRandom=_rng("skin.redness")),
+            "saturation": RandomUniformDiscrete(0.1, 0.9, 51, _xRandom=_rng("skin.saturation")),
+            "normal_strength": _rng("skin.normal_strength").randint(1, 2),
+            "roughness_multiplier": RandomUniformDiscrete(1.5, 2.0, 51, _xRandom=_rng("skin.roughness_multiplier")),
+            "dark_areas": RandomUniformDiscrete(0.0, 2.0, 101, _xRandom=_rng("skin.dark_areas")),
+            "light_areas": RandomUniformDiscrete(0.0, 2.0, 101, _xRandom=_rng("skin.light_areas")),
+            "freckles": RandomUniformDiscrete(0.0, 0.5, 101, _xRandom=_rng("skin.freckles")),
+            "splotches": RandomUniformDiscrete(0.0, 0.5, 101, _xRandom=_rng("skin.splotches")),
+            "beauty_spots_amount_": _rng("skin.beauty_spots_amount_").randint(0, 100),  # TODO clarify what this is
+            "beauty_spots_amount": RandomUniformDiscrete(0.0, 1.0, 101, _xRandom=_rng("skin.beauty_spots_amount")),
+            "beauty_spots_opacity": RandomUniformDiscrete(0.0, 0.5, 101, _xRandom=_rng("skin.beauty_spots_opacity")),
+            "sagging": RandomUniformDiscrete(0.3, 1.0, 15, _xRandom=_rng("skin.sagging")),
+            "wrinkles": RandomUniformDiscrete(5.0, 20.0, 51, _xRandom=_rng("skin.wrinkles")),
         },
         "eyes": {
-            "iris_color": [random.random(), random.random(), random.random(), 1.00],
+            "iris_color": [iris_rng.random(), iris_rng.random(), iris_rng.random(), 1.00],
             "eyebrows_style": "random",
             "eyebrows_length": None,  # TODO implement
             "eyelashes_lenght": None,  # TODO implement
@@ -105,44 +122,40 @@ def RealisticRandomizeParams(params, generator_params):
             "hair_roughness": 0.3,
         },
         "hair": {
-            "hair_style": random.choice(
-                list(generator_params.dict_hair[gender].keys())
-            ),
+            "hair_style": _rng("hair.hair_style").choice(index.GetHairStyles(gender)),
             "length": RandomUniformDiscrete(
-                0.0, 1.0, 101
+                0.0, 1.0, 101, _xRandom=_rng("hair.length")
             ),  # hairstyle seems not to be evaluated
-            "lightness": RandomUniformDiscrete(0.1, 3.9, 39),
-            "redness": RandomUniformDiscrete(0.1, 0.9, 9),
-            "roughness": RandomUniformDiscrete(0.1, 0.9, 9),
-            "salt_and_pepper": RandomUniformDiscrete(0.1, 0.9, 9),
-            "roots": RandomUniformDiscrete(0.1, 0.9, 9),
+            "lightness": RandomUniformDiscrete(0.1, 3.9, 39, _xRandom=_rng("hair.lightness")),
+            "redness": RandomUniformDiscrete(0.1, 0.9, 9, _xRandom=_rng("hair.redness")),
+            "roughness": RandomUniformDiscrete(0.1, 0.9, 9, _xRandom=_rng("hair.roughness")),
+            "salt_and_pepper": RandomUniformDiscrete(0.1, 0.9, 9, _xRandom=_rng("hair.salt_and_pepper")),
+            "roots": RandomUniformDiscrete(0.1, 0.9, 9, _xRandom=_rng("hair.roots")),
             "hue": 0.5,
         },
         "beard": {
-            "beard_style": random.choice(
-                list(generator_params.dict_male_face_hair.keys())
-            ),
+            "beard_style": _rng("beard.beard_style").choice(index.GetBeards()),
             "shadow_mustache": 0,
-            "shadow_beard": RandomUniformDiscrete(0.0, 1.0, 11),
+            "shadow_beard": RandomUniformDiscrete(0.0, 1.0, 11, _xRandom=_rng("beard.shadow_beard")),
         },
         "makeup": {
             "foundation_amount": 0,
             "foundation_color": [0.655761, 0.332872, 0.191478, 1.000000],
-            "blush_opacity": RandomUniformDiscrete(0.0, 1.0, 101),
+            "blush_opacity": RandomUniformDiscrete(0.0, 1.0, 101, _xRandom=_rng("makeup.blush_opacity")),
             "blush_color": [0.553053, 0.138596, 0.109141, 1.000000],
-            "eyeshadow_opacity": RandomUniformDiscrete(0.0, 1.0, 101),
+            "eyeshadow_opacity": RandomUniformDiscrete(0.0, 1.0, 101, _xRandom=_rng("makeup.eyeshadow_opacity")),
             "eyeshadow_color": [0.239424, 0.041744, 0.013199, 1.000000],
-            "lipstick_opacity": RandomUniformDiscrete(0.0, 1.0, 101),
+            "lipstick_opacity": RandomUniformDiscrete(0.0, 1.0, 101, _xRandom=_rng("makeup.lipstick_opacity")),
             "lipstick_color": [0.309741, 0.091615, 0.073231, 1.000000],
-            "eyeliner_opacity": RandomUniformDiscrete(0.0, 1.0, 101),
+            "eyeliner_opacity": RandomUniformDiscrete(0.0, 1.0, 101, _xRandom=_rng("makeup.eyeliner_opacity")),
             "eyeliner_color": [0.001578, 0.010979, 0.060677, 1.000000],
         },
         "outfit": {
             "outfit_style": outfit_style,
             "outfit_pattern": False,
             "outfit_color": "random",
-            "outfit_brightness": random.triangular(0.5, 0.7),
-            "outfit_saturation": random.triangular(0.5, 0.7),
+            "outfit_brightness": _rng("outfit.outfit_brightness").triangular(0.5, 0.7),
+            "outfit_saturation": _rng("outfit.outfit_saturation").triangular(0.5, 0.7),
         },
         "footwear": {
             "footwear_style": "random",
@@ -152,10 +165,149 @@ def RealisticRandomizeParams(params, generator_params):
     }
 
     if gender == "male":
-        if random.choice([True, False]):
+        if _rng("beard.no_beard").choice([True, False]):
             new_params["beard"]["beard_style"] = None
 
     return new_params
 
 
 # enddef
+
+
+############################################################################################
+def RealisticRandomizeParamsBatch(params, generator_params, source):
+    """
+    Vectorized version of RealisticRandomizeParams, which draws the parameters
+    of a whole batch of humans at once.
+
+    Parameters
+    ----------
+    params : dict
+        set of parameter controlling the randomization, see RealisticRandomizeParams
+    generator_params : HumGenConfigValues
+        settings of humgen plugin
+    source : rng.KeyedUniformSource
+        source of uniform random numbers, defines the number of humans
+
+    Returns
+    -------
+    batch.ParamsBatch
+        parameters of all humans
+    """
+
+    def _ud(path, min, max, count):
+        return UniformDiscrete(source.Draw(path), min, max, count)
+
+    sets = list(OUTFIT_SETS)
+
+    ignore_list = list(IGNORED_OUTFITS)
+    ignore_list.extend(params.get("additional_clothes_to_ignore", []))
+
+    gender = batch.DrawGender(params, source)
+    index = GetCatalogIndex(generator_params)
+
+    columns = {
+        "gender": gender,
+        "body": ChooseGrouped(source.Draw("body"), gender, index.dicBodies),
+        "muscular": _ud("muscular", 0, 1, 11),
+        "overweight": _ud("overweight", 0, 1, 11),
+        "skinny": _ud("skinny", 0, 0.5, 11),
+        "height": _ud("height", 160, 185, 26),
+        "skin.tone": _ud("skin.tone", 0.1, 1.9, 51),
+        "skin.redness": _ud("skin.redness", -0.2, 0.8, 51),
+        "skin.saturation": _ud("skin.saturation", 0.1, 0.9, 51),
+        "skin.normal_strength": RandInt(source.Draw("skin.normal_strength"), 1, 2),
+        "skin.roughness_multiplier": _ud("skin.roughness_multiplier", 1.5, 2.0, 51),
+        "skin.dark_areas": _ud("skin.dark_areas", 0.0, 2.0, 101),
+        "skin.light_areas": _ud("skin.light_areas", 0.0, 2.0, 101),
+        "skin.freckles": _ud("skin.freckles", 0.0, 0.5, 101),
+        "skin.splotches": _ud("skin.splotches", 0.0, 0.5, 101),
+        "skin.beauty_spots_amount_": RandInt(source.Draw("skin.beauty_spots_amount_"), 0, 100),
+        "skin.beauty_spots_amount": _ud("skin.beauty_spots_amount", 0.0, 1.0, 101),
+        "skin.beauty_spots_opacity": _ud("skin.beauty_spots_opacity", 0.0, 0.5, 101),
+        "skin.sagging": _ud("skin.sagging", 0.3, 1.0, 15),
+        "skin.wrinkles": _ud("skin.wrinkles", 5.0, 20.0, 51),
+        "eyes.iris_color": np.hstack([source.Draw("eyes.iris_color", 3), np.ones((source.iCount, 1))]),
+        "eyes.eyebrows_style": RandInt(source.Draw("eyes.eyebrows_style"), 0, 10),
+        "hair.hair_style": ChooseGrouped(source.Draw("hair.hair_style"), gender, index.dicHairStyles),
+        "hair.length": _ud("hair.length", 0.0, 1.0, 101),
+        "hair.lightness": _ud("hair.lightness", 0.1, 3.9, 39),
+        "hair.redness": _ud("hair.redness", 0.1, 0.9, 9),
+        "hair.roughness": _ud("hair.roughness", 0.1, 0.9, 9),
+        "hair.salt_and_pepper": _ud("hair.salt_and_pepper", 0.1, 0.9, 9),
+        "hair.roots": _ud("hair.roots", 0.1, 0.9, 9),
+        "beard.beard_style": batch.DrawBeardStyle(gender, source, generator_params),
+        "beard.shadow_beard": _ud("beard.shadow_beard", 0.0, 1.0, 11),
+        "makeup.blush_opacity": _ud("makeup.blush_opacity", 0.0, 1.0, 101),
+        "makeup.eyeshadow_opacity": _ud("makeup.eyeshadow_opacity", 0.0, 1.0, 101),
+        "makeup.lipstick_opacity": _ud("makeup.lipstick_opacity", 0.0, 1.0, 101),
+        "makeup.eyeliner_opacity": _ud("makeup.eyeliner_opacity", 0.0, 1.0, 101),
+        "outfit.outfit_style": batch.DrawOutfitStyle(gender, sets, ignore_list, source, generator_params),
+        "outfit.outfit_brightness": Triangular(source.Draw("outfit.outfit_brightness"), 0.5, 0.7),
+        "outfit.outfit_saturation": Triangular(source.Draw("outfit.outfit_saturation"), 0.5, 0.7),
+    }
+
+    # values shared by all humans, drawn values are filled in from the columns
+    template = {
+        "gender": None,
+        "body": None,
+        "muscular": None,
+        "overweight": None,
+        "skinny": None,
+        "height": None,
+        "face": "random",
+        "skin": {},
+        "eyes": {
+            "iris_color": None,
+            "eyebrows_style": None,
+            "eyebrows_length": None,  # TODO implement
+            "eyelashes_lenght": None,  # TODO implement
+            "hair_lightness": 0.3,
+            "hair_redness": 0.9,
+            "hair_roughness": 0.3,
+        },
+        "hair": {
+            "hair_style": None,
+            "length": None,
+            "lightness": None,
+            "redness": None,
+            "roughness": None,
+            "salt_and_pepper": None,
+            "roots": None,
+            "hue": 0.5,
+        },
+        "beard": {
+            "beard_style": None,
+            "shadow_mustache": 0,
+            "shadow_beard": None,
+        },
+        "makeup": {
+            "foundation_amount": 0,
+            "foundation_color": [0.655761, 0.332872, 0.191478, 1.000000],
+            "blush_opacity": None,
+            "blush_color": [0.553053, 0.138596, 0.109141, 1.000000],
+            "eyeshadow_opacity": None,
+            "eyeshadow_color": [0.239424, 0.041744, 0.013199, 1.000000],
+            "lipstick_opacity": None,
+            "lipstick_color": [0.309741, 0.091615, 0.073231, 1.000000],
+            "eyeliner_opacity": None,
+            "eyeliner_color": [0.001578, 0.010979, 0.060677, 1.000000],
+        },
+        "outfit": {
+            "outfit_style": None,
+            "outfit_pattern": False,
+            "outfit_color": "random",
+            "outfit_brightness": None,
+            "outfit_saturation": None,
+        },
+        "footwear": {
+            "footwear_style": "random",
+            "footwear_color": "random",
+        },
+        "posefilename": None,
+    }
+
+    return batch.ParamsBatch(source.iCount, template, columns)
+
+
+# enddef
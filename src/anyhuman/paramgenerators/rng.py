@@ -0,0 +1,316 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+import hashlib
+import random
+
+import numpy as np
+
+
+######################################################################
+def SeedToInt(_xSeed):
+    """
+    Converts a seed object into a non-negative integer.
+
+    Non-negative integers are used as they are. Any other object (e.g. the
+    string seeds used in catharsys configurations) is hashed with a
+    stable hash, so that the same seed results in the same integer in every
+    process, independent of PYTHONHASHSEED.
+
+    Parameters
+    ----------
+    _xSeed : object
+        seed object, None for a non-deterministic seed
+
+    Returns
+    -------
+    int or None
+        integer seed
+    """
+    if _xSeed is None:
+        return None
+    # endif
+
+    if isinstance(_xSeed, int) and not isinstance(_xSeed, bool) and _xSeed >= 0:
+        return _xSeed
+    # endif
+
+    xHash = hashlib.sha256(str(_xSeed).encode("utf-8"))
+    return int.from_bytes(xHash.digest()[:8], "little")
+
+
+# enddef
+
+
+######################################################################
+def CreateRandom(_xSeed=None):
+    """
+    Creates a random number generator that is independent of the global state of the random module.
+
+    Seeding the generator with _xSeed results in the same sequence of random numbers
+    as calling random.seed(_xSeed) on the global generator.
+
+    Parameters
+    ----------
+    _xSeed : object, optional
+        seed object, None for a non-deterministic seed
+
+    Returns
+    -------
+    random.Random
+        random number generator
+    """
+    return random.Random(_xSeed)
+
+
+# enddef
+
+
+######################################################################
+def SeedGlobalRandom(_xSeed):
+    """
+    Seeds the global generators of the random module and of numpy.random.
+
+    This is only needed for code that cannot be passed a generator instance,
+    e.g. the operators of the HumGen3D add-on.
+
+    Parameters
+    ----------
+    _xSeed : object
+        seed object
+    """
+    random.seed(_xSeed)
+    np.random.seed(SeedToInt(_xSeed) % (2**32))
+
+
+# enddef
+
+
+######################################################################
+def DeriveKey(_xSeed, _xHumanId, _sPath):
+    """
+    Derives a 64 bit key for the random stream of a single parameter of a single human.
+
+    The key only depends on the seed, the id of the human and the parameter path.
+    Adding, removing or reordering other parameters therefore does not change it.
+
+    Parameters
+    ----------
+    _xSeed : object
+        seed object
+    _xHumanId : object
+        id of the human, e.g. its name or index in a batch, or None
+    _sPath : str
+        parameter path, e.g. 'skin.tone'
+
+    Returns
+    -------
+    int
+        key
+    """
+    sKey = "{}\x1f{}\x1f{}".format(SeedToInt(_xSeed), "" if _xHumanId is None else _xHumanId, _sPath)
+    xHash = hashlib.blake2b(sKey.encode("utf-8"), digest_size=8)
+    return int.from_bytes(xHash.digest(), "little")
+
+
+# enddef
+
+
+######################################################################
+class KeyedRandom(random.Random):
+    """
+    Random number generator with a separate random stream for every parameter path.
+
+    Used as a random.Random it draws from its own sequential stream. Parameter
+    generators draw each field from Stream(rng, <path>) instead, so that the value
+    of a field is reproducible on its own, independent of all other fields.
+    """
+
+    def __init__(self, _xSeed, _xHumanId=None):
+        if _xSeed is None:
+            _xSeed = random.SystemRandom().getrandbits(64)
+        # endif
+        self.xSeed = _xSeed
+        self.xHumanId = _xHumanId
+        self.dicStreams = {}
+        super().__init__(DeriveKey(_xSeed, _xHumanId, ""))
+
+    # enddef
+
+    def Stream(self, _sPath):
+        xStream = self.dicStreams.get(_sPath)
+        if xStream is None:
+            xStream = random.Random(DeriveKey(self.xSeed, self.xHumanId, _sPath))
+            self.dicStreams[_sPath] = xStream
+        # endif
+        return xStream
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def Stream(_xRandom, _sPath):
+    """
+    Returns the random number generator to use for the parameter with path _sPath.
+
+    Parameters
+    ----------
+    _xRandom : random.Random or KeyedRandom or None
+        random number generator passed to a parameter generator
+    _sPath : str
+        parameter path, e.g. 'skin.tone'
+
+    Returns
+    -------
+    random.Random
+        the keyed stream of the parameter for a KeyedRandom, the global
+        random module for None and _xRandom itself otherwise
+    """
+    if _xRandom is None:
+        return random
+    elif isinstance(_xRandom, KeyedRandom):
+        return _xRandom.Stream(_sPath)
+    # endif
+    return _xRandom
+
+
+# enddef
+
+
+######################################################################
+def _SplitMix64(_aState):
+    aZ = _aState
+    aZ = (aZ ^ (aZ >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    aZ = (aZ ^ (aZ >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return aZ ^ (aZ >> np.uint64(31))
+
+
+# enddef
+
+
+######################################################################
+class KeyedUniformSource:
+    """
+    Counter based source of uniformly distributed random numbers in [0, 1)
+    used by the batch parameter generators.
+
+    Every call to Draw() returns one value per human of the batch. The value for
+    a human is computed by hashing (seed, parameter path, human id), so it neither
+    depends on the order in which the parameters are drawn nor on the other
+    humans in the batch.
+    """
+
+    def __init__(self, _iCount, _xSeed=None, _xHumanIds=None):
+        if _xSeed is None:
+            _xSeed = random.SystemRandom().getrandbits(64)
+        # endif
+
+        if _xHumanIds is None:
+            aHumanIds = np.arange(_iCount, dtype=np.uint64)
+        else:
+            if len(_xHumanIds) != _iCount:
+                raise ValueError(f"Expected {_iCount} human ids, got {len(_xHumanIds)}")
+            # endif
+            aHumanIds = np.array([SeedToInt(xId) & 0xFFFFFFFFFFFFFFFF for xId in _xHumanIds], dtype=np.uint64)
+        # endif
+
+        self.iCount = _iCount
+        self.xSeed = _xSeed
+        # state increments of the SplitMix64 generator
+        self.aCounter = (aHumanIds + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+
+    # enddef
+
+    def Draw(self, _sPath, _iDim=None):
+        """
+        Draws uniform random numbers for a parameter.
+
+        Parameters
+        ----------
+        _sPath : str
+            parameter path, e.g. 'skin.tone'
+        _iDim : int, optional
+            number of values per human, by default a single value
+
+        Returns
+        -------
+        numpy.ndarray
+            array of shape (iCount,) or (iCount, _iDim)
+        """
+        if _iDim is None:
+            return self._Draw(_sPath)
+        # endif
+        return np.stack([self._Draw(f"{_sPath}.{iIdx}") for iIdx in range(_iDim)], axis=1)
+
+    # enddef
+
+    def _Draw(self, _sPath):
+        aState = self.aCounter + np.uint64(DeriveKey(self.xSeed, None, _sPath))
+        return (_SplitMix64(aState) >> np.uint64(11)) * (1.0 / 2**53)
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+class LatinHypercubeSource(KeyedUniformSource):
+    """
+    Source of uniformly distributed random numbers in [0, 1) for Latin hypercube sampling.
+
+    For every parameter path, the values of the batch are stratified: each of the
+    iCount intervals [i / iCount, (i + 1) / iCount) contains exactly one value. The
+    intervals are assigned to the humans by an independent random permutation per path.
+    Hence, every single parameter covers its range evenly, while the parameters are
+    combined randomly. Since the generators map uniform values to their ranges by
+    inverse transform sampling, this also holds for the generated parameters.
+
+    In contrast to KeyedUniformSource, the values depend on the size of the batch.
+    """
+
+    def __init__(self, _iCount, _xSeed=None):
+        super().__init__(_iCount, _xSeed)
+
+    # enddef
+
+    def _Draw(self, _sPath):
+        # position within the interval
+        aJitter = super()._Draw(_sPath)
+        xGenerator = np.random.default_rng(DeriveKey(self.xSeed, None, "lhs\x1f" + _sPath))
+        aInterval = xGenerator.permutation(self.iCount)
+        return (aInterval + aJitter) / self.iCount
+
+    # enddef
+
+
+# endclass
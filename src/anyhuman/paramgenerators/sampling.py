@@ -0,0 +1,302 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Random draws used by the parameter generators and their vectorized counterparts.
+# The vectorized functions map arrays of uniform random numbers in [0, 1) to the
+# target distribution by inverse transform sampling.
+
+import random
+
+import numpy as np
+
+
+######################################################################
+def RandomUniformDiscrete(_fMin, _fMax, _iCount=101, _xRandom=None):
+    """Returns uniformly distributed random values over _iCount equally spaced discrete values in range [_fMin, _fMax]
+
+    Parameters
+    ----------
+    _fMin : float
+        minimal value
+    _fMax : float
+        maximal value
+    _iCount : int
+        number of discrete values
+    _xRandom : random.Random, optional
+        random number generator to draw from, by default the global generator of the random module
+
+    Returns
+    -------
+    float
+        a random value
+    """
+
+    if _iCount < 2:
+        raise RuntimeError("Count value has to be >= 2")
+    # endif
+
+    xRandom = random if _xRandom is None else _xRandom
+
+    fRand = xRandom.randint(0, _iCount - 1) / (_iCount - 1)
+    fRand = fRand * (_fMax - _fMin) + _fMin
+
+    return fRand
+
+
+# enddef
+
+
+######################################################################
+def UniformDiscrete(_aU, _fMin, _fMax, _iCount=101):
+    """
+    Vectorized version of tools.RandomUniformDiscrete.
+
+    Parameters
+    ----------
+    _aU : numpy.ndarray
+        uniform random numbers in [0, 1)
+    _fMin : float
+        minimal value
+    _fMax : float
+        maximal value
+    _iCount : int
+        number of discrete values
+
+    Returns
+    -------
+    numpy.ndarray
+        random values from _iCount equally spaced values in range [_fMin, _fMax]
+    """
+    if _iCount < 2:
+        raise RuntimeError("Count value has to be >= 2")
+    # endif
+
+    aIdx = Choice(_aU, _iCount)
+    return aIdx / (_iCount - 1) * (_fMax - _fMin) + _fMin
+
+
+# enddef
+
+
+######################################################################
+def RandInt(_aU, _iLow, _iHigh):
+    """
+    Vectorized version of random.randint, i.e. integers in [_iLow, _iHigh] including both end points.
+    """
+    return _iLow + Choice(_aU, _iHigh - _iLow + 1)
+
+
+# enddef
+
+
+######################################################################
+def Uniform(_aU, _fLow, _fHigh):
+    """
+    Vectorized version of random.uniform.
+    """
+    return _fLow + (_fHigh - _fLow) * _aU
+
+
+# enddef
+
+
+######################################################################
+def Triangular(_aU, _xLow, _xHigh, _xMode=None):
+    """
+    Vectorized version of random.triangular.
+
+    The bounds and the mode may be scalars or arrays matching the shape of _aU.
+    If _xMode is None, the mode is the mid point between the bounds.
+    """
+    aLow = np.asarray(_xLow, dtype=np.float64)
+    aHigh = np.asarray(_xHigh, dtype=np.float64)
+
+    if _xMode is None:
+        aC = np.full(np.shape(_aU), 0.5)
+    else:
+        aRange = aHigh - aLow
+        aC = np.divide(
+            np.asarray(_xMode, dtype=np.float64) - aLow,
+            aRange,
+            out=np.full(np.broadcast(_aU, aRange).shape, 0.5),
+            where=aRange != 0,
+        )
+    # endif
+
+    aSwap = _aU > aC
+    aU = np.where(aSwap, 1.0 - _aU, _aU)
+    aC = np.where(aSwap, 1.0 - aC, aC)
+    aFrom = np.where(aSwap, aHigh, aLow)
+    aTo = np.where(aSwap, aLow, aHigh)
+
+    return aFrom + (aTo - aFrom) * np.sqrt(aU * aC)
+
+
+# enddef
+
+
+######################################################################
+def Choice(_aU, _iCount):
+    """
+    Maps uniform random numbers to indices in [0, _iCount).
+    """
+    if _iCount < 1:
+        raise IndexError("Cannot choose from an empty sequence")
+    # endif
+
+    return np.minimum((_aU * _iCount).astype(np.int64), _iCount - 1)
+
+
+# enddef
+
+
+######################################################################
+def ChooseFrom(_aU, _lValues, _xAliasTable=None):
+    """
+    Vectorized version of random.choice.
+    If an alias table built from the weights of the values is given,
+    the values are chosen according to their weights.
+
+    Returns
+    -------
+    numpy.ndarray
+        object array with the chosen values
+    """
+    aValues = np.empty(len(_lValues), dtype=object)
+    aValues[:] = list(_lValues)
+    if _xAliasTable is not None:
+        return aValues[_xAliasTable.SampleArray(_aU)]
+    # endif
+    return aValues[Choice(_aU, len(aValues))]
+
+
+# enddef
+
+
+######################################################################
+def ChooseGrouped(_aU, _aKeys, _dicValues):
+    """
+    Vectorized random.choice where the list to choose from depends on a per-row key,
+    e.g. choosing a body from the list of the gender of each human.
+
+    Parameters
+    ----------
+    _aU : numpy.ndarray
+        uniform random numbers in [0, 1)
+    _aKeys : numpy.ndarray
+        key per row
+    _dicValues : dict
+        dict mapping each key to the list of values to choose from
+
+    Returns
+    -------
+    numpy.ndarray
+        object array with the chosen values
+    """
+    aResult = np.empty(len(_aU), dtype=object)
+    for xKey in np.unique(_aKeys):
+        aMask = _aKeys == xKey
+        aResult[aMask] = ChooseFrom(_aU[aMask], _dicValues[xKey])
+    # endfor
+
+    return aResult
+
+
+# enddef
+
+
+######################################################################
+class AliasTable:
+    """
+    Alias table for drawing from a discrete distribution in constant time per draw
+    (Vose's alias method). Draws return indices into the weights the table was built from.
+    """
+
+    def __init__(self, _lWeights):
+        aWeights = np.asarray(_lWeights, dtype=np.float64)
+        iCount = len(aWeights)
+        if iCount < 1:
+            raise IndexError("Cannot build an alias table from an empty sequence")
+        # endif
+        if not np.all(np.isfinite(aWeights)) or np.any(aWeights < 0.0):
+            raise ValueError("Weights have to be finite and non-negative")
+        # endif
+        fTotal = aWeights.sum()
+        if not fTotal > 0.0:
+            raise ValueError("The sum of the weights has to be positive")
+        # endif
+
+        aProb = aWeights * (iCount / fTotal)
+        aAlias = np.arange(iCount, dtype=np.int64)
+        lSmall = [iIdx for iIdx in range(iCount) if aProb[iIdx] < 1.0]
+        lLarge = [iIdx for iIdx in range(iCount) if aProb[iIdx] >= 1.0]
+        while lSmall and lLarge:
+            iSmall = lSmall.pop()
+            iLarge = lLarge[-1]
+            aAlias[iSmall] = iLarge
+            aProb[iLarge] -= 1.0 - aProb[iSmall]
+            if aProb[iLarge] < 1.0:
+                lSmall.append(lLarge.pop())
+            # endif
+        # endwhile
+        # entries left over due to rounding errors are taken with certainty
+        for iIdx in lSmall + lLarge:
+            aProb[iIdx] = 1.0
+        # endfor
+
+        self.iCount = iCount
+        self.aProb = aProb
+        self.aAlias = aAlias
+        self.lProb = aProb.tolist()
+        self.lAlias = aAlias.tolist()
+
+    # enddef
+
+    def Sample(self, _xRandom):
+        """
+        Draws a single index using one value of the random generator _xRandom.
+        """
+        fX = _xRandom.random() * self.iCount
+        iIdx = int(fX)
+        return iIdx if fX - iIdx < self.lProb[iIdx] else self.lAlias[iIdx]
+
+    # enddef
+
+    def SampleArray(self, _aU):
+        """
+        Vectorized version of Sample, maps uniform random numbers in [0, 1) to indices.
+        """
+        aX = _aU * self.iCount
+        aIdx = np.minimum(aX.astype(np.int64), self.iCount - 1)
+        return np.where(aX - aIdx < self.aProb[aIdx], aIdx, self.aAlias[aIdx])
+
+    # enddef
+
+
+# endclass
@@ -0,0 +1,584 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Streaming statistics of generated human parameters at constant memory, e.g. to monitor the
+# balance of a dataset while it is generated. Statistics of several processes can be merged:
+#   python -m anyhuman.paramgenerators.stats <statistics files> [--output <merged file>]
+
+import os
+import json
+import math
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from .diversity import DEFAULT_CONTINUOUS_FIELDS as DIVERSITY_CONTINUOUS_FIELDS
+from .diversity import _GetBatchValues, _GetValue
+
+# paths of the continuous parameters, components of lists are addressed by their index
+DEFAULT_CONTINUOUS_FIELDS = tuple(sPath for sPath, _, _ in DIVERSITY_CONTINUOUS_FIELDS) + (
+    "skin.wrinkles",
+    "skin.sagging",
+)
+
+# paths of the categorical parameters, whose values are counted
+DEFAULT_CATEGORICAL_FIELDS = ("gender", "body", "hair.hair_style", "beard.beard_style", "outfit.outfit_style")
+
+# binary exponent of the bin width of a histogram before its first widening
+MIN_BIN_EXPONENT = -20
+
+# quantiles listed by ParamsStatistics.Summary
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+######################################################################
+class StreamingHistogram:
+    """
+    Histogram of a stream of numbers with a fixed number of bins, and their exact
+    count, mean, variance, minimum and maximum.
+
+    All bins have the width 2^iExponent and start at multiples of it. If a value does not
+    fit into the bins, pairs of bins are merged, doubling the width, until the range of all
+    values fits. Since the bins of two histograms are aligned on the same grid, merging
+    them is exact and the result does not depend on the order of the values or merges.
+    Quantiles are interpolated within a bin, so their error is at most one bin width,
+    i.e. about 2/iBins of the range of the values.
+    """
+
+    def __init__(self, _iBins=256):
+        self.iBins = _iBins
+        self.iCount = 0
+        self.iMissing = 0
+        self.fMean = 0.0
+        self.fM2 = 0.0
+        self.fMin = math.inf
+        self.fMax = -math.inf
+        self.iExponent = MIN_BIN_EXPONENT
+        # index of the first bin on the grid of the bin width
+        self.iOffset = 0
+        self.aCounts = np.zeros(_iBins, dtype=np.int64)
+
+    # enddef
+
+    ##################################################################
+    def AddArray(self, _aValues):
+        """
+        Adds the values of an array. Values that are None or not finite are counted as missing.
+        """
+        aValues = np.asarray(_aValues)
+        if aValues.dtype == object:
+            aValues = np.array([math.nan if xValue is None else xValue for xValue in aValues.tolist()], dtype=float)
+        # endif
+        aValues = aValues.astype(np.float64, copy=False)
+        aFinite = np.isfinite(aValues)
+        self.iMissing += int(aValues.size - aFinite.sum())
+        aValues = aValues[aFinite]
+        if aValues.size == 0:
+            return
+        # endif
+
+        self._Fit(float(aValues.min()), float(aValues.max()))
+        aBins = np.floor(np.ldexp(aValues, -self.iExponent)).astype(np.int64) - self.iOffset
+        self.aCounts += np.bincount(aBins, minlength=self.iBins)
+        self._AddMoments(aValues.size, float(aValues.mean()), float(((aValues - aValues.mean()) ** 2).sum()))
+
+    # enddef
+
+    ##################################################################
+    def Merge(self, _xOther):
+        """
+        Adds the values of another histogram with the same number of bins.
+        """
+        if _xOther.iBins != self.iBins:
+            raise ValueError("Histograms with different numbers of bins cannot be merged")
+        # endif
+        self.iMissing += _xOther.iMissing
+        if _xOther.iCount == 0:
+            return
+        # endif
+        xOther = _xOther._Copy()
+        self._Fit(xOther.fMin, xOther.fMax)
+        xOther._Rebin(self.iExponent, self.iOffset)
+        self.aCounts += xOther.aCounts
+        self._AddMoments(xOther.iCount, xOther.fMean, xOther.fM2)
+
+    # enddef
+
+    ##################################################################
+    def Quantile(self, _fQuantile):
+        """
+        Returns the interpolated quantile _fQuantile in [0, 1], or NaN if no values were added.
+        """
+        if self.iCount == 0:
+            return math.nan
+        # endif
+        aCumulative = np.cumsum(self.aCounts)
+        fRank = _fQuantile * self.iCount
+        iBin = min(int(np.searchsorted(aCumulative, fRank, side="left")), self.iBins - 1)
+        iBefore = int(aCumulative[iBin - 1]) if iBin > 0 else 0
+        fFraction = (fRank - iBefore) / max(int(self.aCounts[iBin]), 1)
+        fValue = math.ldexp(self.iOffset + iBin + min(max(fFraction, 0.0), 1.0), self.iExponent)
+        return min(max(fValue, self.fMin), self.fMax)
+
+    # enddef
+
+    ##################################################################
+    def GetBins(self):
+        """
+        Returns the edges and counts of the bins between the minimum and maximum.
+
+        Returns
+        -------
+        tuple
+            array of iBins + 1 edges and array of iBins counts
+        """
+        if self.iCount == 0:
+            return np.zeros(0), np.zeros(0, dtype=np.int64)
+        # endif
+        aNonZero = np.flatnonzero(self.aCounts)
+        iFirst, iLast = int(aNonZero[0]), int(aNonZero[-1])
+        aEdges = np.ldexp(np.arange(self.iOffset + iFirst, self.iOffset + iLast + 2, dtype=np.float64), self.iExponent)
+        return aEdges, self.aCounts[iFirst : iLast + 1].copy()
+
+    # enddef
+
+    ##################################################################
+    def GetStd(self):
+        return math.sqrt(self.fM2 / self.iCount) if self.iCount > 0 else math.nan
+
+    # enddef
+
+    ##################################################################
+    def ToDict(self):
+        """
+        Returns a JSON serializable representation, which only stores the non empty range of bins.
+        """
+        aNonZero = np.flatnonzero(self.aCounts)
+        iFirst = int(aNonZero[0]) if aNonZero.size > 0 else 0
+        iLast = int(aNonZero[-1]) if aNonZero.size > 0 else -1
+        return {
+            "iBins": self.iBins,
+            "iCount": self.iCount,
+            "iMissing": self.iMissing,
+            "fMean": self.fMean,
+            "fM2": self.fM2,
+            "fMin": self.fMin if self.iCount > 0 else None,
+            "fMax": self.fMax if self.iCount > 0 else None,
+            "iExponent": self.iExponent,
+            "iOffset": self.iOffset + iFirst,
+            "lCounts": self.aCounts[iFirst : iLast + 1].tolist(),
+        }
+
+    # enddef
+
+    ##################################################################
+    @staticmethod
+    def FromDict(_dicHistogram):
+        xHistogram = StreamingHistogram(_dicHistogram["iBins"])
+        xHistogram.iCount = _dicHistogram["iCount"]
+        xHistogram.iMissing = _dicHistogram["iMissing"]
+        xHistogram.fMean = _dicHistogram["fMean"]
+        xHistogram.fM2 = _dicHistogram["fM2"]
+        if xHistogram.iCount > 0:
+            xHistogram.fMin = _dicHistogram["fMin"]
+            xHistogram.fMax = _dicHistogram["fMax"]
+        # endif
+        xHistogram.iExponent = _dicHistogram["iExponent"]
+        xHistogram.iOffset = _dicHistogram["iOffset"]
+        lCounts = _dicHistogram["lCounts"]
+        xHistogram.aCounts[: len(lCounts)] = lCounts
+        return xHistogram
+
+    # enddef
+
+    ##################################################################
+    def _AddMoments(self, _iCount, _fMean, _fM2):
+        # combines mean and sum of squared deviations of two sets of values (Chan et al.)
+        iCount = self.iCount + _iCount
+        fDelta = _fMean - self.fMean
+        self.fMean += fDelta * _iCount / iCount
+        self.fM2 += _fM2 + fDelta * fDelta * self.iCount * _iCount / iCount
+        self.iCount = iCount
+
+    # enddef
+
+    ##################################################################
+    def _Fit(self, _fMin, _fMax):
+        # widens and moves the bins, so that they cover all values and the range [_fMin, _fMax]
+        fMin = min(_fMin, self.fMin)
+        fMax = max(_fMax, self.fMax)
+        iExponent = self.iExponent
+        while math.floor(math.ldexp(fMax, -iExponent)) - math.floor(math.ldexp(fMin, -iExponent)) >= self.iBins:
+            iExponent += 1
+        # endwhile
+
+        iFirst = math.floor(math.ldexp(fMin, -iExponent))
+        iLast = math.floor(math.ldexp(fMax, -iExponent))
+        iOffset = self.iOffset >> (iExponent - self.iExponent)
+        if self.iCount == 0:
+            iOffset = iFirst
+        elif iFirst < iOffset:
+            iOffset = iFirst
+        elif iLast >= iOffset + self.iBins:
+            iOffset = iLast - self.iBins + 1
+        # endif
+
+        self._Rebin(iExponent, iOffset)
+        self.fMin = fMin
+        self.fMax = fMax
+
+    # enddef
+
+    ##################################################################
+    def _Rebin(self, _iExponent, _iOffset):
+        # moves the counts to bins of width 2^_iExponent starting at bin _iOffset, which have to cover all values
+        if _iExponent == self.iExponent and _iOffset == self.iOffset:
+            return
+        # endif
+        aNonZero = np.flatnonzero(self.aCounts)
+        aBins = ((aNonZero + self.iOffset) >> (_iExponent - self.iExponent)) - _iOffset
+        aCounts = np.zeros(self.iBins, dtype=np.int64)
+        np.add.at(aCounts, aBins, self.aCounts[aNonZero])
+        self.aCounts = aCounts
+        self.iExponent = _iExponent
+        self.iOffset = _iOffset
+
+    # enddef
+
+    ##################################################################
+    def _Copy(self):
+        return StreamingHistogram.FromDict(self.ToDict())
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+class ParamsStatistics:
+    """
+    Statistics of a stream of human parameter sets: a StreamingHistogram per continuous
+    parameter and the counts of the values of every categorical parameter.
+
+    The memory needed does not depend on the number of humans, and the statistics of
+    several workers can be merged, e.g. to monitor the balance of a dataset while it is generated.
+    """
+
+    def __init__(self, _lContinuousFields=None, _lCategoricalFields=None, _iBins=256):
+        """
+        Parameters
+        ----------
+        _lContinuousFields : list, optional
+            paths of the continuous parameters, by default DEFAULT_CONTINUOUS_FIELDS.
+            Components of lists are addressed by their index, e.g. 'eyes.iris_color.0'.
+        _lCategoricalFields : list, optional
+            paths of the categorical parameters, by default DEFAULT_CATEGORICAL_FIELDS
+        _iBins : int, optional
+            number of bins of the histograms
+        """
+        self.lContinuousFields = list(DEFAULT_CONTINUOUS_FIELDS if _lContinuousFields is None else _lContinuousFields)
+        self.lCategoricalFields = list(
+            DEFAULT_CATEGORICAL_FIELDS if _lCategoricalFields is None else _lCategoricalFields
+        )
+        self.iBins = _iBins
+        self.iCount = 0
+        self.dicHistograms = {sPath: StreamingHistogram(_iBins) for sPath in self.lContinuousFields}
+        # counts per value of the categorical parameters, None for missing values
+        self.dicCounts = {sPath: {} for sPath in self.lCategoricalFields}
+
+    # enddef
+
+    def __len__(self):
+        return self.iCount
+
+    # enddef
+
+    ##################################################################
+    def Add(self, _dicParams):
+        """
+        Adds the parameter set of a human.
+        """
+        self.AddMany([_dicParams])
+
+    # enddef
+
+    ##################################################################
+    def AddMany(self, _lParams):
+        """
+        Adds parameter sets in bulk, which is faster than adding them one by one.
+        """
+        lParams = list(_lParams)
+        for sPath, xHistogram in self.dicHistograms.items():
+            xHistogram.AddArray([_ToNumber(_GetValue(dicParams, sPath)) for dicParams in lParams])
+        # endfor
+        for sPath, dicCounts in self.dicCounts.items():
+            for dicParams in lParams:
+                xValue = _ToHashable(_GetValue(dicParams, sPath))
+                dicCounts[xValue] = dicCounts.get(xValue, 0) + 1
+            # endfor
+        # endfor
+        self.iCount += len(lParams)
+
+    # enddef
+
+    ##################################################################
+    def AddBatch(self, _xBatch):
+        """
+        Adds all humans of a batch.ParamsBatch column-wise.
+        """
+        for sPath, xHistogram in self.dicHistograms.items():
+            aValues = _GetBatchValues(_xBatch, sPath)
+            xHistogram.AddArray([_ToNumber(xValue) for xValue in aValues.tolist()])
+        # endfor
+        for sPath, dicCounts in self.dicCounts.items():
+            aValues = _GetBatchValues(_xBatch, sPath)
+            aUnique, aInverse = np.unique(np.array([repr(x) for x in aValues.tolist()]), return_inverse=True)
+            aFirst = np.zeros(len(aUnique), dtype=np.int64)
+            aFirst[aInverse[::-1]] = np.arange(len(aValues))[::-1]
+            for iFirst, iCount in zip(aFirst.tolist(), np.bincount(aInverse, minlength=len(aUnique)).tolist()):
+                xValue = _ToHashable(aValues[iFirst])
+                dicCounts[xValue] = dicCounts.get(xValue, 0) + iCount
+            # endfor
+        # endfor
+        self.iCount += len(_xBatch)
+
+    # enddef
+
+    ##################################################################
+    def Merge(self, _xOther):
+        """
+        Adds the statistics of another ParamsStatistics with the same fields.
+
+        Returns
+        -------
+        ParamsStatistics
+            self
+        """
+        if _xOther.lContinuousFields != self.lContinuousFields or _xOther.lCategoricalFields != self.lCategoricalFields:
+            raise ValueError("Statistics of different parameters cannot be merged")
+        # endif
+        for sPath, xHistogram in self.dicHistograms.items():
+            xHistogram.Merge(_xOther.dicHistograms[sPath])
+        # endfor
+        for sPath, dicCounts in self.dicCounts.items():
+            for xValue, iCount in _xOther.dicCounts[sPath].items():
+                dicCounts[xValue] = dicCounts.get(xValue, 0) + iCount
+            # endfor
+        # endfor
+        self.iCount += _xOther.iCount
+        return self
+
+    # enddef
+
+    ##################################################################
+    def Summary(self):
+        """
+        Returns count, mean, standard deviation, minimum, maximum and the quantiles SUMMARY_QUANTILES
+        per continuous parameter, and the relative frequencies of the values per categorical parameter.
+        """
+        dicContinuous = {}
+        for sPath, xHistogram in self.dicHistograms.items():
+            dicContinuous[sPath] = {
+                "count": xHistogram.iCount,
+                "missing": xHistogram.iMissing,
+                "mean": xHistogram.fMean if xHistogram.iCount > 0 else None,
+                "std": xHistogram.GetStd() if xHistogram.iCount > 0 else None,
+                "min": xHistogram.fMin if xHistogram.iCount > 0 else None,
+                "max": xHistogram.fMax if xHistogram.iCount > 0 else None,
+                "quantiles": {
+                    str(fQuantile): xHistogram.Quantile(fQuantile) if xHistogram.iCount > 0 else None
+                    for fQuantile in SUMMARY_QUANTILES
+                },
+            }
+        # endfor
+        dicCategorical = {
+            sPath: {
+                str(xValue): iCount / self.iCount
+                for xValue, iCount in sorted(dicCounts.items(), key=lambda tItem: (-tItem[1], str(tItem[0])))
+            }
+            for sPath, dicCounts in self.dicCounts.items()
+        }
+        return {"count": self.iCount, "continuous": dicContinuous, "categorical": dicCategorical}
+
+    # enddef
+
+    ##################################################################
+    def ToDict(self):
+        """
+        Returns a JSON serializable representation, see FromDict.
+        """
+        return {
+            "iCount": self.iCount,
+            "iBins": self.iBins,
+            "lContinuousFields": self.lContinuousFields,
+            "lCategoricalFields": self.lCategoricalFields,
+            "mHistograms": {sPath: xHistogram.ToDict() for sPath, xHistogram in self.dicHistograms.items()},
+            # values as [value, count] pairs, since values are not necessarily strings
+            "mCounts": {sPath: [[x, i] for x, i in dicCounts.items()] for sPath, dicCounts in self.dicCounts.items()},
+        }
+
+    # enddef
+
+    ##################################################################
+    @staticmethod
+    def FromDict(_dicStatistics):
+        xStatistics = ParamsStatistics(
+            _dicStatistics["lContinuousFields"], _dicStatistics["lCategoricalFields"], _dicStatistics["iBins"]
+        )
+        xStatistics.iCount = _dicStatistics["iCount"]
+        xStatistics.dicHistograms = {
+            sPath: StreamingHistogram.FromDict(dicHistogram)
+            for sPath, dicHistogram in _dicStatistics["mHistograms"].items()
+        }
+        xStatistics.dicCounts = {
+            sPath: {_ToHashable(xValue): iCount for xValue, iCount in lCounts}
+            for sPath, lCounts in _dicStatistics["mCounts"].items()
+        }
+        return xStatistics
+
+    # enddef
+
+    ##################################################################
+    def Save(self, _pathFile):
+        """
+        Writes the statistics to a JSON file. The file is replaced atomically,
+        so that it can be read while the statistics are updated.
+        """
+        pathFile = Path(_pathFile)
+        pathTemp = pathFile.with_name(f"{pathFile.name}.{os.getpid()}.tmp")
+        with open(pathTemp, "w") as xFile:
+            json.dump(self.ToDict(), xFile)
+        # endwith
+        os.replace(pathTemp, pathFile)
+
+    # enddef
+
+    ##################################################################
+    @staticmethod
+    def Load(_pathFile):
+        with open(_pathFile, "r") as xFile:
+            return ParamsStatistics.FromDict(json.load(xFile))
+        # endwith
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+def _ToNumber(_xValue):
+    # numbers as float, everything else as missing
+    if isinstance(_xValue, (int, float)) and not isinstance(_xValue, bool):
+        return float(_xValue)
+    # endif
+    return math.nan
+
+
+# enddef
+
+
+def _ToHashable(_xValue):
+    # lists as tuples, so that they can be counted
+    return tuple(_ToHashable(x) for x in _xValue) if isinstance(_xValue, (list, tuple)) else _xValue
+
+
+# enddef
+
+
+######################################################################
+# statistics of the humans generated in this process, by absolute path of their file or None for all humans
+_dicStatistics = {}
+
+
+def GetStatistics(_pathFile=None):
+    """
+    Returns the statistics of the humans generated in this process, see ops.GenerateHuman.
+
+    Parameters
+    ----------
+    _pathFile : str or Path, optional
+        file the statistics are written to. By default the statistics of all humans are returned,
+        otherwise the ones of the humans written to this file, so that the files of several jobs
+        of a process can be merged without counting a human twice.
+
+    Returns
+    -------
+    ParamsStatistics
+        statistics, to which further humans can be added
+    """
+    sKey = None if _pathFile is None else os.path.abspath(_pathFile)
+    xStatistics = _dicStatistics.get(sKey)
+    if xStatistics is None:
+        xStatistics = ParamsStatistics()
+        _dicStatistics[sKey] = xStatistics
+    # endif
+    return xStatistics
+
+
+# enddef
+
+
+######################################################################
+def MergeStatisticsFiles(_lFiles):
+    """
+    Merges the statistics stored in several files, e.g. of the workers of a dataset generation.
+    """
+    xStatistics = None
+    for pathFile in _lFiles:
+        xFileStatistics = ParamsStatistics.Load(pathFile)
+        xStatistics = xFileStatistics if xStatistics is None else xStatistics.Merge(xFileStatistics)
+    # endfor
+    return xStatistics
+
+
+# enddef
+
+
+def main(_lArgs=None):
+    xParser = argparse.ArgumentParser(description="Merge and summarize statistics of generated human parameters")
+    xParser.add_argument("files", nargs="+", help="statistics files")
+    xParser.add_argument("--output", default=None, help="file for the merged statistics")
+    xArgs = xParser.parse_args(_lArgs)
+
+    xStatistics = MergeStatisticsFiles(xArgs.files)
+    if xArgs.output is not None:
+        xStatistics.Save(xArgs.output)
+    # endif
+    print(json.dumps(xStatistics.Summary(), indent=4))
+
+
+# enddef
+
+
+if __name__ == "__main__":
+    main()
+# endif
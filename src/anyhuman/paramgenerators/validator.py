@@ -0,0 +1,503 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Validation of parameter sets before a human is created, so that malformed parameters
+# are rejected before any Blender work is done.
+
+import math
+
+import numpy as np
+
+from .catalog_index import GetCatalogKey
+
+# numeric parameters read by HumGenWrapper.CreateHuman
+BODY_NUMBER_PATHS = ("muscular", "overweight", "skinny", "height")
+SKIN_NUMBER_PATHS = tuple(
+    "skin." + sKey
+    for sKey in (
+        "tone",
+        "redness",
+        "saturation",
+        "normal_strength",
+        "roughness_multiplier",
+        "dark_areas",
+        "light_areas",
+        "freckles",
+        "splotches",
+        "beauty_spots_amount_",
+        "beauty_spots_amount",
+        "beauty_spots_opacity",
+        "sagging",
+        "wrinkles",
+    )
+)
+HAIR_NUMBER_PATHS = tuple(
+    "hair." + sKey for sKey in ("lightness", "redness", "roughness", "salt_and_pepper", "roots", "hue")
+) + ("eyes.hair_lightness", "eyes.hair_redness", "eyes.hair_roughness")
+
+
+######################################################################
+class ParamsValidator:
+    """
+    Validator of parameter sets for HumGenWrapper.CreateHuman, compiled once
+    against the asset catalog.
+
+    Every rule checks the value at a parameter path. Rules are only applied if
+    their condition holds, e.g. the hair color is only checked if a hair style is set.
+    """
+
+    def __init__(self, _xGeneratorParams):
+        self.xGeneratorParams = _xGeneratorParams
+        self.dicBodies = {sGender: frozenset(lBodies) for sGender, lBodies in _xGeneratorParams.dict_bodies.items()}
+        self.dicHair = {sGender: frozenset(dicHair) for sGender, dicHair in _xGeneratorParams.dict_hair.items()}
+        self.setBeards = frozenset(_xGeneratorParams.dict_male_face_hair)
+        self.dicOutfits = {
+            sGender: frozenset(f"{sSet}/{sOutfit}" for sSet, lOutfits in dicSets.items() for sOutfit in lOutfits)
+            for sGender, dicSets in _xGeneratorParams.dict_outfits.items()
+        }
+        # files that failed the asset health check, the other assets of the catalog only contain working ones
+        self.dicBroken = {
+            sFile: dicRecord.get("sError") or "failed to load"
+            for sFile, dicRecord in getattr(_xGeneratorParams, "dict_asset_health", {}).items()
+            if not dicRecord["bOk"]
+        }
+
+        # (path, check function, condition function or None, optional)
+        # check functions take the value and the gender and return an error message or None
+        self.lRules = [("gender", self._CheckGender, None, False), ("body", self._CheckBody, None, False)]
+        self.lRules += [(sPath, _CheckNumber, None, False) for sPath in BODY_NUMBER_PATHS]
+        self.lRules.append(("face", _CheckFace, None, False))
+        self.lRules += [(sPath, _CheckNumber, None, False) for sPath in SKIN_NUMBER_PATHS]
+        self.lRules.append(("eyes.iris_color", _CheckColor, None, False))
+        self.lRules.append(("eyes.eyebrows_style", _CheckEyebrows, None, True))
+        self.lRules.append(("hair.hair_style", self._CheckHairStyle, None, False))
+        self.lRules += [(sPath, _CheckNumber, _HasHairStyle, False) for sPath in HAIR_NUMBER_PATHS]
+        self.lRules.append(("beard.beard_style", self._CheckBeardStyle, _IsMale, True))
+        self.lRules.append(("outfit.outfit_style", self._CheckOutfitStyle, None, True))
+        self.lRules.append(("footwear.footwear_style", self._CheckFootwear, None, True))
+        self.lRules.append(("posefilename", self._CheckPose, None, True))
+        self.lRules.append(("expression", _CheckExpression, None, True))
+
+        self.lCompiledRules = [
+            (sPath, sPath.split("."), funcCheck, funcCondition, bOptional)
+            for sPath, funcCheck, funcCondition, bOptional in self.lRules
+        ]
+
+    # enddef
+
+    ##################################################################
+    def Validate(self, _dicParams):
+        """
+        Checks a parameter set.
+
+        Parameters
+        ----------
+        _dicParams : dict
+            parameters for human generation
+
+        Returns
+        -------
+        list
+            error messages, empty if the parameter set is valid
+        """
+        lErrors = []
+        sGender = _dicParams.get("gender")
+        dicConditions = {}
+        for sPath, lKeys, funcCheck, funcCondition, bOptional in self.lCompiledRules:
+            if funcCondition is not None:
+                bCondition = dicConditions.get(funcCondition)
+                if bCondition is None:
+                    bCondition = dicConditions[funcCondition] = funcCondition(_dicParams, sGender)
+                # endif
+                if not bCondition:
+                    continue
+                # endif
+            # endif
+
+            xValue = _dicParams
+            try:
+                for sKey in lKeys:
+                    xValue = xValue[sKey]
+                # endfor
+            except (KeyError, TypeError, IndexError):
+                if not bOptional:
+                    lErrors.append(f"'{sPath}' is missing")
+                # endif
+                continue
+            # endtry
+
+            # fast path for the most common rule
+            if funcCheck is _CheckNumber and type(xValue) in (float, int) and math.isfinite(xValue):
+                continue
+            # endif
+            sError = funcCheck(xValue, sGender)
+            if sError is not None:
+                lErrors.append(f"'{sPath}': {sError}")
+            # endif
+        # endfor
+        return lErrors
+
+    # enddef
+
+    ##################################################################
+    def Check(self, _dicParams):
+        """
+        Raises a ValueError listing all errors, if a parameter set is invalid.
+        """
+        lErrors = self.Validate(_dicParams)
+        if len(lErrors) > 0:
+            raise ValueError("Invalid human parameters:\n- " + "\n- ".join(lErrors))
+        # endif
+
+    # enddef
+
+    ##################################################################
+    def ValidateMany(self, _lParams):
+        """
+        Checks parameter sets in bulk.
+
+        Returns
+        -------
+        dict
+            error messages per index of the invalid parameter sets
+        """
+        dicErrors = {}
+        for iIdx, dicParams in enumerate(_lParams):
+            lErrors = self.Validate(dicParams)
+            if len(lErrors) > 0:
+                dicErrors[iIdx] = lErrors
+            # endif
+        # endfor
+        return dicErrors
+
+    # enddef
+
+    ##################################################################
+    def ValidateBatch(self, _xBatch):
+        """
+        Checks all humans of a batch.ParamsBatch column-wise. Every distinct value of
+        a column is checked only once, and numeric columns are checked vectorized.
+
+        Returns
+        -------
+        dict
+            error messages per index of the invalid humans
+        """
+        iCount = len(_xBatch)
+        aGender = _GetBatchValues(_xBatch, "gender")
+        dicErrors = {}
+
+        for sPath, lKeys, funcCheck, funcCondition, bOptional in self.lCompiledRules:
+            aValues = _GetBatchValues(_xBatch, sPath)
+
+            if funcCondition is None:
+                aActive = np.ones(iCount, dtype=bool)
+            elif funcCondition is _IsMale:
+                aActive = aGender == "male"
+            else:
+                aActive = _GetBatchValues(_xBatch, "hair.hair_style") != None  # noqa: E711
+            # endif
+
+            if funcCheck is _CheckNumber and aValues.dtype != object:
+                aInvalid = aActive & ~np.isfinite(aValues)
+                lMessages = [f"'{sPath}': not a finite number"] * int(aInvalid.sum())
+            else:
+                # check every distinct combination of value and gender once
+                dicResults = {}
+                aInvalid = np.zeros(iCount, dtype=bool)
+                lMessages = []
+                for iIdx in np.flatnonzero(aActive).tolist():
+                    xValue = aValues[iIdx]
+                    tKey = (_HashKey(xValue), aGender[iIdx])
+                    if tKey not in dicResults:
+                        if xValue is _MISSING:
+                            dicResults[tKey] = None if bOptional else f"'{sPath}' is missing"
+                        else:
+                            sError = funcCheck(xValue, aGender[iIdx])
+                            dicResults[tKey] = None if sError is None else f"'{sPath}': {sError}"
+                        # endif
+                    # endif
+                    if dicResults[tKey] is not None:
+                        aInvalid[iIdx] = True
+                        lMessages.append(dicResults[tKey])
+                    # endif
+                # endfor
+            # endif
+
+            for iIdx, sMessage in zip(np.flatnonzero(aInvalid).tolist(), lMessages):
+                dicErrors.setdefault(iIdx, []).append(sMessage)
+            # endfor
+        # endfor
+
+        return dict(sorted(dicErrors.items()))
+
+    # enddef
+
+    ##################################################################
+    def _CheckGender(self, _xValue, _sGender):
+        if _xValue not in self.dicBodies:
+            return f"unknown gender {_xValue!r}"
+        # endif
+        return None
+
+    # enddef
+
+    def _CheckBody(self, _xValue, _sGender):
+        if _sGender in self.dicBodies and _xValue not in self.dicBodies[_sGender]:
+            return f"body {_xValue!r} not available for gender {_sGender!r}"
+        # endif
+        return None
+
+    # enddef
+
+    def _CheckHairStyle(self, _xValue, _sGender):
+        if _xValue is None:
+            return None
+        # endif
+        if _xValue == "random":
+            return "'random' has to be resolved before"
+        # endif
+        if _sGender in self.dicHair and _xValue not in self.dicHair[_sGender]:
+            return f"hair style {_xValue!r} not available for gender {_sGender!r}"
+        # endif
+        return None
+
+    # enddef
+
+    def _CheckBeardStyle(self, _xValue, _sGender):
+        if _xValue is not None and _xValue not in self.setBeards:
+            return f"beard style {_xValue!r} not available"
+        # endif
+        return None
+
+    # enddef
+
+    def _CheckFootwear(self, _xValue, _sGender):
+        sError = _CheckFootwear(_xValue, _sGender)
+        if sError is None and _xValue != "random":
+            sError = self._CheckBroken("footwear", _xValue)
+        # endif
+        return sError
+
+    # enddef
+
+    def _CheckPose(self, _xValue, _sGender):
+        if _xValue is None or _xValue == "random":
+            return None
+        # endif
+        if not isinstance(_xValue, str):
+            return f"pose file {_xValue!r} is not a string"
+        # endif
+        return self._CheckBroken("pose", _xValue)
+
+    # enddef
+
+    def _CheckBroken(self, _sKind, _sFile):
+        sError = self.dicBroken.get(_sFile.replace("\\", "/"))
+        if sError is not None:
+            return f"{_sKind} {_sFile!r} failed the asset health check: {sError}"
+        # endif
+        return None
+
+    # enddef
+
+    def _CheckOutfitStyle(self, _xValue, _sGender):
+        if _xValue == "random":
+            return "'random' has to be resolved before"
+        # endif
+        if not isinstance(_xValue, str):
+            return f"outfit style {_xValue!r} is not a string"
+        # endif
+        if _sGender in self.dicOutfits and _xValue not in self.dicOutfits[_sGender]:
+            return f"outfit {_xValue!r} not available for gender {_sGender!r}"
+        # endif
+        return None
+
+    # enddef
+
+
+# endclass
+
+
+######################################################################
+# marker for values not present in a parameter set
+_MISSING = object()
+
+
+def _GetPath(_dicParams, _lKeys):
+    xValue = _dicParams
+    for sKey in _lKeys:
+        if not isinstance(xValue, dict) or sKey not in xValue:
+            return _MISSING
+        # endif
+        xValue = xValue[sKey]
+    # endfor
+    return xValue
+
+
+# enddef
+
+
+def _GetBatchValues(_xBatch, _sPath):
+    # values of a path for all humans of a batch
+    if _sPath in _xBatch.dicColumns:
+        aColumn = np.asarray(_xBatch.dicColumns[_sPath])
+        if aColumn.ndim == 1:
+            return aColumn
+        # endif
+        # vector values, like colors, as lists
+        aValues = np.empty(len(_xBatch), dtype=object)
+        aValues[:] = [list(xRow) for xRow in aColumn.tolist()]
+        return aValues
+    # endif
+    aValues = np.empty(len(_xBatch), dtype=object)
+    aValues.fill(_GetPath(_xBatch.dicTemplate, _sPath.split(".")))
+    return aValues
+
+
+# enddef
+
+
+def _HashKey(_xValue):
+    return repr(_xValue) if isinstance(_xValue, (list, dict)) else (type(_xValue), _xValue)
+
+
+# enddef
+
+
+######################################################################
+def _IsNumber(_xValue):
+    return isinstance(_xValue, (int, float, np.number)) and not isinstance(_xValue, (bool, np.bool_))
+
+
+# enddef
+
+
+def _CheckNumber(_xValue, _sGender):
+    if not _IsNumber(_xValue) or not math.isfinite(_xValue):
+        return f"{_xValue!r} is not a finite number"
+    # endif
+    return None
+
+
+# enddef
+
+
+def _CheckColor(_xValue, _sGender):
+    if not isinstance(_xValue, (list, tuple)) or len(_xValue) != 4 or not all(_IsNumber(x) for x in _xValue):
+        return f"{_xValue!r} is not a list of 4 numbers"
+    # endif
+    return None
+
+
+# enddef
+
+
+def _CheckEyebrows(_xValue, _sGender):
+    if _xValue == "random":
+        return "'random' has to be resolved before"
+    # endif
+    try:
+        int(_xValue)
+    except (TypeError, ValueError):
+        return f"{_xValue!r} is not an eyebrow index"
+    # endtry
+    return None
+
+
+# enddef
+
+
+def _CheckFace(_xValue, _sGender):
+    if _xValue != "random" and not (isinstance(_xValue, str) and "variation" in _xValue):
+        return f"{_xValue!r} is neither 'random' nor a face variation"
+    # endif
+    return None
+
+
+# enddef
+
+
+def _CheckFootwear(_xValue, _sGender):
+    if _xValue != "random" and not (isinstance(_xValue, str) and "/footwear" in _xValue):
+        return f"{_xValue!r} is neither 'random' nor a footwear file"
+    # endif
+    return None
+
+
+# enddef
+
+
+def _CheckExpression(_xValue, _sGender):
+    if _xValue != "random" and not (isinstance(_xValue, str) and "/expressions" in _xValue):
+        return f"{_xValue!r} is neither 'random' nor an expression file"
+    # endif
+    return None
+
+
+# enddef
+
+
+def _HasHairStyle(_dicParams, _sGender):
+    dicHair = _dicParams.get("hair")
+    return isinstance(dicHair, dict) and dicHair.get("hair_style") is not None
+
+
+# enddef
+
+
+def _IsMale(_dicParams, _sGender):
+    return _sGender == "male"
+
+
+# enddef
+
+
+######################################################################
+_dicValidators = {}
+
+
+def GetParamsValidator(_xGeneratorParams):
+    """
+    Returns the validator compiled against the catalog of the generator params.
+    Validators are cached, so every catalog is only compiled once.
+    """
+    tKey = GetCatalogKey(_xGeneratorParams)
+    xValidator = _dicValidators.get(tKey)
+    if xValidator is None or xValidator.xGeneratorParams is not _xGeneratorParams:
+        if len(_dicValidators) >= 16:
+            _dicValidators.clear()
+        # endif
+        xValidator = ParamsValidator(_xGeneratorParams)
+        _dicValidators[tKey] = xValidator
+    # endif
+    return xValidator
+
+
+# enddef
@@ -27,128 +27,295 @@
 # -----
 ###
 
+import itertools
+import json
+import math
 import random
-from ..tools import RandomUniformDiscrete
+from types import MappingProxyType
+
+import numpy as np
+
+from . import batch
+from .catalog_index import HAIR_GROUPS, GetCatalogIndex, GetCatalogKey
+from .rng import KeyedUniformSource, Stream
+from .sampling import (
+    AliasTable,
+    ChooseFrom,
+    ChooseGrouped,
+    RandInt,
+    RandomUniformDiscrete,
+    Triangular,
+    Uniform,
+    UniformDiscrete,
+)
 
 ######################################################################
-def ZwickyParams(zwicky_params, generator_params):
-    """ """
-
-    def _get_param(key, defaults):
-        if key in zwicky_params:
-            if isinstance(zwicky_params[key], list):
-                # if the parameter is given by a list, choose a value from the list
-                return random.choice(zwicky_params[key])
-            else:
-                return zwicky_params[key]
+# Sampling tables of the Zwicky box
+
+# dimensions of the Zwicky box in the order they are drawn, with their default values
+ZWICKY_DIMENSIONS = (
+    ("gender", ("male", "female")),
+    ("type", ("asian", "black", "caucasian")),
+    ("age", ("young", "adult", "senior")),
+    ("bodytype", ("thin", "athletic", "average", "corpulent", "obese")),
+    ("bodyheight", ("short", "average", "tall")),
+    ("skin_tone", ("dark", "average", "bright")),
+    ("hair_length", ("bald", "short", "average", "long")),
+    ("hair_color", ("black", "dark", "average", "light")),
+    ("eye_color", ("blue", "green", "brown")),
+    ("clothing", ("casual", "business")),
+    ("clothing_color", ("bright, dark",)),
+)
+
+# triangular ranges of (muscular, overweight, skinny) per body type
+BODYTYPE_RANGES = MappingProxyType(
+    {
+        "thin": ((0.2, 0.4), (0.0, 0.5), (0.2, 0.5)),
+        "athletic": ((0.3, 0.7), (0.0, 0.2), (0.3, 0.5)),
+        "average": ((0.0, 0.5), (0.2, 0.6), (0.1, 0.2)),
+        "corpulent": ((0.1, 0.5), (0.3, 0.7), (0.0, 0.1)),
+        "obese": ((0.1, 0.4), (0.5, 0.9), (0.0, 0.05)),
+    }
+)
+
+# triangular range of the height in cm per gender and body height
+HEIGHT_RANGES = MappingProxyType(
+    {
+        "male": MappingProxyType(
+            {"short": (160.0, 175.0), "average": (170.0, 185.0), "tall": (180.0, 195.0)}
+        ),
+        "female": MappingProxyType(
+            {"short": (150.0, 165.0), "average": (160.0, 175.0), "tall": (170.0, 185.0)}
+        ),
+    }
+)
+
+# age dependent skin parameters:
+# maximal beauty spots opacity, maximal beauty spots amount,
+# triangular range of sagging, triangular range of wrinkles
+SKIN_AGE_PARAMS = MappingProxyType(
+    {
+        "young": (0.5, 0.4, (0.0, 0.1), (0.0, 0.5)),
+        "adult": (0.5, 0.8, (0.1, 0.8), (0.4, 2.1)),
+        "senior": (1.0, 1.8, (0.6, 1.0), (2.5, 10.0)),
+    }
+)
+
+# uniform ranges of the (red, green, blue) iris color per eye color
+IRIS_COLOR_RANGES = MappingProxyType(
+    {
+        "brown": ((0.26, 0.35), (0.10, 0.20), (0.00, 0.10)),
+        "blue": ((0.05, 0.10), (0.15, 0.20), (0.30, 0.40)),
+        "green": ((0.10, 0.20), (0.35, 0.45), (0.00, 0.10)),
+    }
+)
+
+# uniform range of the hair lightness per hair color, other colors use a lightness of 0.5
+HAIR_LIGHTNESS_RANGES = MappingProxyType(
+    {
+        "black": (0.0, 0.2),
+        "dark": (0.2, 0.4),
+        "average": (0.35, 0.7),
+        "light": (0.7, 1.0),
+    }
+)
+
+# uniform range of the salt and pepper value per age, other ages use 0.0
+HAIR_SALT_AND_PEPPER_RANGES = MappingProxyType(
+    {
+        "adult": (0.0, 0.80),
+        "senior": (0.5, 1.00),
+    }
+)
+
+# outfit sets per clothing style
+CLOTHING_SETS = MappingProxyType(
+    {
+        "casual": ("Casual", "Summer", "Winter"),
+        "business": ("Office",),
+    }
+)
+
+# outfit palette per clothing color, other colors use 'RANDOM_FULL'
+CLOTHING_PALETTES = MappingProxyType(
+    {
+        "dark": "DARK",
+        "bright": "BRIGHT",
+    }
+)
 
-        return random.choice(defaults)
 
-    ##################################################################
-    def _get_type_param(bodytype, gender):
-        bodytypes = [
-            bodyfile
-            for bodyfile in generator_params.dict_bodies[gender]
-            if bodytype.capitalize() in bodyfile
-        ]
-        return random.choice(bodytypes)
+######################################################################
+class ZwickySampler:
+    """
+    Sampler for a Zwicky box specification, compiled once from the specification
+    and the HumGen content catalog.
+
+    The specification dict can fix a dimension of the Zwicky box to a value,
+    give a list of values to choose from uniformly, or give a dict of values and
+    their relative weights, e.g. {"casual": 0.6, "business": 0.4}. All dimensions
+    not given are chosen from their default values (see ZWICKY_DIMENSIONS).
+    """
+
+    def __init__(self, zwicky_params, generator_params):
+        self.generator_params = generator_params
+
+        # (key, fixed value or None, tuple of values to choose from or None) per dimension
+        dimensions = []
+        allowed = {}
+        # alias tables and weights of the dimensions with weighted values
+        self.alias_tables = {}
+        self.weights = {}
+        for key, defaults in ZWICKY_DIMENSIONS:
+            if key in zwicky_params and isinstance(zwicky_params[key], dict):
+                choices = tuple(zwicky_params[key].keys())
+                self.weights[key] = tuple(float(weight) for weight in zwicky_params[key].values())
+                self.alias_tables[key] = AliasTable(self.weights[key])
+                dimensions.append((key, None, choices))
+                allowed[key] = choices
+            elif key in zwicky_params and not isinstance(zwicky_params[key], list):
+                dimensions.append((key, zwicky_params[key], None))
+                allowed[key] = (zwicky_params[key],)
+            else:
+                choices = tuple(zwicky_params[key]) if key in zwicky_params else defaults
+                dimensions.append((key, None, choices))
+                allowed[key] = choices
+            # endif
+        # endfor
+        self.dimensions = tuple(dimensions)
+
+        _check_values(allowed["bodytype"], BODYTYPE_RANGES, "bodytype")
+        _check_values(allowed["bodyheight"], HEIGHT_RANGES["male"], "bodyheight value")
+        _check_values(allowed["age"], SKIN_AGE_PARAMS, "age value")
+        _check_values(allowed["eye_color"], IRIS_COLOR_RANGES, "eye color value")
+        _check_values(allowed["clothing"], CLOTHING_SETS, "clothing style")
+
+        index = GetCatalogIndex(generator_params)
+
+        # body files per gender and type
+        self.bodies = {}
+        for gender in allowed["gender"]:
+            for skin_type in allowed["type"]:
+                self.bodies[(gender, skin_type)] = index.GetBodies(gender, skin_type)
+            # endfor
+        # endfor
+
+        # hair styles of the catalog per gender and hair length, empty if the catalog contains none of them
+        self.hair_styles = {}
+        for gender in allowed["gender"]:
+            for hair_length in HAIR_GROUPS.get(gender, {}):
+                self.hair_styles[(gender, hair_length)] = index.GetHairStyles(gender, hair_length)
+            # endfor
+        # endfor
+
+        # outfits per gender and outfit set
+        self.outfits = {}
+        for gender in allowed["gender"]:
+            for clothing in allowed["clothing"]:
+                for outfit_set in CLOTHING_SETS[clothing]:
+                    self.outfits[(gender, outfit_set)] = index.GetOutfits(gender, outfit_set)
+                # endfor
+            # endfor
+        # endfor
 
     # enddef
 
     ##################################################################
-    def _get_body_type_params(bodytype, gender):
-        if bodytype == "thin":
-            muscular = random.triangular(0.2, 0.4)
-            overweight = random.triangular(0.0, 0.5)
-            skinny = random.triangular(0.2, 0.5)
-        elif bodytype == "athletic":
-            muscular = random.triangular(0.3, 0.7)
-            overweight = random.triangular(0.0, 0.2)
-            skinny = random.triangular(0.3, 0.5)
-        elif bodytype == "average":
-            muscular = random.triangular(0.0, 0.5)
-            overweight = random.triangular(0.2, 0.6)
-            skinny = random.triangular(0.1, 0.2)
-        elif bodytype == "corpulent":
-            muscular = random.triangular(0.1, 0.5)
-            overweight = random.triangular(0.3, 0.7)
-            skinny = random.triangular(0.0, 0.1)
-        elif bodytype == "obese":
-            muscular = random.triangular(0.1, 0.4)
-            overweight = random.triangular(0.5, 0.9)
-            skinny = random.triangular(0.0, 0.05)
-        else:
-            raise KeyError("Please provide an available bodytype not", bodytype)
-
-        return muscular, overweight, skinny
+    def _get_hair_styles(self, gender, hair_length):
+        # hair styles to draw from, an error if the catalog contains none, e.g. since they are broken
+        styles = self.hair_styles[(gender, hair_length)]
+        if len(styles) == 0:
+            raise ValueError(
+                f"The catalog contains no {hair_length} hair styles for the gender '{gender}',"
+                f" please remove the hair length '{hair_length}' from the Zwicky specification"
+            )
+        # endif
+        return styles
 
     # enddef
 
     ##################################################################
-    def _get_height_param(height, gender):
-        if gender == "male":
-            if height == "short":
-                return random.triangular(160.0, 175.0)
-            elif height == "average":
-                return random.triangular(170.0, 185.0)
-            elif height == "tall":
-                return random.triangular(180.0, 195.0)
-        else:
-            if height == "short":
-                return random.triangular(150.0, 165.0)
-            elif height == "average":
-                return random.triangular(160.0, 175.0)
-            elif height == "tall":
-                return random.triangular(170.0, 185.0)
-        # endif
-        raise KeyError("Please provide an availabe bodyheight value, not", height)
+    def Sample(self, rng=None):
+        """
+        Draws the parameters of a single human.
 
-    # enddef
+        Parameters
+        ----------
+        rng : random.Random, optional
+            random number generator, by default the global generator of the random module
 
-    ##################################################################
-    def _get_skin_params(skin_tone, skin_type, gender, age):
-        params = {
-            "tone": RandomUniformDiscrete(0.100, 2.000),
-            "redness": RandomUniformDiscrete(-0.200, 0.800),
-            "saturation": RandomUniformDiscrete(0.000, 1.500),
-            "normal_strength": random.randint(1, 4),
-            "roughness_multiplier": RandomUniformDiscrete(1.500, 2.000),
-            "dark_areas": RandomUniformDiscrete(0.000, 2.000),
-            "light_areas": RandomUniformDiscrete(0.000, 2.000),
-            "freckles": RandomUniformDiscrete(0.000, 0.500),
-            "splotches": RandomUniformDiscrete(0.000, 0.500),
-            "beauty_spots_amount_": random.randint(0, 100),  # TODO clarify what this is
-            "beauty_spots_opacity": RandomUniformDiscrete(0.000, 0.500),
-            "beauty_spots_amount": RandomUniformDiscrete(0.000, 1.000),
-            "sagging": round(random.triangular(0.0, 0.1), 2),
-            "wrinkles": round(random.triangular(0.0, 0.1), 2),
-        }
+        Returns
+        -------
+        dict
+            Dictionary of parameters for human generator
+        """
 
-        if age == "young":
-            params["beauty_spots_opacity"] = RandomUniformDiscrete(0.000, 0.500)
-            params["beauty_spots_amount"] = RandomUniformDiscrete(0.000, 0.400)
-            params["sagging"] = round(random.triangular(0.0, 0.1), 2)
-            params["wrinkles"] = round(random.triangular(0.0, 0.5), 2)
-        elif age == "adult":
-            params["beauty_spots_opacity"] = RandomUniformDiscrete(0.000, 0.500)
-            params["beauty_spots_amount"] = RandomUniformDiscrete(0.000, 0.800)
-            params["sagging"] = round(random.triangular(0.1, 0.8), 2)
-            params["wrinkles"] = round(random.triangular(0.4, 2.1), 2)
-        elif age == "senior":
-            params["beauty_spots_opacity"] = RandomUniformDiscrete(0.000, 1.000)
-            params["beauty_spots_amount"] = RandomUniformDiscrete(0.000, 1.800)
-            params["sagging"] = round(random.triangular(0.6, 1.0), 2)
-            params["wrinkles"] = round(random.triangular(2.5, 10.0), 2)
-        else:
-            raise KeyError("Please provide an available age value, not", age)
-        return params
+        def _rng(path):
+            return Stream(rng, path)
 
-    # enddef
+        # enddef
 
-    ##################################################################
-    def _get_eyes_params(eye_color, gender):
-        params = {
-            "iris_color": [random.random(), random.random(), random.random(), 1.00],
+        def _ud(path, min, max):
+            return RandomUniformDiscrete(min, max, _xRandom=_rng(path))
+
+        # enddef
+
+        cat = {}
+        for key, value, choices in self.dimensions:
+            if choices is None:
+                cat[key] = value
+            elif key in self.alias_tables:
+                cat[key] = choices[self.alias_tables[key].Sample(_rng(key))]
+            else:
+                cat[key] = _rng(key).choice(choices)
+            # endif
+        # endfor
+
+        gender = cat["gender"]
+        age = cat["age"]
+
+        params = {}
+        params["gender"] = gender
+        params["body"] = _rng("body").choice(self.bodies[(gender, cat["type"])])
+
+        muscular, overweight, skinny = BODYTYPE_RANGES[cat["bodytype"]]
+        params["muscular"] = _rng("muscular").triangular(*muscular)
+        params["overweight"] = _rng("overweight").triangular(*overweight)
+        params["skinny"] = _rng("skinny").triangular(*skinny)
+
+        height_ranges = HEIGHT_RANGES["male" if gender == "male" else "female"]
+        params["height"] = _rng("height").triangular(*height_ranges[cat["bodyheight"]])
+        params["face"] = "random"
+
+        # The age independent values of the last four skin parameters are drawn
+        # and then replaced, so that the values of a seed stay the same as in former versions.
+        skin = {
+            "tone": _ud("skin.tone", 0.100, 2.000),
+            "redness": _ud("skin.redness", -0.200, 0.800),
+            "saturation": _ud("skin.saturation", 0.000, 1.500),
+            "normal_strength": _rng("skin.normal_strength").randint(1, 4),
+            "roughness_multiplier": _ud("skin.roughness_multiplier", 1.500, 2.000),
+            "dark_areas": _ud("skin.dark_areas", 0.000, 2.000),
+            "light_areas": _ud("skin.light_areas", 0.000, 2.000),
+            "freckles": _ud("skin.freckles", 0.000, 0.500),
+            "splotches": _ud("skin.splotches", 0.000, 0.500),
+            "beauty_spots_amount_": _rng("skin.beauty_spots_amount_").randint(0, 100),  # TODO clarify what this is
+            "beauty_spots_opacity": _ud("skin.beauty_spots_opacity", 0.000, 0.500),
+            "beauty_spots_amount": _ud("skin.beauty_spots_amount", 0.000, 1.000),
+            "sagging": round(_rng("skin.sagging").triangular(0.0, 0.1), 2),
+            "wrinkles": round(_rng("skin.wrinkles").triangular(0.0, 0.1), 2),
+        }
+        opacity_max, amount_max, sagging, wrinkles = SKIN_AGE_PARAMS[age]
+        skin["beauty_spots_opacity"] = _ud("skin.beauty_spots_opacity", 0.000, opacity_max)
+        skin["beauty_spots_amount"] = _ud("skin.beauty_spots_amount", 0.000, amount_max)
+        skin["sagging"] = round(_rng("skin.sagging").triangular(*sagging), 2)
+        skin["wrinkles"] = round(_rng("skin.wrinkles").triangular(*wrinkles), 2)
+        params["skin"] = skin
+
+        # as above, the eye color independent iris color is drawn and replaced
+        iris_rng = _rng("eyes.iris_color")
+        params["eyes"] = {
+            "iris_color": [iris_rng.random(), iris_rng.random(), iris_rng.random(), 1.00],
             "eyebrows_style": "random",
             "eyebrows_length": None,  # TODO implement
             "eyelashes_lenght": None,  # TODO implement
@@ -156,222 +323,484 @@ def ZwickyParams(zwicky_params, generator_params):
             "hair_redness": 0.9,
             "hair_roughness": 0.3,
         }
-        if eye_color == "brown":
-            params["iris_color"] = [
-                random.uniform(0.26, 0.35),
-                random.uniform(0.10, 0.20),
-                random.uniform(0.00, 0.10),
-                1.00,
-            ]
-        elif eye_color == "blue":
-            params["iris_color"] = [
-                random.uniform(0.05, 0.10),
-                random.uniform(0.15, 0.20),
-                random.uniform(0.30, 0.40),
-                1.00,
-            ]
-        elif eye_color == "green":
-            params["iris_color"] = [
-                random.uniform(0.10, 0.20),
-                random.uniform(0.35, 0.45),
-                random.uniform(0.00, 0.10),
-                1.00,
-            ]
-        else:
-            raise KeyError(
-                "Please provide an available eye color value, not", eye_color
-            )
-        return params
-
-    # enddef
+        params["eyes"]["iris_color"] = [
+            iris_rng.uniform(*color_range) for color_range in IRIS_COLOR_RANGES[cat["eye_color"]]
+        ] + [1.00]
 
-    ##################################################################
-    def _get_hair_params(hair_length, hair_color, skin_tone, skin_type, gender, age):
-        _hair_groups = {}
-        _hair_groups["female"] = {
-            "long": [
-                "Bob Bangs",
-                "Bob Long",
-                "Medium Center Part",
-                "Medium Side Part",
-                "Undercut",
-                "Wavy Bob Bangs",
-            ],
-            "average": [
-                "Afro Dreads",
-                "Afro",
-                "Curly Afro",
-                "Dreadlocks",
-                "Bob Short",
-                "Bun Bangs",
-                "Bun",
-                "Ponytail Short",
-                "Ponytail",
-            ],
-            "short": [
-                "Curls High Top Fade",
-                "Bowl",
-                "Combed Stylized",
-                "Flat top",
-                "Mohawk",
-                "Pixie Messy",
-                "Pixie",
-                "Slicked Back Side Part",
-                "Slicked Back",
-                "Spiked Up",
-                "Buzzcut Curly Fade",
-                "Buzzcut Fade",
-                "Short Combed",
-                "Short Curly Fade",
-                "Short Side Part",
-            ],
-        }
-        _hair_groups["male"] = {
-            "long": [
-                "Bob Long",
-                "Medium Center Part",
-                "Medium Side Part",
-                "Undercut",
-                "Wavy Bob Bangs",
-            ],
-            "average": [
-                "Afro Dreads",
-                "Afro",
-                "Curly Afro",
-                "Dreadlocks",
-                "Bun",
-                "Ponytail Short",
-                "Ponytail",
-            ],
-            "short": [
-                "Curls High Top Fade",
-                "Bowl",
-                "Combed Stylized",
-                "Flat top",
-                "Mohawk",
-                "Pixie Messy",
-                "Pixie",
-                "Slicked Back Side Part",
-                "Slicked Back",
-                "Spiked Up",
-                "Buzzcut Curly Fade",
-                "Buzzcut Fade",
-                "Short Combed",
-                "Short Curly Fade",
-                "Short Side Part",
-            ],
-        }
-
-        random_hair_style = (
+        hair_length = cat["hair_length"]
+        hair_style = (
             None
             if hair_length == "bald"
-            else random.choice(_hair_groups[gender][hair_length])
+            else _rng("hair.hair_style").choice(self._get_hair_styles(gender, hair_length))
         )
-        params = {
-            "hair_style": random_hair_style,
-            "length": round(random.triangular(0.7, 1.0, 0.9), 3),
+        hair = {
+            "hair_style": hair_style,
+            "length": round(_rng("hair.length").triangular(0.7, 1.0, 0.9), 3),
             "lightness": 0.5,  # TODO clarify if this should be random
-            "redness": random.triangular(
-                0.0, 1.0
-            ),  # TODO clarify if this should be random
-            "roughness": random.triangular(
-                0.0, 1.0
-            ),  # TODO clarify if this should be random
+            "redness": _rng("hair.redness").triangular(0.0, 1.0),  # TODO clarify if this should be random
+            "roughness": _rng("hair.roughness").triangular(0.0, 1.0),  # TODO clarify if this should be random
             "salt_and_pepper": 0.0,  # TODO clarify if this should be random
             "roots": 0.0,  # TODO clarify if this should be random
             "hue": 0.5,
         }
+        if cat["hair_color"] in HAIR_LIGHTNESS_RANGES:
+            hair["lightness"] = _rng("hair.lightness").uniform(*HAIR_LIGHTNESS_RANGES[cat["hair_color"]])
+        # endif
+        if age in HAIR_SALT_AND_PEPPER_RANGES:
+            hair["salt_and_pepper"] = _rng("hair.salt_and_pepper").uniform(*HAIR_SALT_AND_PEPPER_RANGES[age])
+        # endif
+        params["hair"] = hair
+
+        outfit_set = _rng("outfit.outfit_set").choice(CLOTHING_SETS[cat["clothing"]])
+        outfit = _rng("outfit.outfit_style").choice(self.outfits[(gender, outfit_set)])
+        params["outfit"] = {
+            "outfit_style": "{}/{}".format(outfit_set, outfit),
+            "outfit_palette": CLOTHING_PALETTES.get(cat["clothing_color"], "RANDOM_FULL"),
+        }
+        params["footwear"] = {"footwear_style": "random"}
+
+        # no makeup and beards for now..
+        # TODO add beard
 
-        if hair_color == "black":
-            params["lightness"] = random.uniform(0.0, 0.2)
-        elif hair_color == "dark":
-            params["lightness"] = random.uniform(0.2, 0.4)
-        elif hair_color == "average":
-            params["lightness"] = random.uniform(0.35, 0.7)
-        elif hair_color == "light":
-            params["lightness"] = random.uniform(0.7, 1.0)
-
-        if age == "adult":
-            params["salt_and_pepper"] = random.uniform(0.0, 0.80)
-        elif age == "senior":
-            params["salt_and_pepper"] = random.uniform(0.5, 1.00)
         return params
 
     # enddef
 
     ##################################################################
-    def _get_outfit_params(clothing, clothing_color, gender):
-        sets = []
-        if clothing == "casual":
-            sets = ["Casual", "Summer", "Winter"]
-        elif clothing == "business":
-            sets = ["Office"]
-        else:
-            raise KeyError("Please provide an available clothing style, not", clothing)
+    def SampleBatch(self, source, cell=None):
+        """
+        Draws the parameters of a batch of humans with vectorized draws.
+
+        Parameters
+        ----------
+        source : rng.KeyedUniformSource
+            source of uniform random numbers, defines the number of humans
+        cell : dict, optional
+            values of the Zwicky box dimensions, e.g. a cell returned by IterCells.
+            A value is either shared by all humans of the batch or given per human
+            as an array. Dimensions not given are drawn.
+
+        Returns
+        -------
+        batch.ParamsBatch
+            parameters of all humans
+        """
+        count = source.iCount
+
+        cat = {}
+        for key, value, choices in self.dimensions:
+            if cell is not None and key in cell:
+                if isinstance(cell[key], np.ndarray):
+                    cat[key] = cell[key].astype(object)
+                else:
+                    cat[key] = np.full(count, cell[key], dtype=object)
+                # endif
+            elif choices is None:
+                cat[key] = np.full(count, value, dtype=object)
+            else:
+                cat[key] = ChooseFrom(source.Draw(key), choices, self.alias_tables.get(key))
+            # endif
+        # endfor
+
+        gender = cat["gender"]
+        age = cat["age"]
+        height_gender = np.where(gender == "male", "male", "female").astype(object)
+
+        columns = {}
+        columns["gender"] = gender
+        columns["body"] = ChooseGrouped(
+            source.Draw("body"),
+            gender + "/" + cat["type"],
+            {"{}/{}".format(*key): value for key, value in self.bodies.items()},
+        )
+
+        body_ranges = _lookup(cat["bodytype"], BODYTYPE_RANGES.get)
+        for idx, path in enumerate(("muscular", "overweight", "skinny")):
+            columns[path] = Triangular(source.Draw(path), body_ranges[:, idx, 0], body_ranges[:, idx, 1])
+        # endfor
+
+        height_ranges = _lookup(
+            height_gender + "/" + cat["bodyheight"],
+            lambda key: HEIGHT_RANGES[key.split("/")[0]][key.split("/")[1]],
+        )
+        columns["height"] = Triangular(source.Draw("height"), height_ranges[:, 0], height_ranges[:, 1])
+
+        def _ud(path, min, max):
+            return UniformDiscrete(source.Draw(path), min, max)
+
+        # enddef
+
+        age_params = _lookup(age, lambda key: SKIN_AGE_PARAMS[key][0:2])
+        sagging = _lookup(age, lambda key: SKIN_AGE_PARAMS[key][2])
+        wrinkles = _lookup(age, lambda key: SKIN_AGE_PARAMS[key][3])
+        columns.update(
+            {
+                "skin.tone": _ud("skin.tone", 0.100, 2.000),
+                "skin.redness": _ud("skin.redness", -0.200, 0.800),
+                "skin.saturation": _ud("skin.saturation", 0.000, 1.500),
+                "skin.normal_strength": RandInt(source.Draw("skin.normal_strength"), 1, 4),
+                "skin.roughness_multiplier": _ud("skin.roughness_multiplier", 1.500, 2.000),
+                "skin.dark_areas": _ud("skin.dark_areas", 0.000, 2.000),
+                "skin.light_areas": _ud("skin.light_areas", 0.000, 2.000),
+                "skin.freckles": _ud("skin.freckles", 0.000, 0.500),
+                "skin.splotches": _ud("skin.splotches", 0.000, 0.500),
+                "skin.beauty_spots_amount_": RandInt(source.Draw("skin.beauty_spots_amount_"), 0, 100),
+                "skin.beauty_spots_opacity": _ud("skin.beauty_spots_opacity", 0.000, age_params[:, 0]),
+                "skin.beauty_spots_amount": _ud("skin.beauty_spots_amount", 0.000, age_params[:, 1]),
+                "skin.sagging": np.round(Triangular(source.Draw("skin.sagging"), sagging[:, 0], sagging[:, 1]), 2),
+                "skin.wrinkles": np.round(
+                    Triangular(source.Draw("skin.wrinkles"), wrinkles[:, 0], wrinkles[:, 1]), 2
+                ),
+            }
+        )
+
+        iris_ranges = _lookup(cat["eye_color"], IRIS_COLOR_RANGES.get)
+        iris_color = Uniform(source.Draw("eyes.iris_color", 3), iris_ranges[:, :, 0], iris_ranges[:, :, 1])
+        columns["eyes.iris_color"] = np.hstack([iris_color, np.ones((count, 1))])
+        columns["eyes.eyebrows_style"] = RandInt(source.Draw("eyes.eyebrows_style"), 0, 10)
+
+        hair_length = cat["hair_length"]
+        hair_style = np.empty(count, dtype=object)
+        not_bald = hair_length != "bald"
+        hair_keys = (gender + "/" + hair_length)[not_bald]
+        hair_style[not_bald] = ChooseGrouped(
+            source.Draw("hair.hair_style")[not_bald],
+            hair_keys,
+            {key: self._get_hair_styles(*key.split("/")) for key in np.unique(hair_keys)},
+        )
+        columns["hair.hair_style"] = hair_style
+        columns["hair.length"] = np.round(Triangular(source.Draw("hair.length"), 0.7, 1.0, 0.9), 3)
+        columns["hair.redness"] = Triangular(source.Draw("hair.redness"), 0.0, 1.0)
+        columns["hair.roughness"] = Triangular(source.Draw("hair.roughness"), 0.0, 1.0)
+
+        lightness = _lookup(cat["hair_color"], lambda key: HAIR_LIGHTNESS_RANGES.get(key, (0.5, 0.5)))
+        columns["hair.lightness"] = Uniform(source.Draw("hair.lightness"), lightness[:, 0], lightness[:, 1])
+        salt_and_pepper = _lookup(age, lambda key: HAIR_SALT_AND_PEPPER_RANGES.get(key, (0.0, 0.0)))
+        columns["hair.salt_and_pepper"] = Uniform(
+            source.Draw("hair.salt_and_pepper"), salt_and_pepper[:, 0], salt_and_pepper[:, 1]
+        )
+
+        outfit_set = ChooseGrouped(source.Draw("outfit.outfit_set"), cat["clothing"], CLOTHING_SETS)
+        outfit = ChooseGrouped(
+            source.Draw("outfit.outfit_style"),
+            gender + "/" + outfit_set,
+            {"{}/{}".format(*key): value for key, value in self.outfits.items()},
+        )
+        columns["outfit.outfit_style"] = outfit_set + "/" + outfit
+        columns["outfit.outfit_palette"] = _lookup(
+            cat["clothing_color"], lambda key: CLOTHING_PALETTES.get(key, "RANDOM_FULL")
+        ).astype(object)
+
+        # values shared by all humans, drawn values are filled in from the columns
+        template = {
+            "gender": None,
+            "body": None,
+            "muscular": None,
+            "overweight": None,
+            "skinny": None,
+            "height": None,
+            "face": "random",
+            "skin": {},
+            "eyes": {
+                "iris_color": None,
+                "eyebrows_style": None,
+                "eyebrows_length": None,  # TODO implement
+                "eyelashes_lenght": None,  # TODO implement
+                "hair_lightness": 0.3,
+                "hair_redness": 0.9,
+                "hair_roughness": 0.3,
+            },
+            "hair": {
+                "hair_style": None,
+                "length": None,
+                "lightness": None,
+                "redness": None,
+                "roughness": None,
+                "salt_and_pepper": None,
+                "roots": 0.0,
+                "hue": 0.5,
+            },
+            "outfit": {},
+            "footwear": {"footwear_style": "random"},
+        }
+
+        return batch.ParamsBatch(count, template, columns)
+
+    # enddef
+
+    ##################################################################
+    def IterCells(self, count, quotas=None):
+        """
+        Enumerates the cells of the Zwicky box, i.e. the cross product of the allowed
+        values of all dimensions, and allocates a total number of humans to the cells.
+
+        The cells are generated lazily. Without weights the humans are spread evenly,
+        so that the counts of any two cells differ by at most one. With weighted values
+        in the specification or with quotas, each cell gets its share of the total weight,
+        rounded such that the counts add up to the requested total. Quotas are
+        multiplied with the weights of the specification.
+
+        Parameters
+        ----------
+        count : int
+            total number of humans
+        quotas : dict or callable, optional
+            either a dict of relative weights per dimension value,
+            e.g. {"clothing": {"casual": 0.6, "business": 0.4}}, where values not given
+            have weight 1.0 and the weight of a cell is the product of its value weights,
+            or a function returning the weight of a cell dict
+
+        Yields
+        ------
+        tuple
+            (cell, cell_count), where cell is a dict with a value for every dimension
+        """
+        keys = [key for key, _, _ in self.dimensions]
+        values = [(value,) if choices is None else choices for _, value, choices in self.dimensions]
+        cell_total = math.prod(len(dim_values) for dim_values in values)
+
+        def _cells():
+            for combination in itertools.product(*values):
+                yield dict(zip(keys, combination))
+            # endfor
+
+        # enddef
+
+        if quotas is None and not self.weights:
+            # integer arithmetic, so the remainder is spread evenly over the cells
+            assigned = 0
+            for idx, cell in enumerate(_cells()):
+                target = count * (idx + 1) // cell_total
+                yield cell, target - assigned
+                assigned = target
+            # endfor
+            return
         # endif
-        print(sets)
-        outfit_set = random.choice(sets)
-        outfit_list = generator_params.dict_outfits[gender][outfit_set]
-        print(outfit_list)
-        outfit = random.choice(outfit_list)
-        outfit_style = "{}/{}".format(outfit_set, outfit)
 
-        outfit_palette = "RANDOM_FULL"
+        # weights of the values per dimension, from the weighted values of the specification
+        dim_weights = []
+        for key, dim_values in zip(keys, values):
+            if key in self.weights:
+                dim_weights.append(dict(zip(dim_values, self.weights[key])))
+            else:
+                dim_weights.append({value: 1.0 for value in dim_values})
+            # endif
+        # endfor
+
+        if callable(quotas):
+
+            def get_weight(cell):
+                return quotas(cell) * math.prod(weights[cell[key]] for key, weights in zip(keys, dim_weights))
 
-        if clothing_color == "dark":
-            outfit_palette = "DARK"
-        elif clothing_color == "bright":
-            outfit_palette = "BRIGHT"
+            # enddef
 
-        outfit_params = {"outfit_style": outfit_style, "outfit_palette": outfit_palette}
+            weight_total = math.fsum(get_weight(cell) for cell in _cells())
+        else:
+            for key, dim_values, weights in zip(keys, values, dim_weights):
+                dim_quotas = {} if quotas is None else quotas.get(key, {})
+                for value in dim_quotas:
+                    if value not in dim_values:
+                        raise KeyError(f"Quota given for value '{value}' not in Zwicky dimension '{key}'")
+                    # endif
+                    weights[value] *= float(dim_quotas[value])
+                # endfor
+            # endfor
+
+            def get_weight(cell):
+                return math.prod(weights[cell[key]] for key, weights in zip(keys, dim_weights))
+
+            # enddef
+
+            weight_total = math.prod(math.fsum(weights.values()) for weights in dim_weights)
+        # endif
+
+        if not weight_total > 0.0:
+            raise ValueError("The total weight of the Zwicky cells has to be positive")
+        # endif
 
-        footwear_params = {"footwear_style": "random"}
-        return outfit_params, footwear_params
+        weight_sum = 0.0
+        assigned = 0
+        for idx, cell in enumerate(_cells()):
+            weight_sum += get_weight(cell)
+            target = count if idx + 1 == cell_total else min(count, round(count * weight_sum / weight_total))
+            yield cell, max(target - assigned, 0)
+            assigned = max(target, assigned)
+        # endfor
 
     # enddef
 
-    params = {}
 
-    gender = _get_param("gender", ["male", "female"])
-    skin_type = _get_param("type", ["asian", "black", "caucasian"])
-    age = _get_param("age", ["young", "adult", "senior"])
-    bodytype = _get_param(
-        "bodytype", ["thin", "athletic", "average", "corpulent", "obese"]
-    )
-    height = _get_param("bodyheight", ["short", "average", "tall"])
-    skin_tone = _get_param("skin_tone", ["dark", "average", "bright"])
-    hair_length = _get_param("hair_length", ["bald", "short", "average", "long"])
-    hair_color = _get_param("hair_color", ["black", "dark", "average", "light"])
-    eye_color = _get_param("eye_color", ["blue", "green", "brown"])
-    clothing = _get_param("clothing", ["casual", "business"])
-    clothing_color = _get_param("clothing_color", ["bright, dark"])
+# endclass
+
+
+######################################################################
+def _check_values(values, table, name):
+    for value in values:
+        if value not in table:
+            raise KeyError(f"Please provide an available {name}, not", value)
+        # endif
+    # endfor
+
+
+# enddef
+
+
+######################################################################
+def _lookup(keys, get_value):
+    # evaluates get_value only once per distinct key and maps the result to all rows
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    values = np.array([get_value(key) for key in unique_keys])
+    return values[inverse.reshape(-1)]
+
+
+# enddef
+
+
+######################################################################
+_sampler_cache = {}
+
+
+def GetZwickySampler(zwicky_params, generator_params):
+    """
+    Returns the compiled sampler for a Zwicky box specification.
+    Samplers are cached, so the specification is only compiled once.
+    The order of weighted values is part of the key, as it determines the values drawn.
+    """
+    key = (json.dumps(zwicky_params, default=str), GetCatalogKey(generator_params))
+    sampler = _sampler_cache.get(key)
+    if sampler is None or sampler.generator_params is not generator_params:
+        if len(_sampler_cache) >= 256:
+            _sampler_cache.clear()
+        # endif
+        sampler = ZwickySampler(zwicky_params, generator_params)
+        _sampler_cache[key] = sampler
+    # endif
+    return sampler
+
+
+# enddef
 
-    params["gender"] = gender
 
-    params["body"] = _get_type_param(skin_type, gender)
-    params["muscular"], params["overweight"], params["skinny"] = _get_body_type_params(
-        bodytype, gender
-    )
+######################################################################
+def ZwickyParams(zwicky_params, generator_params, rng=None):
+    """
+    Create a set of parameters for human generation from a Zwicky box specification.
+
+    Parameters
+    ----------
+    zwicky_params : dict
+        Zwicky box specification, see ZwickySampler
+    generator_params : HumGenConfigValues
+        settings of humgen plugin
+    rng : random.Random, optional
+        random number generator, by default the global generator of the random module
+
+    Returns
+    -------
+    dict
+        Dictionary of parameters for human generator
+    """
+    return GetZwickySampler(zwicky_params, generator_params).Sample(rng)
 
-    params["height"] = _get_height_param(height, gender)
-    params["face"] = "random"
 
-    params["skin"] = _get_skin_params(skin_tone, skin_type, gender, age)
+# enddef
 
-    params["eyes"] = _get_eyes_params(eye_color, gender)
 
-    params["hair"] = _get_hair_params(
-        hair_length, hair_color, skin_tone, skin_type, gender, age
-    )
+######################################################################
+def ZwickyParamsBatch(zwicky_params, generator_params, source):
+    """
+    Vectorized version of ZwickyParams, which draws the parameters
+    of a whole batch of humans at once.
+
+    Parameters
+    ----------
+    zwicky_params : dict
+        Zwicky box specification, see ZwickySampler
+    generator_params : HumGenConfigValues
+        settings of humgen plugin
+    source : rng.KeyedUniformSource
+        source of uniform random numbers, defines the number of humans
+
+    Returns
+    -------
+    batch.ParamsBatch
+        parameters of all humans
+    """
+    return GetZwickySampler(zwicky_params, generator_params).SampleBatch(source)
 
-    params["outfit"], params["footwear"] = _get_outfit_params(
-        clothing, clothing_color, gender
-    )
 
-    # no makeup and beards for now..
-    # TODO add beard
+# enddef
 
-    return params
 
+######################################################################
+def IterZwickyParams(zwicky_params, generator_params, count, seed=None, quotas=None, chunk_size=10000):
+    """
+    Streams the parameters of a total number of humans, which are allocated to the
+    cells of a Zwicky box (see ZwickySampler.IterCells). In contrast to drawing every
+    dimension independently, every cell with a positive count is guaranteed to be
+    covered. The humans are drawn in chunks of consecutive cells and only one chunk
+    is held in memory at a time.
+
+    The values of a human only depend on the seed and its running index in the stream,
+    just like the humans of ComputeParamsBatch.
+
+    Parameters
+    ----------
+    zwicky_params : dict
+        Zwicky box specification, see ZwickySampler
+    generator_params : HumGenConfigValues
+        settings of humgen plugin
+    count : int
+        total number of humans
+    seed : object, optional
+        seed for the randomization, None for a non-deterministic seed
+    quotas : dict or callable, optional
+        relative weights of the cells, see ZwickySampler.IterCells
+    chunk_size : int, optional
+        maximal number of humans drawn at once
+
+    Yields
+    ------
+    dict
+        Dictionary of parameters for human generator
+    """
+    sampler = GetZwickySampler(zwicky_params, generator_params)
+    if seed is None:
+        # fix the seed, so that all chunks use the same one
+        seed = random.SystemRandom().getrandbits(64)
+    # endif
+
+    def _draw_chunk(human_idx, chunk):
+        # draws the humans of consecutive cells at once, with the cell values given per human
+        cells, counts = zip(*chunk)
+        chunk_count = sum(counts)
+        chunk_cells = {
+            key: np.repeat(np.array([cell[key] for cell in cells], dtype=object), counts) for key in cells[0]
+        }
+        source = KeyedUniformSource(chunk_count, seed, range(human_idx, human_idx + chunk_count))
+        return sampler.SampleBatch(source, chunk_cells)
+
+    # enddef
+
+    human_idx = 0
+    chunk = []
+    chunk_count = 0
+    for cell, cell_count in sampler.IterCells(count, quotas):
+        while cell_count > 0:
+            part_count = min(cell_count, chunk_size - chunk_count)
+            chunk.append((cell, part_count))
+            chunk_count += part_count
+            cell_count -= part_count
+            if chunk_count == chunk_size:
+                yield from _draw_chunk(human_idx, chunk)
+                human_idx += chunk_count
+                chunk = []
+                chunk_count = 0
+            # endif
+        # endwhile
+    # endfor
+    if chunk_count > 0:
+        yield from _draw_chunk(human_idx, chunk)
+    # endif
 
 # enddef
@@ -0,0 +1,466 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Offline planning of the parameters of many humans, outside of Blender:
+#   python -m anyhuman.plan <output .jsonl or .parquet> --humgen <HumGen3D content folder> --mode ZWICKY
+#       --params <json or json file> --count 100000 [--seed 0] [--workers 8]
+#
+# Every record holds the id, the seed and the computed parameters of a human as
+# {"sId": <id>, "xSeed": <seed>, "sMode": <mode>, "sHash": <content hash>, "mParams": <parameters>}, so that a
+# JSONL plan can be read by the FILE mode with its 'sId'.
+
+import os
+import json
+import argparse
+import contextlib
+import collections
+import concurrent.futures
+from pathlib import Path
+
+from .catalog import LoadCatalog
+from .paramgenerators import ComputeParams
+from .paramgenerators.hashing import HashParams
+from .paramgenerators.rng import CreateRandom, KeyedRandom
+from .paramgenerators.stats import ParamsStatistics
+from .paramgenerators.validator import GetParamsValidator
+
+# number of rows per row group of Parquet files
+PARQUET_ROW_GROUP_SIZE = 65536
+
+# settings of the planner in a worker process, set by _InitWorker
+_dicWorker = {}
+
+
+######################################################################
+def PlanChunk(_dicSettings, _iStart, _iStop):
+    """
+    Computes the parameters of the humans with indices in range [_iStart, _iStop).
+
+    Parameters
+    ----------
+    _dicSettings : dict
+        planner settings, see IterPlan
+    _iStart : int
+        index of the first human
+    _iStop : int
+        index after the last human
+
+    Returns
+    -------
+    list
+        tuples (id, seed, content hash, parameters as JSON string) per human, see paramgenerators.hashing
+    dict
+        statistics of the humans as stats.ParamsStatistics.ToDict, if the settings contain 'lStatisticsFields'
+    """
+    xValidator = None
+    if _dicSettings["bValidate"] is True:
+        xValidator = GetParamsValidator(_dicSettings["xGeneratorParams"])
+    # endif
+
+    xStatistics = None
+    if _dicSettings.get("lStatisticsFields") is not None:
+        xStatistics = ParamsStatistics(*_dicSettings["lStatisticsFields"])
+    # endif
+
+    lRecords = []
+    # parameters like the face are resolved by HumGen3D when the human is created,
+    # so the messages about not randomized parameters are not shown for every human
+    with open(os.devnull, "w") as xDevNull, contextlib.redirect_stdout(xDevNull):
+        for iIndex in range(_iStart, _iStop):
+            sId = f"{_dicSettings['sIdPrefix']}{iIndex}"
+            if _dicSettings["bKeyedRandom"] is True:
+                xSeed = _dicSettings["iSeed"]
+                xRandom = KeyedRandom(xSeed, sId)
+            else:
+                xSeed = _dicSettings["iSeed"] + iIndex
+                xRandom = CreateRandom(xSeed)
+            # endif
+
+            dicModeParams = _dicSettings["dicParams"]
+            if _dicSettings["sMode"] == "LHS":
+                # the humans of the plan are the humans of one Latin hypercube batch
+                dicModeParams = dict(dicModeParams, iIndex=iIndex, iCount=_dicSettings["iCount"])
+            # endif
+            dicParams = ComputeParams(
+                _dicSettings["sMode"],
+                dicModeParams,
+                _dicSettings["dicOverwrite"],
+                _dicSettings["xGeneratorParams"],
+                rng=xRandom,
+            )
+            if xValidator is not None:
+                xValidator.Check(dicParams)
+            # endif
+            sHash = HashParams(dicParams, _dicSettings["xGeneratorParams"])
+            lRecords.append((sId, xSeed, sHash, json.dumps(dicParams)))
+            if xStatistics is not None:
+                xStatistics.Add(dicParams)
+            # endif
+        # endfor
+    # endwith
+    return lRecords, None if xStatistics is None else xStatistics.ToDict()
+
+
+# enddef
+
+
+def _InitWorker(_dicSettings):
+    _dicWorker.update(_dicSettings)
+
+
+# enddef
+
+
+def _PlanWorkerChunk(_iStart, _iStop):
+    return PlanChunk(_dicWorker, _iStart, _iStop)
+
+
+# enddef
+
+
+######################################################################
+def IterPlan(
+    _sMode,
+    _dicParams,
+    _dicOverwrite,
+    _xGeneratorParams,
+    _iCount,
+    _iSeed=0,
+    _bKeyedRandom=False,
+    _sIdPrefix="human_",
+    _iWorkers=None,
+    _iChunkSize=256,
+    _bValidate=True,
+    _xStatistics=None,
+):
+    """
+    Computes the parameters of _iCount humans in a process pool and yields them in the order of the humans.
+
+    Human i gets the id '<_sIdPrefix><i>' and is generated like ops.GenerateHuman does, with the seed
+    _iSeed + i, or with the seed _iSeed and a KeyedRandom generator for the human id if _bKeyedRandom is True.
+    Only a few chunks per worker are in flight at a time, so the memory needed does not grow with _iCount.
+    For the mode LHS, the humans are the _iCount humans of one Latin hypercube batch, whose seed is
+    the value 'xSeed' of _dicParams, or _iSeed if it is not given.
+
+    Parameters
+    ----------
+    _sMode : str
+        mode for the parameter computation, see paramgenerators.ComputeParams
+    _dicParams : dict
+        parameters for the mode
+    _dicOverwrite : dict
+        parameters that overwrite the computed values
+    _xGeneratorParams : HumGenConfigValues
+        asset catalog, see catalog.ScanCatalog
+    _iCount : int
+        number of humans
+    _iSeed : int, optional
+        base seed
+    _bKeyedRandom : bool, optional
+        draw every parameter from a separate random stream, see rng.KeyedRandom
+    _sIdPrefix : str, optional
+        prefix of the human ids
+    _iWorkers : int, optional
+        number of worker processes, by default the number of CPUs. With 1 all humans are computed in this process.
+    _iChunkSize : int, optional
+        number of humans computed by a worker at a time
+    _bValidate : bool, optional
+        check the parameters against the asset catalog, see paramgenerators.validator
+    _xStatistics : ParamsStatistics, optional
+        statistics the humans are added to, see paramgenerators.stats
+
+    Yields
+    ------
+    tuple
+        id, seed, content hash and parameters as JSON string of a human
+
+    Raises
+    ------
+    ValueError
+        for the mode DIVERSE, whose humans depend on the humans generated before in the same process,
+        so that they would depend on the distribution of the chunks to the workers
+    """
+    if _sMode == "DIVERSE":
+        raise ValueError(
+            "The mode DIVERSE cannot be planned, since its humans depend on the humans generated before"
+            " in the same process. Use paramgenerators.diversity.IterDiverseParams for diverse plans."
+        )
+    # endif
+
+    if _sMode == "LHS":
+        _dicParams = dict(_dicParams)
+        _dicParams.setdefault("xSeed", _iSeed)
+    # endif
+
+    dicSettings = {
+        "sMode": _sMode,
+        "dicParams": _dicParams,
+        "iCount": _iCount,
+        "dicOverwrite": _dicOverwrite,
+        "xGeneratorParams": _xGeneratorParams,
+        "iSeed": _iSeed,
+        "bKeyedRandom": _bKeyedRandom,
+        "sIdPrefix": _sIdPrefix,
+        "bValidate": _bValidate,
+        "lStatisticsFields": None,
+    }
+    if _xStatistics is not None:
+        dicSettings["lStatisticsFields"] = (
+            _xStatistics.lContinuousFields,
+            _xStatistics.lCategoricalFields,
+            _xStatistics.iBins,
+        )
+    # endif
+    if _iWorkers is None:
+        _iWorkers = os.cpu_count() or 1
+    # endif
+    lChunks = [(iStart, min(iStart + _iChunkSize, _iCount)) for iStart in range(0, _iCount, _iChunkSize)]
+
+    if _iWorkers <= 1:
+        for iStart, iStop in lChunks:
+            yield from _MergeChunk(PlanChunk(dicSettings, iStart, iStop), _xStatistics)
+        # endfor
+        return
+    # endif
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=_iWorkers, initializer=_InitWorker, initargs=(dicSettings,)
+    ) as xExecutor:
+        # futures in the order of the chunks, bounded to keep the memory constant
+        dqFutures = collections.deque()
+        iNext = 0
+        while iNext < len(lChunks) or len(dqFutures) > 0:
+            while iNext < len(lChunks) and len(dqFutures) < 4 * _iWorkers:
+                dqFutures.append(xExecutor.submit(_PlanWorkerChunk, *lChunks[iNext]))
+                iNext += 1
+            # endwhile
+            yield from _MergeChunk(dqFutures.popleft().result(), _xStatistics)
+        # endwhile
+    # endwith
+
+
+# enddef
+
+
+def _MergeChunk(_tChunk, _xStatistics):
+    # records of a chunk, after its statistics were merged
+    lRecords, dicStatistics = _tChunk
+    if dicStatistics is not None:
+        _xStatistics.Merge(ParamsStatistics.FromDict(dicStatistics))
+    # endif
+    return lRecords
+
+
+# enddef
+
+
+######################################################################
+def WritePlan(_pathOutput, _iterRecords, _sMode):
+    """
+    Writes the records of IterPlan to a JSONL file, or to a Parquet file if the
+    extension of _pathOutput is '.parquet'. Parquet files need the pyarrow package
+    and store the parameters as JSON string in the column 'mParams'.
+
+    Returns
+    -------
+    int
+        number of written records
+    """
+    pathOutput = Path(_pathOutput)
+    pathOutput.parent.mkdir(parents=True, exist_ok=True)
+
+    # write to a temporary file first, so that a failed run does not leave an incomplete plan
+    pathTemp = pathOutput.with_name(pathOutput.name + ".tmp")
+    try:
+        if pathOutput.suffix.lower() == ".parquet":
+            iCount = _WriteParquet(pathTemp, _iterRecords, _sMode)
+        else:
+            iCount = _WriteJsonl(pathTemp, _iterRecords, _sMode)
+        # endif
+        os.replace(pathTemp, pathOutput)
+    finally:
+        if pathTemp.exists():
+            pathTemp.unlink()
+        # endif
+    # endtry
+    return iCount
+
+
+# enddef
+
+
+def _WriteJsonl(_pathOutput, _iterRecords, _sMode):
+    sMode = json.dumps(_sMode)
+    iCount = 0
+    with open(_pathOutput, "w", encoding="utf-8") as xFile:
+        for sId, xSeed, sHash, sParams in _iterRecords:
+            xFile.write(
+                f'{{"sId": {json.dumps(sId)}, "xSeed": {json.dumps(xSeed)}, "sMode": {sMode}, '
+                f'"sHash": "{sHash}", "mParams": {sParams}}}\n'
+            )
+            iCount += 1
+        # endfor
+    # endwith
+    return iCount
+
+
+# enddef
+
+
+def _WriteParquet(_pathOutput, _iterRecords, _sMode):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Writing Parquet files requires the 'pyarrow' package")
+    # endtry
+
+    xSchema = pyarrow.schema(
+        [
+            ("sId", pyarrow.string()),
+            ("xSeed", pyarrow.int64()),
+            ("sMode", pyarrow.string()),
+            ("sHash", pyarrow.string()),
+            ("mParams", pyarrow.string()),
+        ]
+    )
+
+    iCount = 0
+    lRows = []
+    with pyarrow.parquet.ParquetWriter(_pathOutput, xSchema) as xWriter:
+        for tRecord in _iterRecords:
+            lRows.append(tRecord)
+            if len(lRows) >= PARQUET_ROW_GROUP_SIZE:
+                _WriteRowGroup(xWriter, xSchema, lRows, _sMode)
+                iCount += len(lRows)
+                lRows = []
+            # endif
+        # endfor
+        if len(lRows) > 0 or iCount == 0:
+            _WriteRowGroup(xWriter, xSchema, lRows, _sMode)
+            iCount += len(lRows)
+        # endif
+    # endwith
+    return iCount
+
+
+# enddef
+
+
+def _WriteRowGroup(_xWriter, _xSchema, _lRows, _sMode):
+    import pyarrow
+
+    lIds, lSeeds, lHashes, lParams = zip(*_lRows) if len(_lRows) > 0 else ((), (), (), ())
+    xTable = pyarrow.Table.from_arrays(
+        [
+            pyarrow.array(lIds, pyarrow.string()),
+            pyarrow.array(lSeeds, pyarrow.int64()),
+            pyarrow.array([_sMode] * len(_lRows), pyarrow.string()),
+            pyarrow.array(lHashes, pyarrow.string()),
+            pyarrow.array(lParams, pyarrow.string()),
+        ],
+        schema=_xSchema,
+    )
+    _xWriter.write_table(xTable)
+
+
+# enddef
+
+
+######################################################################
+def LoadJsonArgument(_sValue):
+    """
+    Returns the value of a command line argument given as JSON, or as path of a JSON file.
+    """
+    if _sValue is None:
+        return {}
+    # endif
+    if os.path.isfile(_sValue):
+        with open(_sValue, "r") as xFile:
+            return json.load(xFile)
+        # endwith
+    # endif
+    return json.loads(_sValue)
+
+
+# enddef
+
+
+def main(_lArgs=None):
+    xParser = argparse.ArgumentParser(description="Compute the parameters of many humans outside of Blender")
+    xParser.add_argument("output", help="output file, '.jsonl' or '.parquet'")
+    xParser.add_argument("--humgen", required=True, help="content folder of the HumGen3D add-on")
+    xParser.add_argument("--personas", default=None, help="folder of the persona files for the PERSONA mode")
+    xParser.add_argument("--mode", default="RANDOM_REALISTIC", help="mode for the parameter computation")
+    xParser.add_argument("--params", default=None, help="parameters for the mode, as JSON or JSON file")
+    xParser.add_argument(
+        "--overwrite", default=None, help="parameters overwriting the computed ones, as JSON or JSON file"
+    )
+    xParser.add_argument("--count", type=int, required=True, help="number of humans")
+    xParser.add_argument("--seed", type=int, default=0, help="base seed, human i gets the seed <seed> + i")
+    xParser.add_argument("--keyed", action="store_true", help="draw every parameter from a separate random stream")
+    xParser.add_argument("--id-prefix", default="human_", help="prefix of the human ids")
+    xParser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    xParser.add_argument("--chunk-size", type=int, default=256, help="number of humans per work item")
+    xParser.add_argument("--stats", default=None, help="file for the statistics of the planned humans")
+    xParser.add_argument("--no-validate", action="store_true", help="skip the check of the parameters")
+    xArgs = xParser.parse_args(_lArgs)
+    if xArgs.mode == "DIVERSE":
+        xParser.error("the mode DIVERSE cannot be planned, see paramgenerators.diversity.IterDiverseParams")
+    # endif
+
+    xGeneratorParams = LoadCatalog(xArgs.humgen, xArgs.personas)
+    xStatistics = None if xArgs.stats is None else ParamsStatistics()
+    iterRecords = IterPlan(
+        xArgs.mode,
+        LoadJsonArgument(xArgs.params),
+        LoadJsonArgument(xArgs.overwrite),
+        xGeneratorParams,
+        xArgs.count,
+        _iSeed=xArgs.seed,
+        _bKeyedRandom=xArgs.keyed,
+        _sIdPrefix=xArgs.id_prefix,
+        _iWorkers=xArgs.workers,
+        _iChunkSize=xArgs.chunk_size,
+        _bValidate=not xArgs.no_validate,
+        _xStatistics=xStatistics,
+    )
+    iCount = WritePlan(xArgs.output, iterRecords, xArgs.mode)
+    if xStatistics is not None:
+        xStatistics.Save(xArgs.stats)
+    # endif
+    print(f"Planned {iCount} humans")
+
+
+# enddef
+
+
+if __name__ == "__main__":
+    main()
+# endif
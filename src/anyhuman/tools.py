@@ -28,7 +28,9 @@
 
 import bpy
 import mathutils
-import random
+
+# moved to the Blender independent parameter generators, kept here for compatibility
+from .paramgenerators.sampling import RandomUniformDiscrete  # noqa: F401
 
 
 ############################################################################################
@@ -130,35 +132,3 @@ def FixClothBoneWeights(skinMesh, clothMeshes, paramMaxDist=10.0):
 # FixClothBoneWeights(skinMesh, clothMeshes)
 #
 # print("done")
-
-
-############################################################################################
-def RandomUniformDiscrete(_fMin, _fMax, _iCount=101):
-    """Returns uniformly distributed random values over _iCount equally spaced discrete values in range [_fMin, _fMax]
-
-    Parameters
-    ----------
-    _fMin : float
-        minimal value
-    _fMax : float
-        maximal value
-    _iCount : int
-        number of discrete values
-
-    Returns
-    -------
-    float
-        a random value
-    """
-
-    if _iCount < 2:
-        raise RuntimeError("Count value has to be >= 2")
-    # endif
-
-    fRand = random.randint(0, _iCount - 1) / (_iCount - 1)
-    fRand = fRand * (_fMax - _fMin) + _fMin
-
-    return fRand
-
-
-# enddef
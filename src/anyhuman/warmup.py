@@ -0,0 +1,166 @@
+# <LICENSE id="GPL-3.0">
+#
+#   Image-Render Blender Human add-on module
+#   Copyright (C) 2022 Robert Bosch GmbH and its subsidiaries
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# </LICENSE>
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# -----
+# Copyright (c) 2022 Robert Bosch GmbH and its subsidiaries.
+# All rights reserved.
+# -----
+###
+
+# Warm-up of the asset catalog on a background thread. Loading the catalog and compiling the
+# structures derived from it is otherwise done when the first human of a Blender session is
+# generated. The warm-up is opt-in, see IsWarmUpEnabled, and started when the add-on registers.
+
+import os
+import os.path
+import threading
+import concurrent.futures
+
+from .catalog import LoadCatalog
+from .paramgenerators import random_full, random_realistic
+from .paramgenerators.catalog_index import GetCatalogIndex
+from .paramgenerators.validator import GetParamsValidator
+from .paramgenerators.zwicky import GetZwickySampler
+from .paramgenerators.hashing import GetCatalogFingerprint
+
+# environment variable that enables the warm-up
+WARMUP_ENV = "ANYHUMAN_WARMUP"
+
+# running or finished warm-ups by absolute content folder
+_dicWarmUps = {}
+_xLock = threading.Lock()
+
+
+############################################################################################
+def IsWarmUpEnabled():
+    """
+    Returns True if the environment variable ANYHUMAN_WARMUP is set to 1, true, yes or on.
+    """
+    return os.environ.get(WARMUP_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+# enddef
+
+
+############################################################################################
+def StartWarmUp(_sAddonPath, _pathPersonas=None):
+    """
+    Starts loading the asset catalog of a HumGen3D content folder on a background thread.
+    Besides the catalog (see catalog.LoadCatalog), the catalog index with the outfit lists of the
+    random modes, the default Zwicky sampler, the parameter validator and the catalog fingerprint
+    are compiled, so the first generated human finds them in their caches.
+    A warm-up is only started once per content folder, until its result is taken by LoadWarmCatalog.
+
+    Parameters
+    ----------
+    _sAddonPath : str
+        content folder of the HumGen3D add-on
+    _pathPersonas : Path, optional
+        folder of the persona files, by default the personas of this package
+
+    Returns
+    -------
+    concurrent.futures.Future
+        future of the catalog
+    """
+    sKey = os.path.abspath(_sAddonPath)
+    with _xLock:
+        xFuture = _dicWarmUps.get(sKey)
+        if xFuture is None:
+            xFuture = concurrent.futures.Future()
+            _dicWarmUps[sKey] = xFuture
+            xThread = threading.Thread(
+                target=_WarmUp, args=(xFuture, _sAddonPath, _pathPersonas), name="anyhuman-warmup", daemon=True
+            )
+            xThread.start()
+        # endif
+    # endwith
+    return xFuture
+
+
+# enddef
+
+
+############################################################################################
+def _WarmUp(_xFuture, _sAddonPath, _pathPersonas):
+    if not _xFuture.set_running_or_notify_cancel():
+        return
+    # endif
+    try:
+        xCatalog = LoadCatalog(_sAddonPath, _pathPersonas)
+
+        xIndex = GetCatalogIndex(xCatalog)
+        for sGender in xIndex.dicOutfitSets:
+            for xModule in (random_full, random_realistic):
+                for sSet in xModule.OUTFIT_SETS:
+                    xIndex.GetOutfits(sGender, sSet, xModule.IGNORED_OUTFITS)
+                # endfor
+            # endfor
+        # endfor
+
+        GetZwickySampler({}, xCatalog)
+        GetParamsValidator(xCatalog)
+        GetCatalogFingerprint(xCatalog)
+    except BaseException as xEx:
+        _xFuture.set_exception(xEx)
+        return
+    # endtry
+    _xFuture.set_result(xCatalog)
+
+
+# enddef
+
+
+############################################################################################
+def LoadWarmCatalog(_sAddonPath, _pathPersonas=None):
+    """
+    Returns the asset catalog of a HumGen3D content folder. If a warm-up was started for the folder,
+    waits for it to finish and returns its catalog, otherwise the catalog is loaded directly with
+    catalog.LoadCatalog. This is also done if the warm-up failed.
+
+    Parameters
+    ----------
+    _sAddonPath : str
+        content folder of the HumGen3D add-on
+    _pathPersonas : Path, optional
+        folder of the persona files, by default the personas of this package
+
+    Returns
+    -------
+    HumGenConfigValues
+        asset catalog
+    """
+    with _xLock:
+        xFuture = _dicWarmUps.pop(os.path.abspath(_sAddonPath), None)
+    # endwith
+    if xFuture is not None:
+        try:
+            return xFuture.result()
+        except Exception as xEx:
+            print("anyhuman: catalog warm-up failed, loading the catalog again:\n{}".format(str(xEx)))
+        # endtry
+    # endif
+    return LoadCatalog(_sAddonPath, _pathPersonas)
+
+
+# enddef